@@ -0,0 +1,93 @@
+"""Sequential vs asyncio "list files and prefetch the first N blobs".
+
+    python -m benchmarks.async_io --files 50 --prefetch 5 --db-latency-ms 30 --drive-latency-ms 120
+
+Both paths call the same firebase_utils / google_utils functions against the
+in-process stand-ins from benchmarks.fakes. The sequential path is what a page
+does today (list, then stats, then one download after another); the async path
+is src.async_io.list_and_prefetch.
+"""
+import argparse
+import os
+import statistics
+import time
+
+from benchmarks.fakes import FakeDriveService, FakeFirestore, FaultInjector
+from src import async_io, crypto_utils, firebase_utils, google_utils
+
+
+class _StandInManager:
+    """Plays DriveCredentialManager: every thread gets the (thread-safe) fake service."""
+
+    def __init__(self, service):
+        self._service = service
+
+    def get_service(self):
+        return self._service
+
+
+def seed(db, drive, username, n_files, file_kb):
+    firebase_utils.register_user(db, username, username, "benchmark")
+    payload = crypto_utils.encrypt_file(os.urandom(file_kb * 1024), "benchmark")
+    entries = []
+    for i in range(n_files):
+        gdrive_id = google_utils.upload_to_gdrive(drive, payload, f"bench_{i}.enc")
+        entries.append({"original_filename": f"bench_{i}.bin", "gdrive_file_id": gdrive_id,
+                        "encryption_type": "ChaCha20", "ciphertext_size": len(payload)})
+    firebase_utils.log_files_to_firestore(db, username, entries)
+
+
+def run_sequential(db, drive, username, prefetch):
+    files = firebase_utils.get_user_files(db, username, use_cache=False)
+    stats = firebase_utils.get_user_storage_stats(db, username)
+    blobs = {f["doc_id"]: google_utils.download_from_gdrive(drive, f["gdrive_file_id"]) for f in files[:prefetch]}
+    return files, stats, blobs
+
+
+def run_async(db, manager, username, prefetch):
+    return async_io.run(async_io.list_and_prefetch(db, manager, username, prefetch, use_cache=False))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sequential vs async listing + prefetch against local stand-ins.")
+    parser.add_argument("--files", type=int, default=50)
+    parser.add_argument("--file-kb", type=int, default=256)
+    parser.add_argument("--prefetch", type=int, default=5)
+    parser.add_argument("--db-latency-ms", type=float, default=30)
+    parser.add_argument("--drive-latency-ms", type=float, default=120)
+    parser.add_argument("--drive-mbps", type=float, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    firebase_utils.PASSWORD_HASH_ITERATIONS = crypto_utils.LEGACY_PASSWORD_ITERATIONS
+    db = FakeFirestore()
+    drive = FakeDriveService()
+    seed(db, drive, "bench", args.files, args.file_kb)
+    # Latency is switched on only after seeding, so it applies to the measured calls alone
+    db.inject = FaultInjector(args.db_latency_ms)
+    drive.inject = FaultInjector(args.drive_latency_ms, bytes_per_second=args.drive_mbps * 125_000 or None)
+    manager = _StandInManager(drive)
+
+    sequential, concurrent = [], []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        seq_result = run_sequential(db, drive, "bench", args.prefetch)
+        sequential.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        async_result = run_async(db, manager, "bench", args.prefetch)
+        concurrent.append(time.perf_counter() - start)
+
+        assert [f["doc_id"] for f in seq_result[0]] == [f["doc_id"] for f in async_result[0]]
+        assert seq_result[1] == async_result[1] and seq_result[2] == async_result[2]
+
+    print(f"{args.files} files listed, {args.prefetch} x {args.file_kb} KB prefetched, "
+          f"db {args.db_latency_ms:.0f} ms, drive {args.drive_latency_ms:.0f} ms (median of {args.repeat})")
+    seq_ms = statistics.median(sequential) * 1000
+    async_ms = statistics.median(concurrent) * 1000
+    print(f"  sequential   {seq_ms:8.1f} ms")
+    print(f"  async        {async_ms:8.1f} ms   ({seq_ms / async_ms:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,511 @@
+"""In-process stand-ins for the Firestore client and the Drive v3 service.
+
+They implement the subset of each API that `src.firebase_utils` and
+`src.google_utils` actually call, so the real application functions can be
+driven without touching Firebase or Google Drive:
+
+    db = FakeFirestore(FaultInjector(latency_ms=15, error_rate=0.01))
+    drive = FakeDriveService(FaultInjector(latency_ms=80, bytes_per_second=20e6))
+    firebase_utils.register_user(db, "alice", "Alice", "secret")
+    google_utils.upload_to_gdrive(drive, b"...", "file.enc")
+
+Every remote round trip (document read, query, batch/transaction commit, Drive
+request) goes through the injector, which sleeps for the configured latency and
+raises the same exception types the real clients raise (ServiceUnavailable /
+HttpError 503) for a configurable fraction of calls; Drive downloads can also
+come back with a flipped bit (`corrupt_rate`) and honour Range headers. Transactions use optimistic
+concurrency like Firestore: a commit aborts if a document read inside the
+transaction changed in the meantime, and `@firestore.transactional` retries it.
+"""
+import copy
+import json
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from firebase_admin import firestore
+from google.api_core.exceptions import AlreadyExists, Aborted, NotFound, ServiceUnavailable
+from google.cloud.firestore_v1 import transforms
+
+
+class FaultInjector:
+    """Latency and error injection shared by every call of one fake backend."""
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, bytes_per_second=None, seed=None,
+                 corrupt_rate=0.0):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.corrupt_rate = corrupt_rate
+        self.bytes_per_second = bytes_per_second
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.corruptions = 0
+
+    def __call__(self, op, nbytes=0, make_error=None):
+        """Simulate one round trip for `op`; raises `make_error(op)` for injected failures."""
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            fail = self._random.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        if self.bytes_per_second and nbytes:
+            delay += nbytes / self.bytes_per_second
+        if delay:
+            time.sleep(delay)
+        if fail:
+            raise (make_error or _unavailable)(op)
+
+    def corrupt(self, data):
+        """Return `data` with one flipped bit for a `corrupt_rate` fraction of calls."""
+        if not data or not self.corrupt_rate:
+            return data
+        with self._lock:
+            if self._random.random() >= self.corrupt_rate:
+                return data
+            self.corruptions += 1
+            position = self._random.randrange(len(data))
+        damaged = bytearray(data)
+        damaged[position] ^= 0x01
+        return bytes(damaged)
+
+
+def _unavailable(op):
+    return ServiceUnavailable(f"injected failure in {op}")
+
+
+# --- Firestore ---------------------------------------------------------------
+
+def _resolve(current, value):
+    """Apply field transforms (Increment, SERVER_TIMESTAMP) against the stored value."""
+    if value is transforms.SERVER_TIMESTAMP:
+        return datetime.now(timezone.utc)
+    if isinstance(value, transforms.Increment):
+        return (current or 0) + value.value
+    if value is transforms.DELETE_FIELD:
+        return transforms.DELETE_FIELD
+    return copy.deepcopy(value)
+
+
+def _apply_fields(target, data):
+    for key, value in data.items():
+        resolved = _resolve(target.get(key), value)
+        if resolved is transforms.DELETE_FIELD:
+            target.pop(key, None)
+        else:
+            target[key] = resolved
+
+
+class FakeSnapshot:
+    def __init__(self, reference, data):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+        self.exists = data is not None
+
+    def to_dict(self):
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field):
+        return (self._data or {}).get(field)
+
+
+class FakeDocumentReference:
+    def __init__(self, db, path):
+        self._db = db
+        self.path = path
+        self.id = path[-1]
+
+    def collection(self, name):
+        return FakeCollectionReference(self._db, self.path + (name,))
+
+    def get(self, transaction=None):
+        self._db.inject("document.get")
+        return self._db._snapshot(self)
+
+    def create(self, data):
+        self._db.inject("document.create")
+        self._db._commit([("create", self, data, False)])
+
+    def set(self, data, merge=False):
+        self._db.inject("document.set")
+        self._db._commit([("set", self, data, merge)])
+
+    def update(self, data):
+        self._db.inject("document.update")
+        self._db._commit([("update", self, data, False)])
+
+    def delete(self):
+        self._db.inject("document.delete")
+        self._db._commit([("delete", self, None, False)])
+
+    def __eq__(self, other):
+        return isinstance(other, FakeDocumentReference) and other.path == self.path
+
+    def __hash__(self):
+        return hash(self.path)
+
+
+_OPS = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+    "in": lambda a, b: a in b,
+    "not-in": lambda a, b: a not in b,
+    "array_contains": lambda a, b: isinstance(a, list) and b in a,
+}
+
+
+class FakeQuery:
+    def __init__(self, db, path, filters=(), orders=(), limit_count=None):
+        self._db = db
+        self._path = path
+        self._filters = tuple(filters)
+        self._orders = tuple(orders)
+        self._limit = limit_count
+
+    def where(self, field_path=None, op_string=None, value=None, *, filter=None):
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return FakeQuery(self._db, self._path, self._filters + ((field_path, op_string, value),),
+                         self._orders, self._limit)
+
+    def order_by(self, field_path, direction=firestore.Query.ASCENDING):
+        return FakeQuery(self._db, self._path, self._filters,
+                         self._orders + ((field_path, direction),), self._limit)
+
+    def limit(self, count):
+        return FakeQuery(self._db, self._path, self._filters, self._orders, count)
+
+    def _matches(self, data):
+        for field, op, value in self._filters:
+            # Like Firestore, a document without the field never matches a filter on it
+            if field not in data or not _OPS[op](data[field], value):
+                return False
+        return True
+
+    def stream(self, transaction=None):
+        self._db.inject("query.stream")
+        docs = [(ref, data) for ref, data in self._db._children(self._path) if self._matches(data)]
+        # Ordering by a field also excludes documents that do not have it
+        docs = [(ref, data) for ref, data in docs if all(f in data for f, _ in self._orders)]
+        for field, direction in reversed(self._orders):
+            docs.sort(key=lambda item: item[1][field], reverse=direction == firestore.Query.DESCENDING)
+        if self._limit is not None:
+            docs = docs[:self._limit]
+        for ref, data in docs:
+            yield FakeSnapshot(ref, data)
+
+    def get(self, transaction=None):
+        return list(self.stream())
+
+
+class FakeCollectionReference(FakeQuery):
+    def __init__(self, db, path):
+        super().__init__(db, path)
+        self.id = path[-1]
+
+    def document(self, document_id=None):
+        return FakeDocumentReference(self._db, self._path + (document_id or uuid.uuid4().hex[:20],))
+
+    def add(self, data, document_id=None):
+        ref = self.document(document_id)
+        ref.create(data)
+        return datetime.now(timezone.utc), ref
+
+
+class FakeWriteBatch:
+    def __init__(self, db):
+        self._db = db
+        self._writes = []
+
+    def create(self, reference, data):
+        self._writes.append(("create", reference, data, False))
+
+    def set(self, reference, data, merge=False):
+        self._writes.append(("set", reference, data, merge))
+
+    def update(self, reference, data):
+        self._writes.append(("update", reference, data, False))
+
+    def delete(self, reference):
+        self._writes.append(("delete", reference, None, False))
+
+    def commit(self):
+        if len(self._writes) > 500:
+            raise ValueError("maximum 500 writes allowed per request")
+        self._db.inject("batch.commit")
+        self._db._commit(self._writes)
+        self._writes = []
+
+
+class FakeTransaction(FakeWriteBatch):
+    """Enough of firestore_v1.Transaction for `@firestore.transactional`."""
+
+    def __init__(self, db, max_attempts=5, read_only=False):
+        super().__init__(db)
+        self._max_attempts = max_attempts
+        self._read_only = read_only
+        self._id = None
+        self._read_versions = {}
+
+    def _clean_up(self):
+        self._writes = []
+        self._read_versions = {}
+        self._id = None
+
+    def _begin(self, retry_id=None):
+        self._id = uuid.uuid4().bytes
+
+    def _rollback(self):
+        self._clean_up()
+
+    def _commit(self):
+        self._db.inject("transaction.commit")
+        try:
+            self._db._commit(self._writes, expected_versions=self._read_versions)
+        finally:
+            self._clean_up()
+        return []
+
+    def _track(self, ref):
+        snapshot = self._db._snapshot(ref)
+        self._read_versions.setdefault(ref.path, self._db._version(ref.path))
+        return snapshot
+
+    def get_all(self, references):
+        self._db.inject("transaction.get_all")
+        with self._db._lock:
+            return [self._track(ref) for ref in references]
+
+    def get(self, ref_or_query):
+        if isinstance(ref_or_query, FakeDocumentReference):
+            self._db.inject("transaction.get")
+            with self._db._lock:
+                return iter([self._track(ref_or_query)])
+        return ref_or_query.stream()
+
+
+class FakeFirestore:
+    """Thread-safe in-memory document store with the client surface used by firebase_utils."""
+
+    def __init__(self, injector=None):
+        self.inject = injector or FaultInjector()
+        self._lock = threading.RLock()
+        self._docs = {}      # path tuple -> dict
+        self._versions = {}  # path tuple -> int, bumped on every write
+
+    def collection(self, name):
+        return FakeCollectionReference(self, (name,))
+
+    def batch(self):
+        return FakeWriteBatch(self)
+
+    def transaction(self, max_attempts=5, read_only=False):
+        return FakeTransaction(self, max_attempts=max_attempts, read_only=read_only)
+
+    def _version(self, path):
+        return self._versions.get(path, 0)
+
+    def _snapshot(self, ref):
+        with self._lock:
+            data = self._docs.get(ref.path)
+            return FakeSnapshot(ref, copy.deepcopy(data) if data is not None else None)
+
+    def _children(self, collection_path):
+        depth = len(collection_path) + 1
+        with self._lock:
+            return [(FakeDocumentReference(self, path), copy.deepcopy(data))
+                    for path, data in self._docs.items()
+                    if len(path) == depth and path[:-1] == collection_path]
+
+    def _commit(self, writes, expected_versions=None):
+        """Apply all writes atomically; nothing is applied if any write is invalid."""
+        with self._lock:
+            for path, version in (expected_versions or {}).items():
+                if self._version(path) != version:
+                    raise Aborted(f"transaction contention on {'/'.join(path)}")
+
+            staged = {}
+            for kind, ref, data, merge in writes:
+                current = staged.get(ref.path, self._docs.get(ref.path))
+                if kind == "create" and current is not None:
+                    raise AlreadyExists(f"document already exists: {'/'.join(ref.path)}")
+                if kind == "update" and current is None:
+                    raise NotFound(f"no document to update: {'/'.join(ref.path)}")
+                if kind == "delete":
+                    staged[ref.path] = None
+                    continue
+                target = dict(current) if (current is not None and (merge or kind == "update")) else {}
+                _apply_fields(target, data)
+                staged[ref.path] = target
+
+            for path, data in staged.items():
+                if data is None:
+                    self._docs.pop(path, None)
+                else:
+                    self._docs[path] = data
+                self._versions[path] = self._version(path) + 1
+
+
+# --- Google Drive --------------------------------------------------------------
+
+def _http_error(status, reason, message):
+    from googleapiclient.errors import HttpError
+    from httplib2 import Response
+
+    resp = Response({"status": status})
+    resp.reason = message
+    content = json.dumps({"error": {"code": status, "message": message, "errors": [{"reason": reason}]}})
+    return HttpError(resp, content.encode("utf-8"))
+
+
+def _drive_unavailable(op):
+    return _http_error(503, "backendError", f"injected failure in {op}")
+
+
+class FakeDriveRequest:
+    """Mimics googleapiclient.http.HttpRequest: nothing happens until execute()."""
+
+    def __init__(self, drive, op, run, nbytes=0):
+        self.http = None  # execute_with_reauth looks for credentials here on 401s
+        self.headers = {}
+        self._drive = drive
+        self._op = op
+        self._run = run
+        self._nbytes = nbytes
+
+    def execute(self, num_retries=0):
+        self._drive.inject(self._op, nbytes=self._nbytes(), make_error=_drive_unavailable)
+        return self._run()
+
+
+class FakeDriveFiles:
+    def __init__(self, drive):
+        self._drive = drive
+
+    def create(self, body=None, media_body=None, fields=None, **kwargs):
+        def run():
+            content = media_body.getbytes(0, media_body.size()) if media_body is not None else b""
+            file_id = uuid.uuid4().hex
+            with self._drive._lock:
+                self._drive._files[file_id] = {
+                    "id": file_id,
+                    "name": (body or {}).get("name", "Untitled"),
+                    "parents": list((body or {}).get("parents") or []),
+                    "createdTime": datetime.now(timezone.utc).isoformat(),
+                    "content": content,
+                }
+            return {"id": file_id}
+        return FakeDriveRequest(self._drive, "files.create", run,
+                                lambda: media_body.size() if media_body is not None else 0)
+
+    def get_media(self, fileId, **kwargs):
+        """Honours a "Range: bytes=a-b" header set on the request, like the real media endpoint."""
+        def byte_range():
+            size = len(self._drive._files.get(fileId, {}).get("content", b""))
+            header = request.headers.get("Range")
+            if not header:
+                return 0, size
+            start, _, end = header.split("=", 1)[1].partition("-")
+            return int(start), min(int(end) + 1 if end else size, size)
+
+        def run():
+            start, end = byte_range()
+            return self._drive.inject.corrupt(self._drive._get(fileId)["content"][start:end])
+
+        def nbytes():
+            start, end = byte_range()
+            return max(0, end - start)
+
+        request = FakeDriveRequest(self._drive, "files.get_media", run, nbytes)
+        return request
+
+    def get(self, fileId, fields=None, **kwargs):
+        def run():
+            meta = self._drive._get(fileId)
+            return {k: v for k, v in meta.items() if k != "content"}
+        return FakeDriveRequest(self._drive, "files.get", run, lambda: 0)
+
+    def delete(self, fileId, **kwargs):
+        def run():
+            with self._drive._lock:
+                if self._drive._files.pop(fileId, None) is None:
+                    raise _http_error(404, "notFound", f"File not found: {fileId}.")
+            return ""
+        return FakeDriveRequest(self._drive, "files.delete", run, lambda: 0)
+
+    def list(self, q=None, pageSize=100, pageToken=None, fields=None, orderBy=None, **kwargs):
+        """Supports the "'<folder>' in parents" and "createdTime > '<rfc3339>'" clauses of `q`, ordered by id."""
+        def run():
+            with self._drive._lock:
+                files = sorted(self._drive._files.values(), key=lambda f: f["id"])
+            if q:
+                for clause in q.split(" and "):
+                    clause = clause.strip()
+                    if clause.endswith(" in parents"):
+                        parent = clause[:-len(" in parents")].strip("'\"")
+                        files = [f for f in files if parent in f["parents"]]
+                    elif clause.startswith("createdTime >"):
+                        after = datetime.fromisoformat(clause.split(">", 1)[1].strip(" '\"").replace("Z", "+00:00"))
+                        files = [f for f in files if datetime.fromisoformat(f["createdTime"]) > after]
+            if pageToken:
+                files = [f for f in files if f["id"] > pageToken]
+            page = files[:pageSize]
+            result = {"files": [{k: v for k, v in f.items() if k != "content"} for f in page]}
+            if len(files) > pageSize:
+                result["nextPageToken"] = page[-1]["id"]
+            return result
+        return FakeDriveRequest(self._drive, "files.list", run, lambda: 0)
+
+
+class FakeBatchRequest:
+    """Mimics BatchHttpRequest: one round trip, per-request results go to the callback."""
+
+    def __init__(self, drive, callback=None):
+        self._drive = drive
+        self._callback = callback
+        self._requests = []
+
+    def add(self, request, callback=None, request_id=None):
+        self._requests.append((request, callback or self._callback, request_id or str(len(self._requests))))
+
+    def execute(self):
+        self._drive.inject("batch", make_error=_drive_unavailable)
+        for request, callback, request_id in self._requests:
+            try:
+                response, exception = request._run(), None
+            except Exception as e:
+                response, exception = None, e
+            if callback:
+                callback(request_id, response, exception)
+
+
+class FakeDriveService:
+    """Stand-in for the object returned by google_utils.build_drive_service()."""
+
+    def __init__(self, injector=None):
+        self.inject = injector or FaultInjector()
+        self._lock = threading.Lock()
+        self._files = {}
+
+    def files(self):
+        return FakeDriveFiles(self)
+
+    def new_batch_http_request(self, callback=None):
+        return FakeBatchRequest(self, callback)
+
+    def _get(self, file_id):
+        with self._lock:
+            meta = self._files.get(file_id)
+        if meta is None:
+            raise _http_error(404, "notFound", f"File not found: {file_id}.")
+        return meta
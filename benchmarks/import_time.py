@@ -0,0 +1,114 @@
+"""Cold-start import cost per page, measured with `python -X importtime`.
+
+    python -m benchmarks.import_time            # report + check against budgets
+    python -m benchmarks.import_time --top 15   # also list the 15 heaviest modules
+
+Each target is imported in a fresh interpreter, so the numbers are what a new
+Streamlit server process pays before rendering that page. The command exits with
+status 1 when a target exceeds its budget, so it can run in CI.
+"""
+import argparse
+import ast
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main_imports():
+    """Module-level imports of main.py, i.e. what every page pays before the router runs."""
+    with open(os.path.join(REPO_ROOT, "main.py"), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            # `from src import metrics` imports the submodule src.metrics
+            names = [f"{node.module}.{a.name}" for a in node.names
+                     if os.path.exists(os.path.join(REPO_ROOT, *node.module.split("."), a.name + ".py"))]
+            modules += names or [node.module]
+    return list(dict.fromkeys(modules))
+
+
+# Derived from main.py so new top-level imports are never missed (see the router in main.py).
+_MAIN_IMPORTS = main_imports()
+
+TARGETS = {
+    "login": _MAIN_IMPORTS + ["src.app.login"],
+    "register": _MAIN_IMPORTS + ["src.app.registration"],
+    "dashboard": _MAIN_IMPORTS + ["src.app.dashboard"],
+}
+
+# Budgets in milliseconds. Override with IMPORT_BUDGET_<TARGET>_MS, e.g. IMPORT_BUDGET_LOGIN_MS=1500.
+DEFAULT_BUDGETS_MS = {
+    "login": 1500,
+    "register": 1500,
+    "dashboard": 2500,
+}
+
+# Modules that must never be imported while rendering the login/registration pages.
+LOGIN_FORBIDDEN = ("googleapiclient", "Crypto", "stegano", "google_auth_oauthlib")
+
+
+def measure(modules):
+    """Import `modules` in a fresh interpreter; returns (total_ms, {module: cumulative_ms})."""
+    code = "import " + ", ".join(modules)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO_ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import failed for {modules}:\n{proc.stderr[-2000:]}")
+
+    total_us = 0
+    per_module = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        cumulative = int(cumulative_us)
+        per_module[name.strip()] = cumulative / 1000
+        # Top-level entries (no extra indentation) add up to the total import cost
+        if not name.startswith("  "):
+            total_us += cumulative
+    return total_us / 1000, per_module
+
+
+def budget_for(target):
+    env = os.getenv(f"IMPORT_BUDGET_{target.upper()}_MS")
+    return float(env) if env else DEFAULT_BUDGETS_MS[target]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check cold-start import cost per page against a budget.")
+    parser.add_argument("--top", type=int, default=0, help="show the N heaviest modules per target")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per target; the fastest run is reported")
+    args = parser.parse_args()
+
+    failed = False
+    for target, modules in TARGETS.items():
+        runs = [measure(modules) for _ in range(args.repeat)]
+        total_ms, per_module = min(runs, key=lambda r: r[0])
+        budget = budget_for(target)
+        status = "OK  " if total_ms <= budget else "OVER"
+        failed |= total_ms > budget
+        print(f"[{status}] {target:<10} {total_ms:8.1f} ms  (budget {budget:.0f} ms)")
+
+        if target in ("login", "register"):
+            leaked = sorted({m.split(".")[0] for m in per_module if m.split(".")[0] in LOGIN_FORBIDDEN})
+            if leaked:
+                failed = True
+                print(f"       heavy modules loaded on {target} page: {', '.join(leaked)}")
+
+        if args.top:
+            heaviest = sorted(per_module.items(), key=lambda kv: kv[1], reverse=True)[:args.top]
+            for name, ms in heaviest:
+                print(f"         {ms:8.1f} ms  {name}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
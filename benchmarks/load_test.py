@@ -0,0 +1,161 @@
+"""Concurrent-user load test against local Firestore/Drive stand-ins.
+
+    python -m benchmarks.load_test --users 20 --iterations 5 --file-kb 256
+    python -m benchmarks.load_test --users 50 --db-latency-ms 20 --drive-latency-ms 120 --error-rate 0.01
+
+Each simulated user registers once and then repeats
+login -> upload -> list -> download -> delete, calling the same
+firebase_utils / google_utils / crypto_utils functions as the dashboard. The
+backends are the in-process fakes from benchmarks.fakes, so latency and error
+rates are whatever the flags say. Reports p50/p95/p99 latency, throughput and
+error count per operation.
+"""
+import argparse
+import datetime
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fakes import FakeDriveService, FakeFirestore, FaultInjector
+from src import crypto_utils, firebase_utils, google_utils
+
+OPERATIONS = ("register", "login", "upload", "list", "download", "delete")
+
+# Same tags the dashboard stores in Firestore
+MODES = {
+    "chacha20": ("ChaCha20", crypto_utils.encrypt_file, crypto_utils.decrypt_file),
+    "super": ("SuperEncrypt", crypto_utils.encrypt_super, crypto_utils.decrypt_super),
+}
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values) + 0.5 - 1e-9)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {op: [] for op in OPERATIONS}
+        self.errors = {op: 0 for op in OPERATIONS}
+
+    def run(self, op, fn, *args):
+        """Time `fn(*args)`; a falsy result or an exception counts as an error."""
+        start = time.perf_counter()
+        try:
+            result = fn(*args)
+            ok = bool(result[0] if isinstance(result, tuple) else result)
+        except Exception:
+            result, ok = None, False
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.latencies[op].append(elapsed)
+            if not ok:
+                self.errors[op] += 1
+        return result if ok else None
+
+
+def simulate_user(db, drive, recorder, user_id, args, payload):
+    username = f"loaduser{user_id:04d}"
+    password = f"pw-{user_id}"
+    crypto_tag, encrypt, decrypt = MODES[args.mode]
+
+    if not recorder.run("register", firebase_utils.register_user, db, username, username, password):
+        return
+
+    for i in range(args.iterations):
+        if not recorder.run("login", firebase_utils.login_user, db, username, password):
+            continue
+
+        def upload():
+            encrypted = encrypt(payload, password)
+            drive_name = f"load_{i}.bin_{datetime.datetime.now().timestamp()}.enc"
+            gdrive_id = google_utils.upload_to_gdrive(drive, encrypted, drive_name)
+            if not gdrive_id:
+                return None
+            logged = firebase_utils.log_file_to_firestore(
+                db, username, f"load_{i}.bin", gdrive_id, crypto_tag,
+                plaintext_size=len(payload), ciphertext_size=len(encrypted))
+            return gdrive_id if logged else None
+
+        if not recorder.run("upload", upload):
+            continue
+
+        files = recorder.run("list", firebase_utils.get_user_files, db, username, args.use_cache)
+        if not files:
+            continue
+        file_data = files[0]
+
+        def download():
+            encrypted = google_utils.download_from_gdrive(drive, file_data["gdrive_file_id"])
+            return encrypted is not None and decrypt(encrypted, password) == payload
+
+        recorder.run("download", download)
+
+        def delete():
+            return (google_utils.delete_file_from_gdrive(drive, file_data["gdrive_file_id"])
+                    and firebase_utils.delete_file_from_firestore(db, username, file_data["doc_id"]))
+
+        recorder.run("delete", delete)
+
+
+def report(recorder, wall_time):
+    print(f"\n{'operation':<10} {'count':>6} {'errors':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ops/s':>8}")
+    for op in OPERATIONS:
+        values = sorted(recorder.latencies[op])
+        if not values:
+            continue
+        p50, p95, p99 = (percentile(values, p) * 1000 for p in (50, 95, 99))
+        print(f"{op:<10} {len(values):>6} {recorder.errors[op]:>6} {p50:>9.1f} {p95:>9.1f} {p99:>9.1f} "
+              f"{len(values) / wall_time:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent users against local Firestore/Drive stand-ins.")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=3, help="login/upload/list/download/delete cycles per user")
+    parser.add_argument("--file-kb", type=int, default=64)
+    parser.add_argument("--mode", choices=sorted(MODES), default="chacha20")
+    parser.add_argument("--db-latency-ms", type=float, default=10)
+    parser.add_argument("--drive-latency-ms", type=float, default=60)
+    parser.add_argument("--jitter-ms", type=float, default=10)
+    parser.add_argument("--drive-mbps", type=float, default=100, help="simulated Drive bandwidth, 0 for unlimited")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of backend calls that fail")
+    parser.add_argument("--hash-iterations", type=int, default=None,
+                        help="override PASSWORD_HASH_ITERATIONS (default: the configured value)")
+    parser.add_argument("--use-cache", action="store_true", help="let list hit the process-level file cache")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.hash_iterations:
+        firebase_utils.PASSWORD_HASH_ITERATIONS = args.hash_iterations
+
+    db_faults = FaultInjector(args.db_latency_ms, args.jitter_ms, args.error_rate, seed=args.seed)
+    drive_faults = FaultInjector(args.drive_latency_ms, args.jitter_ms, args.error_rate,
+                                 bytes_per_second=args.drive_mbps * 125_000 or None, seed=args.seed)
+    db = FakeFirestore(db_faults)
+    drive = FakeDriveService(drive_faults)
+    recorder = Recorder()
+    payload = os.urandom(args.file_kb * 1024)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.users) as pool:
+        futures = [pool.submit(simulate_user, db, drive, recorder, uid, args, payload) for uid in range(args.users)]
+        for future in futures:
+            future.result()
+    wall_time = time.perf_counter() - start
+
+    print(f"{args.users} users x {args.iterations} iterations, {args.file_kb} KB files ({args.mode}), "
+          f"db {args.db_latency_ms:.0f} ms, drive {args.drive_latency_ms:.0f} ms, "
+          f"error rate {args.error_rate:.1%}, wall time {wall_time:.2f} s")
+    print(f"backend calls: firestore {db_faults.calls} ({db_faults.errors} injected errors), "
+          f"drive {drive_faults.calls} ({drive_faults.errors} injected errors)")
+    report(recorder, wall_time)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Single-image vs sharded multi-image steganography.
+
+    python -m benchmarks.stego_batch --message-kb 64 --images 8 --workers 4
+
+The single-image path embeds the whole message into one carrier sized to fit it
+(crypto_utils.encrypt_stenography); the batch path splits the same message over
+`--images` carriers and embeds them in a process pool
+(crypto_utils.encrypt_stenography_batch). Extraction is run on the shuffled
+carriers to check that shard order does not matter, and carriers too small for
+the shard header must be rejected up front with a ValueError.
+"""
+import argparse
+import os
+import random
+import time
+
+from src import crypto_utils
+
+
+def _carrier(message_bytes, parts):
+    """Random carrier bytes big enough for its share of the message (plus headroom)."""
+    return os.urandom(((message_bytes // parts) + 64) * 8 * 2)
+
+
+def check_capacity_errors(password):
+    """A carrier that cannot even hold the shard header fails the whole batch before any embedding."""
+    big = os.urandom(4096)
+    tiny = os.urandom(crypto_utils.STEGO_SHARD_MIN_IMAGE_SIZE - 1)
+    for carriers in ([big, tiny], [tiny], [big, b""]):
+        try:
+            crypto_utils.encrypt_stenography_batch(carriers, "hi", password, max_workers=1)
+        except ValueError as e:
+            assert "Gambar terlalu kecil" in str(e), e
+        else:
+            raise AssertionError(f"carriers of {[len(c) for c in carriers]} bytes were accepted")
+    # A carrier with room for the header only still takes part (with an empty shard)
+    edge = os.urandom(crypto_utils.STEGO_SHARD_MIN_IMAGE_SIZE)
+    stego_set = crypto_utils.encrypt_stenography_batch([big, edge], "hi", password, max_workers=1)
+    assert crypto_utils.decrypt_stenography_batch(stego_set, password, max_workers=1) == "hi"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Single vs sharded LSB steganography.")
+    parser.add_argument("--message-kb", type=int, default=64)
+    parser.add_argument("--images", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    message = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz ") for _ in range(args.message_kb * 1024))
+    password = "benchmark"
+    check_capacity_errors(password)
+
+    single = _carrier(len(message), 1)
+    start = time.perf_counter()
+    stego = crypto_utils.encrypt_stenography(single, message, password)
+    embed_single = time.perf_counter() - start
+    start = time.perf_counter()
+    assert crypto_utils.decrypt_stenography(stego, password) == message
+    extract_single = time.perf_counter() - start
+
+    carriers = [_carrier(len(message), args.images) for _ in range(args.images)]
+    start = time.perf_counter()
+    stego_set = crypto_utils.encrypt_stenography_batch(carriers, message, password, max_workers=args.workers)
+    embed_batch = time.perf_counter() - start
+    rng.shuffle(stego_set)
+    start = time.perf_counter()
+    assert crypto_utils.decrypt_stenography_batch(stego_set, password, max_workers=args.workers) == message
+    extract_batch = time.perf_counter() - start
+
+    print(f"{args.message_kb} KB message; batch = {args.images} carriers, {args.workers} workers "
+          f"(includes process pool start-up)")
+    print(f"  {'':12} {'embed':>10} {'extract':>10}")
+    print(f"  {'1 image':12} {embed_single * 1000:8.0f} ms {extract_single * 1000:8.0f} ms")
+    print(f"  {'batch':12} {embed_batch * 1000:8.0f} ms {extract_batch * 1000:8.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,13 +3,14 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import streamlit as st
-from Crypto.Cipher import ARC4
 from src.firebase_utils import init_firebase
-from src.app.login import render_login_page
-from src.app.registration import render_registration_page
 from streamlit_cookies_controller import CookieController
-from src.app.dashboard import main_app
-import datetime 
+from src.settings import get_setting, get_bool_setting, get_int_setting
+from src import metrics
+from src import file_serving
+from src import session_tokens
+# Halaman (login, registrasi, dashboard) diimpor di dalam router di bawah,
+# sehingga modul berat seperti googleapiclient/Crypto hanya dimuat saat dibutuhkan.
  
 # Init firebase & Cookies Controller
 st.set_page_config(
@@ -23,6 +24,19 @@ st.set_page_config(
 
 db = init_firebase()
 
+# Ekspor metrik latensi per tahap (opsional): file Prometheus, endpoint /metrics, log JSON
+metrics.configure(
+    metrics_file=get_setting("METRICS_FILE"),
+    port=get_setting("METRICS_PORT"),
+    log_spans=get_bool_setting("METRICS_LOG"),
+)
+file_serving.configure(
+    port=get_setting("DOWNLOAD_SERVER_PORT"),
+    host=get_setting("DOWNLOAD_SERVER_HOST", "127.0.0.1"),
+    base_url=get_setting("DOWNLOAD_BASE_URL"),
+    ttl=get_int_setting("DOWNLOAD_TTL", file_serving.DEFAULT_TTL),
+)
+
 
 # --- LOGIKA PENGONTROL UTAMA ---
 controller = CookieController()
@@ -31,13 +45,17 @@ controller = CookieController()
 if 'logged_in' not in st.session_state:
     st.session_state['logged_in'] = False
     try:
-        logged_in_user = controller.get('logged_in_user')
-        # Biarkan baris debug ini tetap ada
-        print(f"DEBUG: Nilai cookie 'logged_in_user' saat dimuat: {logged_in_user}")
+        # Token sesi bertanda tangan diverifikasi lokal (HMAC + denylist ter-cache),
+        # tanpa baca Firestore/PBKDF2 untuk pengguna yang kembali
+        session_token = controller.get(session_tokens.COOKIE_NAME)
+        logged_in_user = session_tokens.verify_token(db, session_token)
+        # Biarkan baris debug ini tetap ada (token sendiri tidak dicetak)
+        print(f"DEBUG: Pengguna dari cookie sesi saat dimuat: {logged_in_user}")
         
         if logged_in_user:
             st.session_state['logged_in'] = True
             st.session_state['username'] = logged_in_user
+            st.session_state['session_token'] = session_token
     except Exception as e:
         st.error(f"DEBUG: Terjadi kesalahan saat memuat cookie: {e}")
         st.session_state['logged_in'] = False
@@ -48,11 +66,14 @@ if 'page' not in st.session_state:
 if st.session_state['logged_in']:
     # Jika SUDAH login, selalu jalankan aplikasi utama
     # Berikan 'db' jika aplikasi utama membutuhkannya
+    from src.app.dashboard import main_app
     main_app(db, controller) 
 else:
     # Jika BELUM login, cek halaman mana yang harus ditampilkan
     if st.session_state['page'] == "login":
+        from src.app.login import render_login_page
         render_login_page(db, controller)  # Lewatkan 'db' dan 'controller' ke halaman login
     elif st.session_state['page'] == "register":
+        from src.app.registration import render_registration_page
         render_registration_page(db, controller)  # Lewatkan 'db' dan 'controller' ke halaman registrasi
 
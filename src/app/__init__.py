@@ -1,25 +1,25 @@
-# ...existing code...
 # app package init - expose UI entrypoints without forcing heavy imports
 
 __all__ = ["run_app", "render_login_page", "render_dashboard"]
 
-# Lazy import helpers: try to bind common UI functions if modules exist
-def _try_import(mod_name):
-    try:
-        return __import__(f"{__package__}.{mod_name}", fromlist=[mod_name])
-    except Exception:
-        return None
-
-_ui = _try_import("ui")
-_login = _try_import("login")
-_dashboard = _try_import("dashboard")
-
-if _ui and hasattr(_ui, "run_app"):
-    run_app = _ui.run_app
+# Entrypoint -> submodul. Submodul baru diimpor saat atributnya pertama kali
+# diakses (PEP 562), sehingga `import src.app.login` tidak ikut memuat dashboard.
+_LAZY_ATTRS = {
+    "run_app": "ui",
+    "render_login_page": "login",
+    "render_dashboard": "dashboard",
+}
 
-if _login and hasattr(_login, "render_login_page"):
-    render_login_page = _login.render_login_page
-
-if _dashboard and hasattr(_dashboard, "render_dashboard"):
-    render_dashboard = _dashboard.render_dashboard
-# ...existing code...
\ No newline at end of file
+def __getattr__(name):
+    mod_name = _LAZY_ATTRS.get(name)
+    if mod_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    try:
+        module = __import__(f"{__package__}.{mod_name}", fromlist=[mod_name])
+    except ImportError as e:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from e
+    if not hasattr(module, name):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
@@ -1,19 +1,254 @@
 # src/app/dashboard.py
 import streamlit as st
 import datetime
+import os
 # Impor file-file utilitas Anda
+from src import async_io
+from src import file_serving
 from src import firebase_utils
 from src import google_utils
 from src import crypto_utils
-from stegano import lsb
-import io
+from src import jobs
+from src import profiling
+from src import session_tokens
+from src import zip_export
+from src.settings import get_bool_setting, get_int_setting
+
+def _format_bytes(num_bytes) -> str:
+    """Format ukuran bytes agar mudah dibaca (B, KB, MB, GB)."""
+    size = float(num_bytes or 0)
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1024 or unit == "GB":
+            return f"{size:.1f} {unit}" if unit != "B" else f"{int(size)} B"
+        size /= 1024
+
+_FILE_TYPE_TAGS = {
+    "Pesan Teks (.txt)": "SuperEncrypt",
+    "Pesan Gambar (Steganografi)": "Steganography",
+    "File Lain (.pdf, .docx, dll)": "ChaCha20",
+}
+
+def _handle_upload(db, uploaded_file, file_type, encrypt_password, stegano_message) -> None:
+    """Handler tombol "Enkripsi & Upload": memasukkan enkripsi + upload ke antrean pekerjaan."""
+    crypto_tag = _FILE_TYPE_TAGS.get(file_type, "ChaCha20")
+    if crypto_tag == "Steganography" and not stegano_message:
+        st.error("Harap masukkan pesan rahasia untuk steganografi.")
+        return # Hentikan jika pesan kosong
+
+    try:
+        job_id = jobs.submit_upload(db, st.session_state['username'], uploaded_file.name, uploaded_file.getvalue(),
+                                    crypto_tag, encrypt_password, stegano_message)
+        job = jobs.get_job(job_id)
+        if job.get("plan_note"):
+            st.info(job["plan_note"])
+        st.success(f"'{uploaded_file.name}' masuk antrean (perkiraan ~{job['estimated_seconds']:.0f} detik). "
+                   "Pantau progresnya di bagian Pekerjaan di bawah.")
+    except Exception as e:
+        st.error(f"Proses gagal: {e}")
+
+def _handle_download(file_data, decrypt_password) -> None:
+    """Handler tombol "Proses dan Download": memasukkan unduh + dekripsi ke antrean pekerjaan."""
+    try:
+        jobs.submit_download(st.session_state['username'], file_data, decrypt_password)
+        st.success(f"'{file_data['original_filename']}' masuk antrean. Pantau progresnya di bagian Pekerjaan di bawah.")
+    except Exception as e:
+        st.error(f"Gagal: {e}")
+
+def _serve_file(label, path, filename, mime, key, delete_when_expired=False) -> None:
+    """
+    Tombol download yang mengirim file langsung dari disk lewat server download
+    (file_serving) jika aktif. Tanpa server, kembali ke st.download_button.
+    delete_when_expired=True menyerahkan penghapusan file ke file_serving
+    (setelah DOWNLOAD_TTL detik, dengan atau tanpa server).
+    """
+    if file_serving.is_enabled():
+        url = file_serving.register_file(path, filename, mime, delete_when_expired=delete_when_expired)
+        st.link_button(label, url)
+        return
+
+    # Isi file baru dibaca saat tombol diklik, bukan di setiap rerun. Streamlit
+    # tetap memuat seluruh isinya ke media store (RAM) saat itu; lihat SETUP.md.
+    def read_file():
+        with open(path, "rb") as f:
+            return f.read()
+
+    st.download_button(label=label, data=read_file, file_name=filename, mime=mime, key=key)
+    if delete_when_expired:
+        file_serving.delete_later(path)
+
+def _render_download_result(job) -> None:
+    """Tombol download untuk hasil pekerjaan download yang sudah selesai."""
+    result = jobs.get_result(job["id"])
+    if not result or not os.path.exists(result["result_path"]):
+        st.warning("Hasil pekerjaan sudah tidak tersedia.")
+        return
+
+    # File hasil tetap milik antrean pekerjaan (dihapus oleh jobs.delete_job)
+    if job["crypto_tag"] == "Steganography":
+        # Untuk steganografi, tampilkan teks rahasia dan kembalikan gambar asli
+        secret_text = result.get("secret_text", "")
+        secret_filename = job['filename'].rsplit('.', 1)[0] + '_secret.txt'
+        st.text_area("Pesan Rahasia:", secret_text, height=150, key=f"secret_{job['id']}")
+
+        col1, col2 = st.columns(2)
+        with col1:
+            _serve_file(f"📷 Download Gambar '{job['filename']}'", result["result_path"],
+                        job['filename'], "image/png", key=f"dl_img_{job['id']}")
+        with col2:
+            # Teks rahasia kecil, cukup dikirim langsung
+            st.download_button(
+                label="📄 Download Secret Text",
+                data=secret_text.encode('utf-8'),
+                file_name=secret_filename,
+                mime="text/plain",
+                key=f"dl_txt_{job['id']}"
+            )
+    else:
+        _serve_file(f"Download '{job['filename']}'", result["result_path"],
+                    job['filename'], "application/octet-stream", key=f"dl_{job['id']}")
+
+def _render_jobs_panel(username) -> None:
+    """
+    Daftar pekerjaan milik pengguna. Hanya pekerjaan yang masih berjalan yang
+    diperbarui otomatis (fragment); hasil yang sudah selesai dirender di luar
+    fragment agar tombol download tidak dibuat ulang setiap 2 detik.
+    """
+    user_jobs = jobs.list_jobs(username)[:get_int_setting("JOBS_SHOWN", 10)]
+    if not user_jobs:
+        return
+    st.divider()
+    st.subheader("⏳ Pekerjaan Saya")
+    labels = {"upload": "📤 Upload", "download": "⬇️ Download"}
+    active_ids = [j["id"] for j in user_jobs if j["status"] in jobs.ACTIVE_STATES]
+
+    @st.fragment(run_every=2)
+    def _active_panel():
+        current = {j["id"]: j for j in jobs.list_jobs(username)}
+        if any(current.get(job_id, {}).get("status") not in jobs.ACTIVE_STATES for job_id in active_ids):
+            st.rerun()  # Ada yang selesai: hasilnya dirender di luar fragment
+        for job_id in active_ids:
+            job = current[job_id]
+            with st.container(border=True):
+                st.write(f"**{labels.get(job['kind'], job['kind'])}** — {job['filename']}")
+                st.progress(job["progress"], text=job["message"])
+                if st.button("Batalkan", key=f"cancel_{job['id']}"):
+                    jobs.cancel_job(job["id"])
+                    st.rerun(scope="fragment")
+
+    if active_ids:
+        _active_panel()
+
+    for job in user_jobs:
+        if job["id"] in active_ids:
+            continue
+        with st.container(border=True):
+            st.write(f"**{labels.get(job['kind'], job['kind'])}** — {job['filename']}")
+            if job["status"] == jobs.DONE:
+                if job["kind"] == "download":
+                    _render_download_result(job)
+                else:
+                    st.success(job["result"]["message"])
+            elif job["status"] == jobs.FAILED:
+                st.error(f"Gagal: {job['error']}")
+            else:
+                st.info("Dibatalkan.")
+            if st.button("Tutup", key=f"close_{job['id']}"):
+                jobs.delete_job(job["id"])
+                st.rerun()
+
+def _handle_zip_download(files, decrypt_password) -> None:
+    """Handler tombol "Buat ZIP": unduh + dekripsi paralel, lalu sajikan sebagai satu file ZIP."""
+    manager = google_utils.get_credential_manager()
+    if manager is None:
+        st.error("Koneksi Google Drive gagal.")
+        return
+
+    progress = st.progress(0.0, text=f"0/{len(files)} file diproses")
+    try:
+        zip_path, errors = zip_export.export_files_to_zip(
+            manager, files, decrypt_password,
+            max_workers=get_int_setting("ZIP_EXPORT_WORKERS", 4),
+            on_progress=lambda done, total: progress.progress(done / total, text=f"{done}/{total} file diproses")
+        )
+    except Exception as e:
+        st.error(f"Gagal membuat ZIP: {e}")
+        return
+
+    if len(errors) == len(files):
+        os.remove(zip_path)
+        st.error("Semua file gagal diproses. Password salah atau file korup.")
+        return
+    if errors:
+        st.warning(f"{len(errors)} file gagal diproses (lihat ERRORS.txt di dalam ZIP).")
+        for doc_id, (name, message) in errors.items():
+            st.caption(f"{name} (`{doc_id}`): {message}")
+    else:
+        st.success(f"{len(files)} file berhasil diproses!")
+
+    zip_name = f"secure_dropbox_{datetime.datetime.now():%Y%m%d_%H%M%S}.zip"
+    # ZIP dihapus file_serving setelah DOWNLOAD_TTL, baik lewat server download maupun tombol biasa
+    _serve_file("📦 Download ZIP", zip_path, zip_name, "application/zip",
+                key="dl_zip", delete_when_expired=True)
+
+def _render_profiling_page() -> None:
+    """Halaman admin: daftar dump profil dan fungsi teratas berdasarkan waktu kumulatif."""
+    st.title("🛠️ Profiling")
+    if not profiling.is_profiling_enabled():
+        st.info("Profiling tidak aktif. Set ENABLE_PROFILING=1 di .env atau Streamlit Secrets.")
+
+    profiles = profiling.list_profiles()
+    if not profiles:
+        st.write("Belum ada dump profil.")
+        return
+
+    st.dataframe([
+        {
+            "Waktu": p["timestamp"],
+            "Aksi": p["action"],
+            "Pengguna": p["username"],
+            "Durasi (s)": p["duration_s"],
+            "Puncak Memori": _format_bytes(p["peak_memory_bytes"]),
+            "Status": p["status"],
+        }
+        for p in profiles
+    ], use_container_width=True, hide_index=True)
+
+    labels = {f"{p['timestamp']} — {p['action']} ({p['username']})": p["path"] for p in profiles}
+    selected = st.selectbox("Pilih profil", labels.keys())
+    if selected:
+        st.dataframe(profiling.top_functions(labels[selected]), use_container_width=True, hide_index=True)
+        with open(labels[selected], "rb") as f:
+            st.download_button("Download dump .prof", f.read(), file_name=labels[selected].rsplit("/", 1)[-1])
+
+def _handle_logout(db, controller, all_devices=False) -> None:
+    """Mencabut token sesi (atau semua sesi pengguna jika all_devices=True) dan menghapus cookie-nya."""
+    try:
+        if all_devices:
+            session_tokens.revoke_user_sessions(db, st.session_state['username'])
+        else:
+            session_tokens.revoke_token(db, st.session_state.get('session_token'))
+    except Exception as e:
+        st.error(f"Gagal mencabut sesi: {e}")
+    if st.session_state.get('username'):
+        firebase_utils.stop_user_files_listener(st.session_state['username'])
+    controller.remove(session_tokens.COOKIE_NAME)
+    for key in ('logged_in', 'username', 'session_token'):
+        st.session_state.pop(key, None)
+    st.session_state['page'] = "login"
+    st.rerun()
 
 def main_app(db, controller) -> None:
     st.sidebar.title(f"Selamat Datang, {st.session_state['username']}!")
-    # ... (kode logout Anda) ...
+    if st.sidebar.button("Logout"):
+        _handle_logout(db, controller)
+    if st.sidebar.button("Logout dari Semua Perangkat"):
+        _handle_logout(db, controller, all_devices=True)
 
     st.sidebar.title("Navigation")
-    page = st.sidebar.radio("Go to", ["Home", "Upload File", "🗃️ File Saya"])
+    pages = ["Home", "Upload File", "🗃️ File Saya"]
+    if profiling.is_admin(st.session_state['username']):
+        pages.append("🛠️ Profiling")
+    page = st.sidebar.radio("Go to", pages)
 
     # Inisialisasi service GDrive
     # Ini akan diambil dari cache jika sudah ada
@@ -39,64 +274,63 @@ def main_app(db, controller) -> None:
 
         if st.button("Enkripsi & Upload"):
            if uploaded_file and encrypt_password:
-                file_bytes = uploaded_file.getvalue()
-                original_name = uploaded_file.name
-
-                try:
-                    if file_type == "Pesan Teks (.txt)":
-                        st.write("Mode: Super Enkripsi (RC4+Vigenere+Railway)")
-                        with st.spinner("1/3: Menjalankan Super Enkripsi..."):
-                            encrypted_bytes = crypto_utils.encrypt_super(file_bytes, encrypt_password)
-                            crypto_tag = "SuperEncrypt"
-
-                    elif file_type == "Pesan Gambar (Steganografi)":
-                        st.write("Mode: Steganografi")
-                        if not stegano_message:
-                            st.error("Harap masukkan pesan rahasia untuk steganografi.")
-                            return # Hentikan jika pesan kosong
-                        
-                        with st.spinner("1/3: Menerapkan steganografi..."):
-                            encrypted_bytes = crypto_utils.encrypt_stenography(file_bytes, stegano_message, encrypt_password)
-                            crypto_tag = "Steganography"
-                    
-                    else: # "File Lain"
-                        st.write("Mode: Kriptografi Lain (ChaCha20)")
-                        with st.spinner("1/3: Mengenkripsi file (ChaCha20)..."):
-                            encrypted_bytes = crypto_utils.encrypt_file(file_bytes, encrypt_password)
-                            crypto_tag = "ChaCha20"
-                    
-                    # --- Lanjutan proses upload (SAMA) ---
-                    with st.spinner("2/3: Mengupload ke Google Drive..."):
-                        unique_filename = f"{original_name}_{datetime.datetime.now().timestamp()}.enc"
-                        gdrive_id = google_utils.upload_to_gdrive(gdrive_service, encrypted_bytes, unique_filename)
-                    
-                    if gdrive_id:
-                        with st.spinner("3/3: Menyimpan metadata..."):
-                            firebase_utils.log_file_to_firestore(
-                                db, st.session_state['username'],
-                                original_name, gdrive_id, crypto_tag # Simpan tag
-                            )
-                        st.success(f"File '{original_name}' berhasil disimpan!")
-                    
-                except Exception as e:
-                    st.error(f"Proses gagal: {e}")
+                _handle_upload(db, uploaded_file, file_type, encrypt_password, stegano_message)
+
+        _render_jobs_panel(st.session_state['username'])
 
     elif page == "🗃️ File Saya":
         st.title("🗃️ File Saya")
 
-        # 1. Ambil daftar file dari Firestore
+        # (Opsional) Listener on_snapshot agar cache tetap segar antar tab
+        if get_bool_setting("FILES_LIVE_SYNC"):
+            firebase_utils.start_user_files_listener(db, st.session_state['username'])
+
+        refresh = st.button("🔄 Muat Ulang Daftar File")
+
+        # Filter dijalankan di sisi server (Firestore), bukan di Python
+        with st.expander("🔍 Filter File"):
+            filter_type = st.selectbox("Tipe Enkripsi", ["Semua", "SuperEncrypt", "Steganography", "ChaCha20"])
+            filter_prefix = st.text_input("Nama file diawali dengan")
+            filter_dates = st.date_input("Rentang tanggal upload", value=())
+
+        start_date = end_date = None
+        if len(filter_dates) == 2:
+            start_date = datetime.datetime.combine(filter_dates[0], datetime.time.min, tzinfo=datetime.timezone.utc)
+            end_date = datetime.datetime.combine(filter_dates[1] + datetime.timedelta(days=1), datetime.time.min, tzinfo=datetime.timezone.utc)
+        filters_active = filter_type != "Semua" or bool(filter_prefix) or start_date is not None
+
+        # 1. Ambil daftar file dari Firestore (atau cache)
+        stats = None
         try:
             # Menggunakan st.session_state['username'] untuk mengambil file
-            file_list = firebase_utils.get_user_files(db, st.session_state['username'])
+            if filters_active:
+                file_list = firebase_utils.query_user_files(
+                    db, st.session_state['username'],
+                    encryption_type=None if filter_type == "Semua" else filter_type,
+                    start_date=start_date, end_date=end_date,
+                    name_prefix=filter_prefix or None
+                )
+            else:
+                # Daftar file dan agregat penyimpanan diambil bersamaan
+                file_list, stats = async_io.run(async_io.load_file_listing(
+                    db, st.session_state['username'], use_cache=not refresh
+                ))
         except Exception as e:
             st.error(f"Gagal mengambil daftar file: {e}")
             file_list = []
 
         if not file_list:
-            st.info("Anda belum mengupload file apapun.")
+            if filters_active:
+                st.info("Tidak ada file yang cocok dengan filter.")
+            else:
+                st.info("Anda belum mengupload file apapun.")
         else:
             # 2. Tampilkan file dalam bentuk yang rapi
-            st.write(f"Anda memiliki **{len(file_list)}** file tersimpan.")
+            if stats is None:
+                stats = firebase_utils.get_user_storage_stats(db, st.session_state['username'], use_cache=not refresh)
+            st.write(f"Anda memiliki **{stats['file_count']}** file tersimpan "
+                     f"({_format_bytes(stats['total_plaintext_bytes'])} asli, "
+                     f"{_format_bytes(stats['total_ciphertext_bytes'])} terenkripsi).")
             
             display_files = [
                 {
@@ -124,77 +358,26 @@ def main_app(db, controller) -> None:
                     # Ambil data file lengkap berdasarkan pilihan
                     doc_id = file_options[selected_option]
                     file_data = next(f for f in file_list if f.get("doc_id") == doc_id)
-                    gdrive_id = file_data.get("gdrive_file_id")
-                    crypto_tag = file_data.get("encryption_type")
-
-                    try:
-                        with st.spinner("1/2: Mengunduh file dari Google Drive..."):
-                            encrypted_bytes = google_utils.download_from_gdrive(gdrive_service, gdrive_id)
-                        
-                        if encrypted_bytes is None:
-                            raise Exception("File tidak ditemukan di Google Drive.")
-
-                        with st.spinner("2/2: Memproses file..."):
-                            # --- LOGIKA DEKRIPSI BERDASARKAN KRITERIA ---
-                            if crypto_tag == "SuperEncrypt":
-                                decrypted_bytes = crypto_utils.decrypt_super(encrypted_bytes, decrypt_password)
-                                # Download file hasil dekripsi
-                                st.download_button(
-                                    label=f"Download '{file_data['original_filename']}'",
-                                    data=decrypted_bytes,
-                                    file_name=file_data['original_filename']
-                                )
-                                st.success("File berhasil diproses!")
-                                
-                            elif crypto_tag == "ChaCha20":
-                                decrypted_bytes = crypto_utils.decrypt_file(encrypted_bytes, decrypt_password)
-                                # Download file hasil dekripsi
-                                st.download_button(
-                                    label=f"Download '{file_data['original_filename']}'",
-                                    data=decrypted_bytes,
-                                    file_name=file_data['original_filename']
-                                )
-                                st.success("File berhasil diproses!")
-                                
-                            elif crypto_tag == "Steganography":
-                                # Untuk steganografi, ekstrak teks rahasia dan kembalikan gambar asli
-                                secret_text = crypto_utils.decrypt_stenography(encrypted_bytes, decrypt_password)
-                                
-                                # Buat file .txt untuk secret text
-                                secret_filename = file_data['original_filename'].rsplit('.', 1)[0] + '_secret.txt'
-                                
-                                st.success("Steganografi berhasil diekstrak!")
-                                
-                                # Tampilkan secret text
-                                st.text_area("Pesan Rahasia:", secret_text, height=150)
-                                
-                                # Download buttons dalam 2 kolom
-                                col1, col2 = st.columns(2)
-                                
-                                with col1:
-                                    # Download gambar asli
-                                    st.download_button(
-                                        label=f"📷 Download Gambar '{file_data['original_filename']}'",
-                                        data=encrypted_bytes,
-                                        file_name=file_data['original_filename'],
-                                        mime="image/png"
-                                    )
-                                
-                                with col2:
-                                    # Download secret text sebagai .txt
-                                    st.download_button(
-                                        label=f"📄 Download Secret Text",
-                                        data=secret_text.encode('utf-8'),
-                                        file_name=secret_filename,
-                                        mime="text/plain"
-                                    )
-
-                    except Exception as e:
-                        # Ini akan menangkap error password salah
-                        st.error(f"Gagal: Password salah atau file korup. ({e})")
+                    _handle_download(file_data, decrypt_password)
                 
                 else:
                     st.warning("Harap pilih file.")
+
+            st.divider()
+
+            # --- Bagian Download Banyak File (ZIP) ---
+            st.subheader("📦 Download Beberapa File (ZIP)")
+            zip_selection = st.multiselect("Pilih file untuk di-download sekaligus", file_options.keys(), key="zip_select")
+            zip_password = st.text_input("Password (sama untuk semua file terpilih)", type="password", key="zip_pass")
+
+            if st.button("Buat ZIP"):
+                if zip_selection:
+                    selected_ids = {file_options[option] for option in zip_selection}
+                    selected_files = [f for f in file_list if f.get("doc_id") in selected_ids]
+                    with profiling.profile_action("download_zip", st.session_state['username']):
+                        _handle_zip_download(selected_files, zip_password)
+                else:
+                    st.warning("Harap pilih minimal satu file.")
             
             st.divider()
 
@@ -220,4 +403,9 @@ def main_app(db, controller) -> None:
                         st.success(f"File '{file_data['original_filename']}' telah dihapus.")
                         st.rerun() # Muat ulang halaman untuk memperbarui daftar file
                     except Exception as e:
-                        st.error(f"Gagal menghapus file: {e}")
\ No newline at end of file
+                        st.error(f"Gagal menghapus file: {e}")
+
+        _render_jobs_panel(st.session_state['username'])
+
+    elif page == "🛠️ Profiling":
+        _render_profiling_page()
@@ -1,5 +1,6 @@
 import streamlit as st
 from src.firebase_utils import login_user, register_user
+from src import session_tokens
 from streamlit_cookies_controller import CookieController
 import datetime
 
@@ -22,9 +23,16 @@ def render_login_page(db, controller: CookieController) -> None:
             success, message = login_user(db, username, password)
 
             if success:
-                controller.set('logged_in_user', username)
+                # Cookie berisi token bertanda tangan, bukan username mentah
+                try:
+                    session_token = session_tokens.issue_token(username)
+                except RuntimeError as e:  # SESSION_SECRET wajib tapi belum diset
+                    st.error(str(e))
+                    return
+                controller.set(session_tokens.COOKIE_NAME, session_token, max_age=session_tokens.SESSION_TTL)
                 st.session_state['logged_in'] = True
                 st.session_state['username'] = username
+                st.session_state['session_token'] = session_token
                 st.success(message + " Mengalihkan...")
                 st.rerun()
             else:
@@ -0,0 +1,274 @@
+"""Asyncio counterpart of `src.connector` for fanning out to many external endpoints.
+
+It offers the same guarantees as the synchronous helpers:
+- TLS certificate verification by default, custom CA bundle and client certs (mTLS)
+- retries with exponential backoff on 429/5xx for idempotent methods
+- a default timeout on every request
+- cookie dicts in the exact format of `connector.cookies_to_dict`, so cookies
+  stored by either path can be restored by the other
+
+plus a bounded number of in-flight requests shared by every session.
+
+Usage:
+    from src.async_connector import AsyncConnector
+
+    async with AsyncConnector(verify=True, max_concurrency=20) as conn:
+        # One session per account: sessions share the connection pool and the
+        # concurrency limit, but each keeps its own cookie jar.
+        sessions = [conn.session(cookie_dict) for cookie_dict in stored_cookies]
+        responses = await asyncio.gather(*(s.get(url) for s in sessions))
+        refreshed = [s.cookies_to_dict() for s in sessions]
+
+    # Or, for the common "refresh stored cookies for many accounts" job:
+    refreshed = await refresh_cookies_for_accounts(url, {"alice": cookies_a, "bob": cookies_b})
+"""
+from email.utils import formatdate
+from http.cookies import SimpleCookie
+from typing import Dict, Any, Optional
+import asyncio
+import logging
+import ssl
+
+import aiohttp
+import requests
+from requests.cookies import morsel_to_cookie
+from yarl import URL
+
+from src.connector import (
+    ClientCert,
+    DEFAULT_BACKOFF_FACTOR,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_POOL_MAXSIZE,
+    DEFAULT_TIMEOUT,
+    RETRY_ALLOWED_METHODS,
+    RETRY_STATUS_FORCELIST,
+    cookies_to_dict,
+)
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENCY = 20
+BACKOFF_MAX = 120  # seconds, same cap as urllib3.Retry
+
+
+def make_ssl_context(
+    verify: bool = True,
+    ca_bundle: Optional[str] = None,
+    client_cert: ClientCert = None,
+):
+    """Build the `ssl=` argument for aiohttp from requests-style TLS settings.
+
+    Returns False when verification is disabled (not recommended).
+    """
+    if not verify and not ca_bundle:
+        if client_cert:
+            ctx = ssl.create_default_context()
+            ctx.check_hostname = False
+            ctx.verify_mode = ssl.CERT_NONE
+        else:
+            return False
+    else:
+        ctx = ssl.create_default_context(cafile=ca_bundle) if ca_bundle else ssl.create_default_context()
+
+    # Optionally load client certificate for mutual TLS
+    if client_cert:
+        if isinstance(client_cert, (list, tuple)):
+            ctx.load_cert_chain(client_cert[0], client_cert[1])
+        else:
+            ctx.load_cert_chain(client_cert)
+    return ctx
+
+
+def async_cookies_to_dict(cookie_jar: aiohttp.abc.AbstractCookieJar) -> Dict[str, Dict[str, Any]]:
+    """Serialize an aiohttp cookie jar with `connector.cookies_to_dict`.
+
+    Cookies are converted to a RequestsCookieJar first, so the stored format is
+    identical to the one produced by the synchronous connector.
+    """
+    jar = requests.cookies.RequestsCookieJar()
+    for morsel in cookie_jar:
+        jar.set_cookie(morsel_to_cookie(morsel))
+    return cookies_to_dict(jar)
+
+
+def load_cookie_dict(cookie_jar: aiohttp.abc.AbstractCookieJar, cookie_dict: Dict[str, Dict[str, Any]]) -> None:
+    """Populate an aiohttp cookie jar from a dict produced by `cookies_to_dict`."""
+    for name, info in cookie_dict.items():
+        try:
+            cookie = SimpleCookie()
+            cookie[name] = info["value"]
+            morsel = cookie[name]
+            raw_domain = info.get("domain") or ""
+            domain = raw_domain.lstrip(".")
+            morsel["path"] = info.get("path") or "/"
+            if raw_domain.startswith("."):
+                morsel["domain"] = domain
+            if info.get("secure"):
+                morsel["secure"] = True
+            if info.get("httponly"):
+                morsel["httponly"] = True
+            if info.get("expires"):
+                morsel["expires"] = formatdate(info["expires"], usegmt=True)
+            scheme = "https" if info.get("secure") else "http"
+            cookie_jar.update_cookies(cookie, response_url=URL(f"{scheme}://{domain}/"))
+        except Exception:
+            LOG.exception("failed to set cookie %s", name)
+
+
+def _backoff(backoff_factor: float, attempt: int) -> float:
+    """Exponential backoff matching urllib3.Retry: factor * 2 ** (attempt - 1)."""
+    if attempt <= 1:
+        return 0
+    return min(BACKOFF_MAX, backoff_factor * (2 ** (attempt - 1)))
+
+
+class AsyncConnector:
+    """Owns the shared TCP connection pool, TLS settings and concurrency limit.
+
+    Create sessions with `session()`; close the connector (or use `async with`)
+    when done.
+    """
+
+    def __init__(
+        self,
+        verify: bool = True,
+        ca_bundle: Optional[str] = None,
+        client_cert: ClientCert = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        allow_ip_cookies: bool = False,
+    ):
+        self.ssl = make_ssl_context(verify, ca_bundle, client_cert)
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.pool_maxsize = max(pool_maxsize, max_concurrency)
+        self.allow_ip_cookies = allow_ip_cookies
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tcp: Optional[aiohttp.TCPConnector] = None
+
+    @property
+    def tcp_connector(self) -> aiohttp.TCPConnector:
+        # Created lazily so the connector binds to the running event loop
+        if self._tcp is None or self._tcp.closed:
+            self._tcp = aiohttp.TCPConnector(limit=self.pool_maxsize, ssl=self.ssl)
+        return self._tcp
+
+    def session(self, cookie_dict: Optional[Dict[str, Dict[str, Any]]] = None) -> "AsyncSecureSession":
+        """Create a session with its own cookie jar, optionally restored from `cookie_dict`."""
+        s = AsyncSecureSession(self)
+        if cookie_dict:
+            load_cookie_dict(s.cookie_jar, cookie_dict)
+        return s
+
+    async def close(self) -> None:
+        if self._tcp is not None:
+            await self._tcp.close()
+            self._tcp = None
+
+    async def __aenter__(self) -> "AsyncConnector":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+
+class AsyncSecureSession:
+    """aiohttp session bound to an `AsyncConnector`, with retry and backoff."""
+
+    def __init__(self, connector: AsyncConnector):
+        self.connector = connector
+        self.cookie_jar = aiohttp.CookieJar(unsafe=connector.allow_ip_cookies)
+        self._session = aiohttp.ClientSession(
+            connector=connector.tcp_connector,
+            connector_owner=False,
+            cookie_jar=self.cookie_jar,
+            timeout=connector.timeout,
+        )
+
+    async def request(self, method: str, url: str, **kwargs) -> aiohttp.ClientResponse:
+        """Send a request and return the response with its body already read.
+
+        Idempotent methods are retried on connection errors, timeouts and
+        429/5xx responses, honouring `Retry-After` when the server sends it.
+        """
+        method = method.upper()
+        retryable = method in RETRY_ALLOWED_METHODS
+        attempts = (self.connector.max_retries + 1) if retryable else 1
+
+        for attempt in range(1, attempts + 1):
+            await asyncio.sleep(_backoff(self.connector.backoff_factor, attempt))
+            try:
+                async with self.connector._semaphore:
+                    resp = await self._session.request(method, url, **kwargs)
+                    await resp.read()  # release the connection back to the pool
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt == attempts:
+                    raise
+                LOG.debug("retrying %s %s after connection error (attempt %d)", method, url, attempt)
+                continue
+
+            if resp.status in RETRY_STATUS_FORCELIST and attempt < attempts:
+                retry_after = resp.headers.get("Retry-After")
+                if retry_after and retry_after.isdigit():
+                    await asyncio.sleep(min(BACKOFF_MAX, int(retry_after)))
+                LOG.debug("retrying %s %s after HTTP %d (attempt %d)", method, url, resp.status, attempt)
+                continue
+            return resp
+
+        return resp
+
+    async def get(self, url: str, **kwargs) -> aiohttp.ClientResponse:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> aiohttp.ClientResponse:
+        return await self.request("POST", url, **kwargs)
+
+    async def put(self, url: str, **kwargs) -> aiohttp.ClientResponse:
+        return await self.request("PUT", url, **kwargs)
+
+    async def delete(self, url: str, **kwargs) -> aiohttp.ClientResponse:
+        return await self.request("DELETE", url, **kwargs)
+
+    def cookies_to_dict(self) -> Dict[str, Dict[str, Any]]:
+        """Serialize this session's cookies in the `connector.cookies_to_dict` format."""
+        return async_cookies_to_dict(self.cookie_jar)
+
+    async def close(self) -> None:
+        await self._session.close()
+
+    async def __aenter__(self) -> "AsyncSecureSession":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+
+async def refresh_cookies_for_accounts(
+    url: str,
+    accounts: Dict[str, Dict[str, Dict[str, Any]]],
+    **connector_kwargs,
+) -> Dict[str, Any]:
+    """GET `url` for every account concurrently and return the refreshed cookie dicts.
+
+    Args:
+        url: endpoint that refreshes/extends the session cookies.
+        accounts: mapping of account id -> stored cookie dict.
+        connector_kwargs: forwarded to `AsyncConnector` (verify, ca_bundle, max_concurrency, ...).
+
+    Returns:
+        Mapping of account id -> new cookie dict, or the exception raised for that account.
+    """
+    async with AsyncConnector(**connector_kwargs) as conn:
+
+        async def _refresh(cookie_dict):
+            async with conn.session(cookie_dict) as s:
+                resp = await s.get(url)
+                resp.raise_for_status()
+                return s.cookies_to_dict()
+
+        results = await asyncio.gather(*(_refresh(c) for c in accounts.values()), return_exceptions=True)
+    return dict(zip(accounts.keys(), results))
@@ -0,0 +1,102 @@
+# src/async_io.py
+# Facade asyncio untuk operasi GDrive dan Firestore.
+#
+# Client googleapiclient dan firebase_admin sama-sama blocking, jadi setiap
+# operasi dijalankan di thread pool bersama (ASYNC_IO_WORKERS thread) dan
+# dibungkus coroutine. Halaman yang butuh daftar file, agregat, dan beberapa
+# unduhan sekaligus bisa menjalankannya bersamaan dengan asyncio.gather
+# alih-alih satu per satu. Setiap thread memakai service GDrive miliknya
+# sendiri (DriveCredentialManager.get_service), karena httplib2 tidak thread-safe.
+#
+# Dari kode sinkron (script Streamlit), jalankan dengan async_io.run(...).
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from src import firebase_utils
+from src import google_utils
+from src import metrics
+from src.settings import get_int_setting
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=get_int_setting("ASYNC_IO_WORKERS", 8),
+                                           thread_name_prefix="async-io")
+        return _executor
+
+
+async def _call(fn, *args, **kwargs):
+    """Menjalankan fungsi blocking di thread pool; jumlah thread membatasi konkurensi."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), functools.partial(fn, *args, **kwargs))
+
+
+def run(coro):
+    """Menjalankan coroutine dari kode sinkron (mis. script Streamlit) dan mengembalikan hasilnya."""
+    return asyncio.run(coro)
+
+
+# --- Firestore ---
+
+async def get_user_files(db, username, use_cache=True):
+    return await _call(firebase_utils.get_user_files, db, username, use_cache)
+
+async def get_user_storage_stats(db, username, use_cache=True):
+    return await _call(firebase_utils.get_user_storage_stats, db, username, use_cache)
+
+async def log_file_to_firestore(db, username, original_filename, gdrive_file_id, crypto_type,
+                                plaintext_size=0, ciphertext_size=0, integrity=None):
+    return await _call(firebase_utils.log_file_to_firestore, db, username, original_filename,
+                       gdrive_file_id, crypto_type, plaintext_size, ciphertext_size, integrity)
+
+async def delete_file_from_firestore(db, username, doc_id):
+    return await _call(firebase_utils.delete_file_from_firestore, db, username, doc_id)
+
+
+# --- Google Drive ---
+
+async def upload_to_gdrive(manager, file_bytes, filename_in_drive):
+    return await _call(lambda: google_utils.upload_to_gdrive(manager.get_service(), file_bytes, filename_in_drive))
+
+async def download_from_gdrive(manager, gdrive_file_id, integrity=None):
+    return await _call(lambda: google_utils.download_from_gdrive(manager.get_service(), gdrive_file_id, integrity))
+
+async def delete_file_from_gdrive(manager, file_id):
+    return await _call(lambda: google_utils.delete_file_from_gdrive(manager.get_service(), file_id))
+
+
+# --- Helper gabungan ---
+
+async def load_file_listing(db, username, use_cache=True):
+    """Daftar file dan agregat penyimpanan pengguna, diambil bersamaan. Mengembalikan (files, stats)."""
+    with metrics.span("async.load_file_listing"):
+        files, stats = await asyncio.gather(
+            get_user_files(db, username, use_cache),
+            get_user_storage_stats(db, username, use_cache),
+        )
+    return files, stats
+
+async def list_and_prefetch(db, manager, username, prefetch=3, use_cache=True):
+    """
+    Mengambil daftar file + agregat, lalu langsung mengunduh `prefetch` blob
+    teratas secara bersamaan (agregat tidak perlu ditunggu sebelum unduhan dimulai).
+    Mengembalikan (files, stats, {doc_id: encrypted_bytes atau None}).
+    """
+    with metrics.span("async.list_and_prefetch") as prefetch_span:
+        stats_task = asyncio.ensure_future(get_user_storage_stats(db, username, use_cache))
+        files = await get_user_files(db, username, use_cache)
+
+        head = files[:prefetch]
+        blobs = await asyncio.gather(*(
+            download_from_gdrive(manager, f.get("gdrive_file_id"), f.get("integrity")) for f in head
+        ))
+        prefetched = {f.get("doc_id"): blob for f, blob in zip(head, blobs)}
+        prefetch_span.add_bytes(sum(len(b) for b in blobs if b))
+        stats = await stats_task
+    return files, stats, prefetched
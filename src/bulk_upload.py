@@ -0,0 +1,288 @@
+# bulk_upload.py
+# Enkripsi + upload satu direktori tanpa UI Streamlit (migrasi / backup terjadwal).
+#
+# Jalankan dari root project:
+#   python -m src.bulk_upload ./folder --user alice --mode chacha20
+#
+# Password file dibaca dari env BULK_UPLOAD_PASSWORD (atau diminta via prompt).
+# File yang sudah pernah di-upload (nama, ukuran, dan mtime sama) dilewati
+# berdasarkan manifest lokal (default: <folder>/.bulk_manifest.json).
+import argparse
+import datetime
+import getpass
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+
+# Load environment variables FIRST (sama seperti main.py)
+load_dotenv()
+
+from src import crypto_utils
+from src import firebase_utils
+from src import google_utils
+from src import upload_planner
+
+MANIFEST_NAME = ".bulk_manifest.json"
+
+# File kecil dienkripsi berkelompok dengan crypto_utils.encrypt_many: satu KDF
+# per kelompok, bukan satu per file (KDF jauh lebih mahal dari enkripsi 1 KB)
+SMALL_FILE_BYTES = 64 * 1024
+SMALL_FILE_BATCH = 256
+
+# File yang sudah ter-upload dicatat di manifest paling lambat sekian detik
+# kemudian, agar proses yang terhenti tidak meng-upload ulang (dan meninggalkan
+# file yatim di GDrive) sebanyak satu batch metadata penuh
+MANIFEST_SAVE_INTERVAL = 2.0
+
+# Mode CLI -> (fungsi enkripsi, tag yang disimpan di Firestore, sama dengan dashboard)
+MODES = {
+    "chacha20": (crypto_utils.encrypt_file, "ChaCha20"),
+    "super": (crypto_utils.encrypt_super, "SuperEncrypt"),
+}
+
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_manifest(path, manifest):
+    """Tulis manifest secara atomik agar tidak korup jika proses terhenti."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def scan_directory(root, manifest, manifest_path):
+    """
+    Mengembalikan (to_encrypt, to_log): file baru/berubah yang perlu dienkripsi,
+    dan file yang sudah ter-upload ke GDrive tapi metadatanya belum tercatat.
+    """
+    to_encrypt, to_log = [], []
+    for dirpath, _, filenames in os.walk(root):
+        for name in sorted(filenames):
+            path = os.path.join(dirpath, name)
+            if os.path.abspath(path) in (os.path.abspath(manifest_path), os.path.abspath(manifest_path) + ".tmp"):
+                continue
+            rel_path = os.path.relpath(path, root).replace(os.sep, "/")
+            stat = os.stat(path)
+            entry = manifest.get(rel_path)
+            unchanged = entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns
+            if unchanged and entry.get("doc_id"):
+                continue  # Sudah selesai sepenuhnya
+            if unchanged and entry.get("gdrive_file_id"):
+                to_log.append(rel_path)
+            else:
+                to_encrypt.append((rel_path, path, stat.st_size, stat.st_mtime_ns))
+    return to_encrypt, to_log
+
+
+def _encrypt_worker(path, out_path, password, crypto_tag, engine):
+    """
+    Dijalankan di proses worker: enkripsi satu file dan tulis hasilnya ke out_path.
+    Mengembalikan (ukuran ciphertext, manifest integritas per chunk).
+    """
+    if engine == "stream":
+        ciphertext_size = crypto_utils.encrypt_file_stream(path, out_path, password)
+        return ciphertext_size, crypto_utils.compute_file_chunk_manifest(out_path)
+
+    encrypt_fn = next(fn for fn, tag in MODES.values() if tag == crypto_tag)
+    with open(path, "rb") as f:
+        encrypted = encrypt_fn(f.read(), password)
+    with open(out_path, "wb") as f:
+        f.write(encrypted)
+    return len(encrypted), crypto_utils.compute_chunk_manifest(encrypted)
+
+
+def _encrypt_batch_worker(paths, out_paths, password, crypto_tag):
+    """Seperti _encrypt_worker untuk sekelompok file kecil; hasil sesuai urutan `paths`."""
+    items = []
+    for path in paths:
+        with open(path, "rb") as f:
+            items.append(f.read())
+    results = []
+    for out_path, encrypted in zip(out_paths, crypto_utils.encrypt_many(items, password, crypto_tag)):
+        with open(out_path, "wb") as f:
+            f.write(encrypted)
+        results.append((len(encrypted), crypto_utils.compute_chunk_manifest(encrypted)))
+    return results
+
+
+def _upload_worker(manager, rel_path, enc_path):
+    """Dijalankan di thread upload: setiap thread memakai service GDrive miliknya sendiri."""
+    unique_filename = f"{os.path.basename(rel_path)}_{datetime.datetime.now().timestamp()}.enc"
+    gdrive_id = google_utils.upload_file_to_gdrive(manager.get_service(), enc_path, unique_filename)
+    os.remove(enc_path)
+    return gdrive_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Enkripsi dan upload seluruh isi direktori ke Secure Digital Dropbox.")
+    parser.add_argument("directory", help="Direktori yang akan di-upload")
+    parser.add_argument("--user", required=True, help="Username pemilik file (harus sudah terdaftar)")
+    parser.add_argument("--mode", choices=sorted(MODES), default="chacha20", help="Algoritma enkripsi")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="Jumlah proses enkripsi")
+    parser.add_argument("--upload-concurrency", type=int, default=4, help="Jumlah upload paralel ke GDrive")
+    parser.add_argument("--batch-size", type=int, default=firebase_utils.BATCH_MAX_WRITES - 1,
+                        help="Jumlah metadata per batch Firestore")
+    parser.add_argument("--manifest", help=f"Path manifest (default: <directory>/{MANIFEST_NAME})")
+    args = parser.parse_args()
+
+    root = os.path.abspath(args.directory)
+    if not os.path.isdir(root):
+        print(f"❌ Direktori '{args.directory}' tidak ditemukan!")
+        return 1
+    manifest_path = args.manifest or os.path.join(root, MANIFEST_NAME)
+
+    password = os.getenv("BULK_UPLOAD_PASSWORD") or getpass.getpass("Password enkripsi: ")
+    if not password:
+        print("❌ Password tidak boleh kosong.")
+        return 1
+
+    db = firebase_utils.init_firebase()
+    manager = google_utils.get_credential_manager()
+    if db is None or manager is None:
+        print("❌ Kredensial Firebase/GDrive tidak ditemukan. Lihat SETUP.md.")
+        return 1
+
+    manifest = load_manifest(manifest_path)
+    to_encrypt, to_log = scan_directory(root, manifest, manifest_path)
+    print(f"📂 {len(to_encrypt)} file akan dienkripsi & di-upload, "
+          f"{len(to_log)} file tinggal dicatat metadatanya, sisanya dilewati.")
+
+    _, crypto_tag = MODES[args.mode]
+    pending = []  # (rel_path, entri metadata) yang menunggu ditulis ke Firestore
+    stats = {"uploaded": 0, "logged": 0, "failed": 0, "bytes": 0}
+    last_saved = [time.monotonic()]
+
+    def checkpoint_manifest(force=False):
+        if force or time.monotonic() - last_saved[0] >= MANIFEST_SAVE_INTERVAL:
+            save_manifest(manifest_path, manifest)
+            last_saved[0] = time.monotonic()
+
+    def flush_metadata():
+        if not pending:
+            return
+        results = firebase_utils.log_files_to_firestore(db, args.user, [entry for _, entry in pending])
+        for (rel_path, _), result in zip(pending, results):
+            if result["ok"]:
+                manifest[rel_path]["doc_id"] = result["doc_id"]
+                stats["logged"] += 1
+            else:
+                stats["failed"] += 1
+                print(f"⚠️ Gagal mencatat metadata '{rel_path}': {result['error']}")
+        pending.clear()
+        checkpoint_manifest(force=True)
+
+    def queue_metadata(rel_path):
+        entry = manifest[rel_path]
+        pending.append((rel_path, {
+            "original_filename": rel_path,
+            "gdrive_file_id": entry["gdrive_file_id"],
+            "encryption_type": entry["encryption_type"],
+            "plaintext_size": entry["size"],
+            "ciphertext_size": entry["ciphertext_size"],
+            "integrity": entry.get("integrity"),
+        }))
+        if len(pending) >= args.batch_size:
+            flush_metadata()
+
+    start = time.perf_counter()
+    for rel_path in to_log:
+        queue_metadata(rel_path)
+
+    with tempfile.TemporaryDirectory(prefix="bulk_upload_") as tmp_dir, \
+            ProcessPoolExecutor(max_workers=args.workers) as encrypt_pool, \
+            ThreadPoolExecutor(max_workers=args.upload_concurrency) as upload_pool:
+
+        encrypt_futures = {}  # future -> (info file yang dienkripsi, True jika hasilnya list per kelompok)
+        small_files = {}      # crypto_tag -> [(path, info)] yang menunggu dikelompokkan
+
+        def submit_small(file_tag):
+            group = small_files.pop(file_tag, [])
+            if group:
+                future = encrypt_pool.submit(_encrypt_batch_worker, [path for path, _ in group],
+                                             [info[1] for _, info in group], password, file_tag)
+                encrypt_futures[future] = ([info for _, info in group], True)
+
+        for i, (rel_path, path, size, mtime_ns) in enumerate(to_encrypt):
+            # MEMORY_BUDGET_MB berlaku per proses worker (--workers proses berjalan bersamaan)
+            try:
+                plan = upload_planner.plan_upload(size, crypto_tag)
+            except upload_planner.UploadRejected as e:
+                stats["failed"] += 1
+                print(f"⚠️ '{rel_path}' dilewati: {e}")
+                continue
+            if plan["note"]:
+                print(f"ℹ️ '{rel_path}': {plan['note']}")
+            out_path = os.path.join(tmp_dir, f"{i}.enc")
+            info = (rel_path, out_path, size, mtime_ns, plan["crypto_tag"])
+            if plan["engine"] == "memory" and size <= SMALL_FILE_BYTES and plan["crypto_tag"] in crypto_utils.BATCH_CRYPTO_TAGS:
+                small_files.setdefault(plan["crypto_tag"], []).append((path, info))
+                if len(small_files[plan["crypto_tag"]]) >= SMALL_FILE_BATCH:
+                    submit_small(plan["crypto_tag"])
+                continue
+            future = encrypt_pool.submit(_encrypt_worker, path, out_path, password, plan["crypto_tag"], plan["engine"])
+            encrypt_futures[future] = ([info], False)
+        for file_tag in list(small_files):
+            submit_small(file_tag)
+
+        # Upload dimulai begitu file selesai dienkripsi (pipeline)
+        upload_futures = {}
+        for future in as_completed(encrypt_futures):
+            infos, batched = encrypt_futures[future]
+            try:
+                results = future.result() if batched else [future.result()]
+            except Exception as e:
+                stats["failed"] += len(infos)
+                for rel_path, *_ in infos:
+                    print(f"⚠️ Gagal mengenkripsi '{rel_path}': {e}")
+                continue
+            for (rel_path, out_path, size, mtime_ns, file_tag), (ciphertext_size, integrity) in zip(infos, results):
+                upload_future = upload_pool.submit(_upload_worker, manager, rel_path, out_path)
+                upload_futures[upload_future] = (rel_path, size, mtime_ns, ciphertext_size, integrity, file_tag)
+
+        for future in as_completed(upload_futures):
+            rel_path, size, mtime_ns, ciphertext_size, integrity, file_tag = upload_futures[future]
+            try:
+                gdrive_id = future.result()
+            except Exception as e:
+                gdrive_id = None
+                print(f"⚠️ Gagal mengupload '{rel_path}': {e}")
+            if not gdrive_id:
+                stats["failed"] += 1
+                continue
+
+            stats["uploaded"] += 1
+            stats["bytes"] += size
+            manifest[rel_path] = {
+                "size": size,
+                "mtime_ns": mtime_ns,
+                "ciphertext_size": ciphertext_size,
+                "encryption_type": file_tag,
+                "gdrive_file_id": gdrive_id,
+                "integrity": integrity,
+            }
+            checkpoint_manifest()
+            queue_metadata(rel_path)
+
+    flush_metadata()
+    save_manifest(manifest_path, manifest)
+    elapsed = time.perf_counter() - start
+
+    print(f"\n✅ Selesai dalam {elapsed:.1f} s: {stats['uploaded']} di-upload, "
+          f"{stats['logged']} metadata dicatat, {stats['failed']} gagal.")
+    if elapsed > 0 and stats["uploaded"]:
+        print(f"📈 Throughput: {stats['uploaded'] / elapsed:.2f} file/s, "
+              f"{stats['bytes'] / elapsed / (1024 * 1024):.2f} MB/s (plaintext)")
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
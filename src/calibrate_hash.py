@@ -0,0 +1,32 @@
+# calibrate_hash.py
+# Jalankan dari root project: python -m src.calibrate_hash --target-ms 250
+import argparse
+import os
+import time
+from src import crypto_utils
+
+def main():
+    parser = argparse.ArgumentParser(description="Kalibrasi cost hash password untuk target latensi login.")
+    parser.add_argument("--target-ms", type=float, default=250, help="Target waktu verifikasi per login (ms)")
+    parser.add_argument("--algo", default=crypto_utils.PASSWORD_HASH_ALGO, help="Algoritma hash password")
+    args = parser.parse_args()
+
+    print(f"⏱️ Mengukur {args.algo} di mesin ini ({os.cpu_count()} CPU)...")
+    iterations = crypto_utils.calibrate_password_iterations(args.target_ms, args.algo)
+
+    # Verifikasi hasil kalibrasi dengan satu pengukuran nyata
+    record = crypto_utils.hash_password("calibration-password", iterations, args.algo)
+    start = time.perf_counter()
+    crypto_utils.verify_password("calibration-password", record)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    print(f"✅ {iterations:,} iterasi ≈ {elapsed_ms:.0f} ms per login (target {args.target_ms:.0f} ms)")
+    if iterations == crypto_utils.LEGACY_PASSWORD_ITERATIONS:
+        print("💡 Mesin ini lambat untuk target tersebut; dipakai batas minimum iterasi.")
+
+    print("\n📋 Copy baris ini ke file .env Anda (atau Streamlit Secrets):")
+    print(f"PASSWORD_HASH_ITERATIONS={iterations}")
+    print("\nHash pengguna lama akan di-upgrade otomatis saat mereka login berikutnya.")
+
+if __name__ == '__main__':
+    main()
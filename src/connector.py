@@ -5,12 +5,13 @@ This module provides a thin wrapper around `requests.Session` that:
 - applies sensible timeouts and retries
 - allows using a custom CA bundle or client certs when needed
 - serializes/deserializes cookies to/from simple dicts for storing in a DB
+- reuses keep-alive connections through a registry of shared, pooled adapters
 
 Usage:
     from src.connector import make_session_from_cookie, secure_session_with_retries
 
     s = secure_session_with_retries(verify=True)
-    r = s.get("https://example.com/protected", timeout=10)
+    r = s.get("https://example.com/protected")  # default timeout is applied automatically
 
     # To persist cookies returned by the site into DB, call cookies_to_dict(s.cookies)
     cookie_dict = cookies_to_dict(s.cookies)
@@ -18,67 +19,215 @@ Usage:
     # Later, rebuild the session with stored cookies:
     s2 = make_session_from_cookie(cookie_dict, verify=True)
 
+    # Cookie-less calls can share one long-lived session per TLS configuration:
+    s3 = get_pooled_session(verify=True)
+
+Sessions built by this module never own their connection pool. They mount a
+shared `TimeoutHTTPAdapter` taken from a process-wide registry keyed by the TLS
+configuration (verify, ca_bundle, client_cert) and the retry/pool settings, so
+fresh and cookie-restored sessions reuse the same keep-alive connections while
+keeping separate cookie jars. Each session mounts a `SharedAdapterHandle` around
+the shared adapter, so `Session.close()` (or `with session:`) releases nothing
+that other sessions, possibly mid-request on other threads, still depend on.
 """
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple, Union
 import requests
-from requests.adapters import HTTPAdapter
+from requests.adapters import BaseAdapter, HTTPAdapter
 from urllib3.util import Retry
 import logging
+import threading
 
 LOG = logging.getLogger(__name__)
 
+DEFAULT_TIMEOUT = 10
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.3
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+
+RETRY_STATUS_FORCELIST = (429, 500, 502, 503, 504)
+RETRY_ALLOWED_METHODS = ("HEAD", "GET", "OPTIONS", "PUT", "DELETE")
+
+ClientCert = Optional[Union[str, Tuple[str, str]]]
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default timeout to every request sent through it.
+
+    Callers may still pass `timeout=` explicitly; it then takes precedence.
+    """
+
+    def __init__(self, *args, timeout: float = DEFAULT_TIMEOUT, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+class SharedAdapterHandle(BaseAdapter):
+    """Per-session view of a shared adapter: delegates `send`, ignores `close`.
+
+    `requests.Session.close()` closes every mounted adapter; mounting the shared
+    adapter directly would tear down the connection pool of every other session
+    using it. Only `close_pooled_sessions` closes the shared adapters.
+    """
+
+    def __init__(self, adapter: TimeoutHTTPAdapter):
+        super().__init__()
+        self.adapter = adapter
+
+    @property
+    def timeout(self) -> float:
+        return self.adapter.timeout
+
+    @property
+    def max_retries(self) -> Retry:
+        return self.adapter.max_retries
+
+    def send(self, request, **kwargs):
+        return self.adapter.send(request, **kwargs)
+
+    def close(self):
+        pass
+
+
+_registry_lock = threading.Lock()
+_adapters: Dict[tuple, TimeoutHTTPAdapter] = {}
+_pooled_sessions: Dict[tuple, requests.Session] = {}
+
+
+def _tls_key(verify: bool, ca_bundle: Optional[str], client_cert: ClientCert) -> tuple:
+    """Normalize the TLS configuration into a hashable registry key."""
+    cert = tuple(client_cert) if isinstance(client_cert, (list, tuple)) else client_cert
+    return (ca_bundle or verify, cert)
+
+
+def _get_shared_adapter(
+    tls_key: tuple,
+    timeout: float,
+    max_retries: int,
+    backoff_factor: float,
+    pool_connections: int,
+    pool_maxsize: int,
+) -> TimeoutHTTPAdapter:
+    """Return the registered adapter for this configuration, creating it once."""
+    key = (tls_key, timeout, max_retries, backoff_factor, pool_connections, pool_maxsize)
+    with _registry_lock:
+        adapter = _adapters.get(key)
+        if adapter is None:
+            # Configure retries for idempotent methods
+            retries = Retry(
+                total=max_retries,
+                read=max_retries,
+                connect=max_retries,
+                backoff_factor=backoff_factor,
+                status_forcelist=RETRY_STATUS_FORCELIST,
+                allowed_methods=RETRY_ALLOWED_METHODS,
+            )
+            adapter = TimeoutHTTPAdapter(
+                timeout=timeout,
+                max_retries=retries,
+                pool_connections=pool_connections,
+                pool_maxsize=pool_maxsize,
+            )
+            _adapters[key] = adapter
+        return adapter
+
+
+def _configure_session(
+    s: requests.Session,
+    verify: bool,
+    ca_bundle: Optional[str],
+    client_cert: ClientCert,
+    adapter: TimeoutHTTPAdapter,
+) -> requests.Session:
+    # Enforce TLS verification by default; allow custom CA bundle
+    if ca_bundle:
+        s.verify = ca_bundle
+    else:
+        s.verify = verify
+
+    # Optionally set client certificate for mutual TLS
+    if client_cert:
+        s.cert = client_cert
+
+    handle = SharedAdapterHandle(adapter)
+    s.mount("https://", handle)
+    s.mount("http://", handle)
+    s.request_timeout = adapter.timeout  # kept for backwards compatibility
+    return s
+
 
 def secure_session_with_retries(
     verify: bool = True,
     ca_bundle: Optional[str] = None,
-    client_cert: Optional[str] = None,
-    timeout: int = 10,
-    max_retries: int = 3,
-    backoff_factor: float = 0.3,
+    client_cert: ClientCert = None,
+    timeout: float = DEFAULT_TIMEOUT,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+    pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+    pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
 ) -> requests.Session:
     """Create a requests.Session with secure defaults and retry behavior.
 
+    The session gets its own cookie jar but mounts a shared, pooled adapter, so
+    connections to the same host are kept alive and reused across sessions.
+
     Args:
         verify: whether to verify TLS certificates. If False, TLS verification is disabled (not recommended).
         ca_bundle: path to a CA bundle file to use for verification (overrides system CA bundle).
         client_cert: path to client cert file (or tuple (cert, key)) to use for mTLS.
-        timeout: default timeout (in seconds) for use by callers; session does not itself enforce per-request timeout,
-                 so callers should pass `timeout=` to session methods.
+        timeout: default timeout (in seconds) applied to every request that does not pass `timeout=`.
         max_retries: number of retries for idempotent requests.
         backoff_factor: backoff factor applied between retry attempts.
+        pool_connections: number of per-host connection pools to cache.
+        pool_maxsize: maximum number of connections kept alive per host.
 
     Returns:
         Configured requests.Session
     """
-    s = requests.Session()
+    adapter = _get_shared_adapter(
+        _tls_key(verify, ca_bundle, client_cert),
+        timeout, max_retries, backoff_factor, pool_connections, pool_maxsize,
+    )
+    return _configure_session(requests.Session(), verify, ca_bundle, client_cert, adapter)
 
-    # Enforce TLS verification by default; allow custom CA bundle
-    if ca_bundle:
-        s.verify = ca_bundle
-    else:
-        s.verify = verify
 
-    # Optionally set client certificate for mutual TLS
-    if client_cert:
-        s.cert = client_cert
+def get_pooled_session(
+    verify: bool = True,
+    ca_bundle: Optional[str] = None,
+    client_cert: ClientCert = None,
+) -> requests.Session:
+    """Return the long-lived session registered for this TLS configuration.
 
-    # Configure retries for idempotent methods
-    retries = Retry(
-        total=max_retries,
-        read=max_retries,
-        connect=max_retries,
-        backoff_factor=backoff_factor,
-        status_forcelist=(429, 500, 502, 503, 504),
-        allowed_methods=("HEAD", "GET", "OPTIONS", "PUT", "DELETE"),
-    )
-    adapter = HTTPAdapter(max_retries=retries)
-    s.mount("https://", adapter)
-    s.mount("http://", adapter)
+    Intended for cookie-less calls: the session (and its cookie jar) is shared by
+    every caller using the same (verify, ca_bundle, client_cert). Use
+    `secure_session_with_retries` or `make_session_from_cookie` when cookies matter.
+    """
+    key = _tls_key(verify, ca_bundle, client_cert)
+    with _registry_lock:
+        s = _pooled_sessions.get(key)
+    if s is None:
+        s = secure_session_with_retries(verify=verify, ca_bundle=ca_bundle, client_cert=client_cert)
+        with _registry_lock:
+            s = _pooled_sessions.setdefault(key, s)
+    return s
 
-    # Good to have server-side default timeout value enforced by callers
-    s.request_timeout = timeout  # informational only
 
-    return s
+def close_pooled_sessions() -> None:
+    """Close every registered session and adapter (e.g. on shutdown or in tests)."""
+    with _registry_lock:
+        sessions = list(_pooled_sessions.values())
+        adapters = list(_adapters.values())
+        _pooled_sessions.clear()
+        _adapters.clear()
+    for s in sessions:
+        s.close()
+    for adapter in adapters:
+        adapter.close()
 
 
 def cookies_to_dict(cookiejar: requests.cookies.RequestsCookieJar) -> Dict[str, Dict[str, Any]]:
@@ -99,19 +248,24 @@ def cookies_to_dict(cookiejar: requests.cookies.RequestsCookieJar) -> Dict[str,
     return out
 
 
-def make_session_from_cookie(cookie_dict: Dict[str, Dict[str, Any]], verify: bool = True, ca_bundle: Optional[str] = None) -> requests.Session:
+def make_session_from_cookie(
+    cookie_dict: Dict[str, Dict[str, Any]],
+    verify: bool = True,
+    ca_bundle: Optional[str] = None,
+    client_cert: ClientCert = None,
+) -> requests.Session:
     """Rebuild a requests.Session and populate its cookie jar from a stored cookie dict.
 
+    The session uses the same shared, retry-configured adapter as
+    `secure_session_with_retries` for this TLS configuration.
+
     Args:
         cookie_dict: cookie mapping previously returned by `cookies_to_dict`.
         verify: TLS verification setting for the session.
         ca_bundle: optional CA bundle path.
+        client_cert: optional client certificate (or (cert, key) tuple) for mTLS.
     """
-    s = requests.Session()
-    if ca_bundle:
-        s.verify = ca_bundle
-    else:
-        s.verify = verify
+    s = secure_session_with_retries(verify=verify, ca_bundle=ca_bundle, client_cert=client_cert)
 
     for name, info in cookie_dict.items():
         try:
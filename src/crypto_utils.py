@@ -1,8 +1,14 @@
 # src/crypto_utils.py
 import hashlib
+import hmac
 import os
-from Crypto.Cipher import ARC4, ChaCha20
-from Crypto.Random import get_random_bytes
+import struct
+import time
+from src import metrics
+
+# PyCryptodome (ARC4, ChaCha20) diimpor di dalam fungsi cipher, bukan di sini:
+# halaman login hanya butuh hash password dari modul ini, jadi cold start
+# tidak perlu membayar biaya import Crypto.
 
 # --- Bagian 1: Algoritma Super Enkripsi (Kriteria 3) ---
 # Ini adalah 3 algoritma yang Anda minta (Vigenere, Railway, RC4)
@@ -18,13 +24,14 @@ def _derive_keys(password: str, salt: bytes = b'static_salt_for_project') -> tup
     Sumber (hashlib.pbkdf2_hmac): https://docs.python.org/3/library/hashlib.html
     """
     # PBKDF2 digunakan untuk membuat kunci kriptografi yang kuat dari password
-    derived_key = hashlib.pbkdf2_hmac(
-        'sha256',
-        password.encode('utf-8'),
-        salt,  # Idealnya, salt ini unik per file, tapi statis tidak apa-apa untuk proyek ini
-        100000,
-        dklen=48  # Minta total 48 byte
-    )
+    with metrics.span("crypto.kdf", scheme="super"):
+        derived_key = hashlib.pbkdf2_hmac(
+            'sha256',
+            password.encode('utf-8'),
+            salt,  # Idealnya, salt ini unik per file, tapi statis tidak apa-apa untuk proyek ini
+            100000,
+            dklen=48  # Minta total 48 byte
+        )
     
     rc4_key = derived_key[:32]       # 32 byte pertama untuk RC4
     vigenere_key = derived_key[32:]  # 16 byte sisanya untuk Vigenere
@@ -128,31 +135,40 @@ def encrypt_super(file_bytes: bytes, password: str) -> bytes:
     Mengenkripsi file menggunakan Vigenere -> Railway -> RC4.
     Sumber (PyCryptodome ARC4): https://www.pycryptodome.org/en/latest/src/cipher/arc4.html
     """
+    from Crypto.Cipher import ARC4
+
     rc4_key, vigenere_key, num_rails = _derive_keys(password)
     
     # Lapisan 1: Vigenere
-    vigenere_encrypted = _encrypt_vigenere_bytes(file_bytes, vigenere_key)
+    with metrics.span("crypto.vigenere.encrypt", nbytes=len(file_bytes)):
+        vigenere_encrypted = _encrypt_vigenere_bytes(file_bytes, vigenere_key)
     
     # Lapisan 2: Railway Fence
-    railway_encrypted = _encrypt_railway_bytes(vigenere_encrypted, num_rails)
+    with metrics.span("crypto.railway.encrypt", nbytes=len(vigenere_encrypted)):
+        railway_encrypted = _encrypt_railway_bytes(vigenere_encrypted, num_rails)
     
     # Lapisan 3: RC4
-    cipher_rc4 = ARC4.new(rc4_key)
-    final_encrypted = cipher_rc4.encrypt(railway_encrypted)
+    with metrics.span("crypto.rc4.encrypt", nbytes=len(railway_encrypted)):
+        cipher_rc4 = ARC4.new(rc4_key)
+        final_encrypted = cipher_rc4.encrypt(railway_encrypted)
     
     return final_encrypted
 
 def decrypt_super(file_bytes: bytes, password: str) -> bytes:
     """Mendekripsi file dalam urutan terbalik: RC4 -> Railway -> Vigenere."""
+    from Crypto.Cipher import ARC4
+
     rc4_key, vigenere_key, num_rails = _derive_keys(password)
 
     # Lapisan 1: RC4
-    cipher_rc4 = ARC4.new(rc4_key)
-    rc4_decrypted = cipher_rc4.decrypt(file_bytes)
+    with metrics.span("crypto.rc4.decrypt", nbytes=len(file_bytes)):
+        cipher_rc4 = ARC4.new(rc4_key)
+        rc4_decrypted = cipher_rc4.decrypt(file_bytes)
     
     # Lapisan 2: Railway Fence
     try:
-        railway_decrypted = _decrypt_railway_bytes(rc4_decrypted, num_rails)
+        with metrics.span("crypto.railway.decrypt", nbytes=len(rc4_decrypted)):
+            railway_decrypted = _decrypt_railway_bytes(rc4_decrypted, num_rails)
     except IndexError:
         # Ini terjadi jika password salah (jumlah rel salah)
         raise Exception("Password salah atau file korup (Railway)")
@@ -160,7 +176,8 @@ def decrypt_super(file_bytes: bytes, password: str) -> bytes:
         raise Exception(f"Dekripsi Railway gagal: {e}")
         
     # Lapisan 3: Vigenere
-    final_decrypted = _decrypt_vigenere_bytes(railway_decrypted, vigenere_key)
+    with metrics.span("crypto.vigenere.decrypt", nbytes=len(railway_decrypted)):
+        final_decrypted = _decrypt_vigenere_bytes(railway_decrypted, vigenere_key)
     
     return final_decrypted
 
@@ -173,11 +190,15 @@ def encrypt_file(file_bytes: bytes, password: str) -> bytes:
     Mengenkripsi file menggunakan ChaCha20 (Konsep Kriptografi Lain).
     Sumber (PyCryptodome ChaCha20): https://www.pycryptodome.org/en/latest/src/cipher/chacha20.html
     """
+    from Crypto.Cipher import ChaCha20
+
     # Gunakan KDF yang sama untuk mendapatkan kunci
-    key = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), b'salt_chacha', 100000, dklen=32)
+    with metrics.span("crypto.kdf", scheme="chacha20"):
+        key = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), b'salt_chacha', 100000, dklen=32)
     
-    cipher = ChaCha20.new(key=key)
-    ciphertext = cipher.encrypt(file_bytes)
+    with metrics.span("crypto.chacha20.encrypt", nbytes=len(file_bytes)):
+        cipher = ChaCha20.new(key=key)
+        ciphertext = cipher.encrypt(file_bytes)
     
     # Kita harus menyimpan 'nonce' (nilai unik) bersama dengan ciphertext
     # Nonce ChaCha20 default adalah 8 bytes (bisa 12 jika pakai nonce=... parameter)
@@ -186,8 +207,11 @@ def encrypt_file(file_bytes: bytes, password: str) -> bytes:
 
 def decrypt_file(encrypted_bytes: bytes, password: str) -> bytes:
     """Mendekripsi file ChaCha20."""
+    from Crypto.Cipher import ChaCha20
+
     try:
-        key = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), b'salt_chacha', 100000, dklen=32)
+        with metrics.span("crypto.kdf", scheme="chacha20"):
+            key = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), b'salt_chacha', 100000, dklen=32)
         
         # Baca panjang nonce (1 byte pertama)
         nonce_length = encrypted_bytes[0]
@@ -196,34 +220,67 @@ def decrypt_file(encrypted_bytes: bytes, password: str) -> bytes:
         nonce = encrypted_bytes[1:1+nonce_length]
         ciphertext = encrypted_bytes[1+nonce_length:]
         
-        cipher = ChaCha20.new(key=key, nonce=nonce)
-        decrypted_bytes = cipher.decrypt(ciphertext)
+        with metrics.span("crypto.chacha20.decrypt", nbytes=len(ciphertext)):
+            cipher = ChaCha20.new(key=key, nonce=nonce)
+            decrypted_bytes = cipher.decrypt(ciphertext)
         return decrypted_bytes
     except (ValueError, KeyError, TypeError, IndexError) as e:
         # Error ini akan terjadi jika password salah (kunci salah)
         # atau jika file tersebut tidak dienkripsi dengan ChaCha20
         raise Exception(f"Password salah atau file korup: {str(e)}")
     
-def encrypt_stenography(image_bytes: bytes, secret_text: str, encrypt_password: str) -> bytes:
-    """
-    Menyembunyikan teks rahasia di dalam gambar menggunakan Steganografi LSB.
-    Teks rahasia dienkripsi dengan super enkripsi terlebih dahulu.
-    """
-    # 1. Enkripsi teks rahasia dengan super enkripsi
-    secret_bytes = secret_text.encode('utf-8')
-    encrypted_secret = encrypt_super(secret_bytes, encrypt_password)
-    
-    # 2. Siapkan header: panjang data rahasia (4 bytes)
-    secret_len = len(encrypted_secret)
-    header = secret_len.to_bytes(4, byteorder='big')
-    data_to_hide = header + encrypted_secret
-    
-    # 3. Cek apakah gambar cukup besar
-    max_bytes = len(image_bytes) // 8  # Setiap byte perlu 8 byte gambar (1 bit per byte)
-    if len(data_to_hide) > max_bytes:
-        raise Exception(f"Gambar terlalu kecil. Perlu {len(data_to_hide)} bytes, tersedia {max_bytes} bytes")
-    
-    # 4. Sembunyikan data di LSB (Least Significant Bit) gambar
+# Versi streaming (file -> file) untuk file besar: format output identik dengan
+# encrypt_file/decrypt_file, tetapi memori yang dipakai hanya satu buffer chunk.
+STREAM_CHUNK_SIZE = 4 * 1024 * 1024
+
+def _copy_stream_cipher(cipher_fn, src, dest, chunk_size: int) -> int:
+    """Membaca src per chunk ke buffer yang sama dan menulis hasil cipher_fn ke dest."""
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    total = 0
+    while True:
+        n = src.readinto(buffer)
+        if not n:
+            return total
+        cipher_fn(view[:n], output=view[:n])  # Enkripsi in-place, tanpa alokasi baru
+        dest.write(view[:n])
+        total += n
+
+def encrypt_file_stream(in_path: str, out_path: str, password: str, chunk_size: int = STREAM_CHUNK_SIZE) -> int:
+    """Seperti encrypt_file, tetapi dari file ke file. Mengembalikan ukuran ciphertext."""
+    from Crypto.Cipher import ChaCha20
+
+    with metrics.span("crypto.kdf", scheme="chacha20"):
+        key = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), b'salt_chacha', 100000, dklen=32)
+
+    cipher = ChaCha20.new(key=key)
+    with open(in_path, "rb") as src, open(out_path, "wb") as dest, \
+            metrics.span("crypto.chacha20.encrypt_stream") as stream_span:
+        dest.write(len(cipher.nonce).to_bytes(1, byteorder='big') + cipher.nonce)
+        total = _copy_stream_cipher(cipher.encrypt, src, dest, chunk_size)
+        stream_span.add_bytes(total)
+    return 1 + len(cipher.nonce) + total
+
+def decrypt_file_stream(in_path: str, out_path: str, password: str, chunk_size: int = STREAM_CHUNK_SIZE) -> int:
+    """Seperti decrypt_file, tetapi dari file ke file. Mengembalikan ukuran plaintext."""
+    from Crypto.Cipher import ChaCha20
+
+    with metrics.span("crypto.kdf", scheme="chacha20"):
+        key = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), b'salt_chacha', 100000, dklen=32)
+
+    try:
+        with open(in_path, "rb") as src, open(out_path, "wb") as dest, \
+                metrics.span("crypto.chacha20.decrypt_stream") as stream_span:
+            nonce_length = src.read(1)[0]
+            cipher = ChaCha20.new(key=key, nonce=src.read(nonce_length))
+            total = _copy_stream_cipher(cipher.decrypt, src, dest, chunk_size)
+            stream_span.add_bytes(total)
+        return total
+    except (ValueError, KeyError, TypeError, IndexError) as e:
+        raise Exception(f"Password salah atau file korup: {str(e)}")
+
+def _embed_lsb_bytes(image_bytes: bytes, data_to_hide: bytes) -> bytes:
+    """Menyembunyikan data (header + payload) di LSB (Least Significant Bit) gambar."""
     stego_image = bytearray(image_bytes)
     data_index = 0
     bit_index = 0
@@ -246,50 +303,78 @@ def encrypt_stenography(image_bytes: bytes, secret_text: str, encrypt_password:
     
     return bytes(stego_image)
 
+def _extract_lsb_bytes(stego_image_bytes: bytes) -> bytes:
+    """Membaca header panjang (32 bit) lalu payload dari LSB gambar."""
+    # 1. Ekstrak header (4 bytes pertama = 32 bit)
+    header_bits = []
+    for i in range(32):
+        bit = stego_image_bytes[i] & 1
+        header_bits.append(bit)
+    
+    # Konversi bits ke bytes
+    header_bytes = bytearray()
+    for i in range(0, 32, 8):
+        byte = 0
+        for j in range(8):
+            byte = (byte << 1) | header_bits[i + j]
+        header_bytes.append(byte)
+    
+    secret_len = int.from_bytes(header_bytes, byteorder='big')
+    
+    # 2. Validasi panjang
+    max_extractable = (len(stego_image_bytes) // 8) - 4
+    if secret_len > max_extractable or secret_len <= 0:
+        raise Exception("Data rahasia tidak valid atau password salah")
+    
+    # 3. Ekstrak data terenkripsi
+    total_bits = (secret_len + 4) * 8
+    extracted_bits = []
+    for i in range(total_bits):
+        bit = stego_image_bytes[i] & 1
+        extracted_bits.append(bit)
+    
+    # Konversi bits ke bytes (skip header 32 bit pertama)
+    extracted_bytes = bytearray()
+    for i in range(32, len(extracted_bits), 8):
+        byte = 0
+        for j in range(8):
+            if i + j < len(extracted_bits):
+                byte = (byte << 1) | extracted_bits[i + j]
+        extracted_bytes.append(byte)
+    
+    return bytes(extracted_bytes[:secret_len])
+
+def encrypt_stenography(image_bytes: bytes, secret_text: str, encrypt_password: str) -> bytes:
+    """
+    Menyembunyikan teks rahasia di dalam gambar menggunakan Steganografi LSB.
+    Teks rahasia dienkripsi dengan super enkripsi terlebih dahulu.
+    """
+    # 1. Enkripsi teks rahasia dengan super enkripsi
+    secret_bytes = secret_text.encode('utf-8')
+    encrypted_secret = encrypt_super(secret_bytes, encrypt_password)
+    
+    # 2. Siapkan header: panjang data rahasia (4 bytes)
+    secret_len = len(encrypted_secret)
+    header = secret_len.to_bytes(4, byteorder='big')
+    data_to_hide = header + encrypted_secret
+    
+    # 3. Cek apakah gambar cukup besar
+    max_bytes = len(image_bytes) // 8  # Setiap byte perlu 8 byte gambar (1 bit per byte)
+    if len(data_to_hide) > max_bytes:
+        raise Exception(f"Gambar terlalu kecil. Perlu {len(data_to_hide)} bytes, tersedia {max_bytes} bytes")
+    
+    # 4. Sembunyikan data di LSB gambar
+    with metrics.span("crypto.stego.embed", nbytes=len(image_bytes)):
+        return _embed_lsb_bytes(image_bytes, data_to_hide)
+
 
 def decrypt_stenography(stego_image_bytes: bytes, decrypt_password: str) -> str:
     """
     Mengekstrak dan mendekripsi teks rahasia dari gambar steganografi.
     """
     try:
-        # 1. Ekstrak header (4 bytes pertama = 32 bit)
-        header_bits = []
-        for i in range(32):
-            bit = stego_image_bytes[i] & 1
-            header_bits.append(bit)
-        
-        # Konversi bits ke bytes
-        header_bytes = bytearray()
-        for i in range(0, 32, 8):
-            byte = 0
-            for j in range(8):
-                byte = (byte << 1) | header_bits[i + j]
-            header_bytes.append(byte)
-        
-        secret_len = int.from_bytes(header_bytes, byteorder='big')
-        
-        # 2. Validasi panjang
-        max_extractable = (len(stego_image_bytes) // 8) - 4
-        if secret_len > max_extractable or secret_len <= 0:
-            raise Exception("Data rahasia tidak valid atau password salah")
-        
-        # 3. Ekstrak data terenkripsi
-        total_bits = (secret_len + 4) * 8
-        extracted_bits = []
-        for i in range(total_bits):
-            bit = stego_image_bytes[i] & 1
-            extracted_bits.append(bit)
-        
-        # Konversi bits ke bytes (skip header 32 bit pertama)
-        extracted_bytes = bytearray()
-        for i in range(32, len(extracted_bits), 8):
-            byte = 0
-            for j in range(8):
-                if i + j < len(extracted_bits):
-                    byte = (byte << 1) | extracted_bits[i + j]
-            extracted_bytes.append(byte)
-        
-        encrypted_secret = bytes(extracted_bytes[:secret_len])
+        with metrics.span("crypto.stego.extract", nbytes=len(stego_image_bytes)):
+            encrypted_secret = _extract_lsb_bytes(stego_image_bytes)
         
         # 4. Dekripsi dengan super dekripsi
         decrypted_bytes = decrypt_super(encrypted_secret, decrypt_password)
@@ -298,4 +383,398 @@ def decrypt_stenography(stego_image_bytes: bytes, decrypt_password: str) -> str:
         return secret_text
         
     except Exception as e:
-        raise Exception(f"Gagal mengekstrak pesan.")
\ No newline at end of file
+        raise Exception(f"Gagal mengekstrak pesan.")
+
+# --- Bagian 3: Hash Password Pengguna ---
+# Algoritma dan cost disimpan per record pengguna ('hash_algo', 'hash_iterations'),
+# sehingga cost bisa dinaikkan tanpa memutus login pengguna lama.
+
+PASSWORD_HASH_ALGO = 'pbkdf2_sha512'
+LEGACY_PASSWORD_ITERATIONS = 100000  # Record lama tanpa field 'hash_iterations'
+
+_PASSWORD_HASHERS = {
+    'pbkdf2_sha512': lambda password, salt, iterations: hashlib.pbkdf2_hmac(
+        'sha512', password.encode('utf-8'), salt, iterations),
+    'pbkdf2_sha256': lambda password, salt, iterations: hashlib.pbkdf2_hmac(
+        'sha256', password.encode('utf-8'), salt, iterations),
+}
+
+def hash_password(password: str, iterations: int, algo: str = PASSWORD_HASH_ALGO) -> dict:
+    """
+    Meng-hash password dengan salt acak baru.
+    Mengembalikan field yang disimpan di dokumen pengguna.
+    """
+    salt = os.urandom(16)
+    hashed = _PASSWORD_HASHERS[algo](password, salt, iterations)
+    return {
+        'password_hash': hashed.hex(),
+        'salt': salt.hex(),
+        'hash_algo': algo,
+        'hash_iterations': iterations,
+    }
+
+def verify_password(password: str, record: dict) -> bool:
+    """Memverifikasi password terhadap field hash yang tersimpan di record pengguna."""
+    algo = record.get('hash_algo', PASSWORD_HASH_ALGO)
+    iterations = record.get('hash_iterations', LEGACY_PASSWORD_ITERATIONS)
+    hasher = _PASSWORD_HASHERS.get(algo)
+    if hasher is None:
+        raise ValueError(f"Algoritma hash tidak dikenal: {algo}")
+
+    check_hash = hasher(password, bytes.fromhex(record['salt']), iterations)
+    return hmac.compare_digest(check_hash, bytes.fromhex(record['password_hash']))
+
+def password_needs_rehash(record: dict, iterations: int, algo: str = PASSWORD_HASH_ALGO) -> bool:
+    """True jika record memakai algoritma lain atau cost yang lebih rendah dari target."""
+    return (record.get('hash_algo', PASSWORD_HASH_ALGO) != algo
+            or record.get('hash_iterations', LEGACY_PASSWORD_ITERATIONS) < iterations)
+
+def calibrate_password_iterations(target_ms: float, algo: str = PASSWORD_HASH_ALGO,
+                                  min_iterations: int = LEGACY_PASSWORD_ITERATIONS) -> int:
+    """
+    Mengukur kecepatan hash di mesin ini dan mengembalikan jumlah iterasi
+    yang mendekati target_ms per verifikasi (dibulatkan ke 1.000 terdekat,
+    tidak pernah di bawah min_iterations).
+    """
+    hasher = _PASSWORD_HASHERS[algo]
+    salt = os.urandom(16)
+
+    # Gandakan iterasi sampai satu pengukuran cukup lama untuk akurat (>= 50 ms)
+    iterations = 10000
+    while True:
+        start = time.perf_counter()
+        hasher('calibration-password', salt, iterations)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if elapsed_ms >= 50:
+            break
+        iterations *= 2
+
+    estimate = int(iterations * target_ms / elapsed_ms)
+    return max(min_iterations, round(estimate, -3))
+
+# --- Bagian 4: Manifest Integritas per Chunk ---
+# Semua cipher di atas tidak terautentikasi: file yang korup saat transfer
+# tetap "berhasil" didekripsi menjadi sampah. Manifest ini berisi hash SHA-256
+# setiap chunk ciphertext, dihitung saat enkripsi dan disimpan bersama
+# metadata file, sehingga setiap chunk bisa diverifikasi saat diunduh.
+
+INTEGRITY_CHUNK_SIZE = 1024 * 1024  # 1 MiB; 1 GB ciphertext = 1024 hash (~66 KB di Firestore)
+INTEGRITY_ALGO = 'sha256'
+
+class IntegrityError(ValueError):
+    """Chunk yang diunduh tidak cocok dengan hash di manifest."""
+
+def compute_chunk_manifest(data: bytes, chunk_size: int = INTEGRITY_CHUNK_SIZE) -> dict:
+    """Menghitung manifest {'algo', 'chunk_size', 'size', 'chunks'} untuk ciphertext `data`."""
+    view = memoryview(data)
+    with metrics.span("crypto.chunk_manifest", nbytes=len(data)):
+        chunks = [hashlib.sha256(view[start:start + chunk_size]).hexdigest()
+                  for start in range(0, len(data), chunk_size)]
+    return {
+        'algo': INTEGRITY_ALGO,
+        'chunk_size': chunk_size,
+        'size': len(data),
+        'chunks': chunks,
+    }
+
+def compute_file_chunk_manifest(path: str, chunk_size: int = INTEGRITY_CHUNK_SIZE) -> dict:
+    """Seperti compute_chunk_manifest, tetapi membaca ciphertext dari file per chunk."""
+    chunks = []
+    size = 0
+    with open(path, "rb") as f, metrics.span("crypto.chunk_manifest") as manifest_span:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            chunks.append(hashlib.sha256(chunk).hexdigest())
+            size += len(chunk)
+        manifest_span.add_bytes(size)
+    return {
+        'algo': INTEGRITY_ALGO,
+        'chunk_size': chunk_size,
+        'size': size,
+        'chunks': chunks,
+    }
+
+def chunk_range(manifest: dict, index: int) -> tuple:
+    """Rentang byte (awal, akhir inklusif) chunk ke-`index`, siap dipakai untuk header Range."""
+    start = index * manifest['chunk_size']
+    end = min(start + manifest['chunk_size'], manifest['size']) - 1
+    return start, end
+
+def verify_chunk(manifest: dict, index: int, chunk: bytes) -> bool:
+    """True jika `chunk` cocok dengan hash chunk ke-`index` di manifest."""
+    start, end = chunk_range(manifest, index)
+    if len(chunk) != end - start + 1:
+        return False
+    return hmac.compare_digest(hashlib.sha256(chunk).hexdigest(), manifest['chunks'][index])
+
+# --- Bagian 5: Steganografi Batch (Satu Pesan di Banyak Gambar) ---
+# Pesan dienkripsi sekali dengan super enkripsi, lalu ciphertext-nya dipecah
+# menjadi shard sebanding kapasitas tiap gambar. Setiap shard diberi header
+# urutan dan disisipkan dengan format yang sama seperti encrypt_stenography
+# (panjang 4 byte + data), jadi biaya per gambar hanya sebesar shard-nya dan
+# semua gambar bisa diproses paralel di process pool.
+
+STEGO_SHARD_MAGIC = b'STG1'
+# magic | id set (8 byte acak) | indeks shard | jumlah shard
+_STEGO_SHARD_HEADER = struct.Struct('>4s8sHH')
+
+# Setiap gambar membawa prefix panjang (4 byte) + header shard, walau shard-nya kosong
+STEGO_SHARD_MIN_IMAGE_SIZE = (4 + _STEGO_SHARD_HEADER.size) * 8
+
+def stego_shard_capacity(image_size: int) -> int:
+    """Jumlah byte ciphertext yang muat di satu gambar berukuran `image_size` byte (-1 jika header pun tidak muat)."""
+    if image_size < STEGO_SHARD_MIN_IMAGE_SIZE:
+        return -1
+    return image_size // 8 - 4 - _STEGO_SHARD_HEADER.size
+
+def _split_shards(payload: bytes, capacities: list) -> list:
+    """Memecah payload sebanding kapasitas, agar waktu embed tiap gambar seimbang."""
+    total_capacity = sum(capacities)
+    if len(payload) > total_capacity:
+        raise ValueError(f"Gambar terlalu kecil. Perlu {len(payload)} bytes, tersedia {total_capacity} bytes")
+    sizes = [len(payload) * cap // total_capacity if total_capacity else 0 for cap in capacities]
+    remaining = len(payload) - sum(sizes)
+    for i, cap in enumerate(capacities):
+        extra = min(cap - sizes[i], remaining)
+        sizes[i] += extra
+        remaining -= extra
+    shards, start = [], 0
+    for size in sizes:
+        shards.append(payload[start:start + size])
+        start += size
+    return shards
+
+def _map_parallel(fn, args_list, max_workers=None, executor=None) -> list:
+    """fn(*args) untuk setiap args, urutan hasil sama dengan input."""
+    if executor is not None:
+        return list(executor.map(fn, *zip(*args_list)))
+    if len(args_list) <= 1 or max_workers == 1:
+        return [fn(*args) for args in args_list]
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    # "spawn": aman dipanggil dari server Streamlit yang multi-thread (lihat jobs.py)
+    with ProcessPoolExecutor(max_workers=min(max_workers or os.cpu_count() or 2, len(args_list)),
+                             mp_context=multiprocessing.get_context("spawn")) as pool:
+        return list(pool.map(fn, *zip(*args_list)))
+
+def encrypt_stenography_batch(images: list, secret_text: str, encrypt_password: str,
+                              max_workers: int = None, executor=None) -> list:
+    """
+    Menyembunyikan satu teks rahasia yang tersebar di beberapa gambar.
+    Mengembalikan daftar gambar stego dengan urutan yang sama seperti `images`;
+    semua gambar dibutuhkan saat ekstraksi (urutannya bebas).
+
+    executor: pool opsional (mis. ProcessPoolExecutor milik pemanggil); tanpa itu
+    dibuat process pool sementara berisi `max_workers` proses.
+    """
+    if not images:
+        raise Exception("Minimal satu gambar dibutuhkan.")
+    if len(images) > 0xFFFF:
+        raise Exception("Terlalu banyak gambar (maksimal 65535).")
+
+    # Dicek sebelum enkripsi: semua gambar wajib membawa header, jadi satu gambar
+    # yang terlalu kecil menggagalkan seluruh batch
+    capacities = [stego_shard_capacity(len(img)) for img in images]
+    too_small = [i + 1 for i, cap in enumerate(capacities) if cap < 0]
+    if too_small:
+        raise ValueError(f"Gambar terlalu kecil: gambar ke-{', '.join(map(str, too_small))} "
+                         f"(minimal {STEGO_SHARD_MIN_IMAGE_SIZE} bytes per gambar)")
+
+    encrypted_secret = encrypt_super(secret_text.encode('utf-8'), encrypt_password)
+    shards = _split_shards(encrypted_secret, capacities)
+
+    set_id = os.urandom(8)
+    tasks = []
+    for index, (image_bytes, shard) in enumerate(zip(images, shards)):
+        data = _STEGO_SHARD_HEADER.pack(STEGO_SHARD_MAGIC, set_id, index, len(images)) + shard
+        tasks.append((image_bytes, len(data).to_bytes(4, byteorder='big') + data))
+
+    with metrics.span("crypto.stego.embed_batch", nbytes=sum(len(img) for img in images)):
+        return _map_parallel(_embed_lsb_bytes, tasks, max_workers, executor)
+
+def decrypt_stenography_batch(stego_images: list, decrypt_password: str,
+                              max_workers: int = None, executor=None) -> str:
+    """
+    Kebalikan encrypt_stenography_batch: mengekstrak shard dari semua gambar
+    (urutan bebas), menyusunnya kembali, lalu mendekripsi teks rahasia.
+    """
+    with metrics.span("crypto.stego.extract_batch", nbytes=sum(len(img) for img in stego_images)):
+        try:
+            blobs = _map_parallel(_extract_lsb_bytes, [(img,) for img in stego_images], max_workers, executor)
+        except Exception:
+            raise Exception("Gagal mengekstrak pesan.")
+
+    shards, set_ids, totals = {}, set(), set()
+    for blob in blobs:
+        if len(blob) < _STEGO_SHARD_HEADER.size:
+            raise Exception("Gambar bukan bagian dari steganografi batch.")
+        magic, set_id, index, total = _STEGO_SHARD_HEADER.unpack_from(blob)
+        if magic != STEGO_SHARD_MAGIC:
+            raise Exception("Gambar bukan bagian dari steganografi batch.")
+        set_ids.add(set_id)
+        totals.add(total)
+        shards[index] = blob[_STEGO_SHARD_HEADER.size:]
+
+    if len(set_ids) != 1 or len(totals) != 1:
+        raise Exception("Gambar berasal dari beberapa pesan yang berbeda.")
+    total = totals.pop()
+    missing = [i + 1 for i in range(total) if i not in shards]
+    if missing:
+        raise Exception(f"Gambar ke-{', '.join(map(str, missing))} dari {total} tidak ada.")
+
+    try:
+        decrypted_bytes = decrypt_super(b''.join(shards[i] for i in range(total)), decrypt_password)
+        return decrypted_bytes.decode('utf-8')
+    except Exception:
+        raise Exception("Gagal mengekstrak pesan.")
+
+# --- Bagian 6: Enkripsi Batch untuk Banyak File Kecil ---
+# Untuk file kecil, hampir seluruh waktu habis di PBKDF2 (100.000 iterasi per
+# file) dan overhead Python per byte. Salt di Bagian 1-2 statis, sehingga kunci
+# untuk satu password selalu sama: cukup diturunkan sekali per batch, dan
+# hasilnya byte-per-byte identik dengan encrypt_super/encrypt_file (bisa
+# didekripsi oleh fungsi lama, dan sebaliknya).
+#   - RC4 selalu mulai dari keystream yang sama untuk kunci yang sama (itulah
+#     perilaku encrypt_super), jadi keystream dihitung sekali sepanjang item
+#     terpanjang lalu di-XOR ke setiap item.
+#   - ChaCha20 tetap memakai nonce acak per item; keystream TIDAK boleh
+#     dipakai ulang lintas item, jadi hanya kuncinya yang dibagi.
+#   - Vigenere dan Railway Fence dihitung per "kolom" dengan slicing dan
+#     bytes.translate, bukan per byte.
+
+BATCH_TASKS_PER_WORKER = 4
+BATCH_CRYPTO_TAGS = ("ChaCha20", "SuperEncrypt")
+
+def _vigenere_tables(key: bytes, decrypt: bool = False) -> list:
+    """Tabel translate (P + K) % 256 atau (C - K) % 256 untuk setiap byte kunci."""
+    return [bytes((b + (256 - k if decrypt else k)) % 256 for b in range(256)) for k in key]
+
+def _vigenere_fast(data: bytes, tables: list) -> bytes:
+    """Sama dengan _encrypt/_decrypt_vigenere_bytes, per posisi kunci sekaligus."""
+    out = bytearray(len(data))
+    key_len = len(tables)
+    for j, table in enumerate(tables):
+        out[j::key_len] = data[j::key_len].translate(table)
+    return bytes(out)
+
+def _rail_indices(rails: int) -> list:
+    """Slice per rel: rel k berisi indeks k, p-k, p+k, 2p-k, ... (p = 2*(rails-1))."""
+    period = 2 * (rails - 1)
+    return [(k, period - k if 0 < k < rails - 1 else None, period) for k in range(rails)]
+
+def _railway_fast(data: bytes, rails: int) -> bytes:
+    """Sama dengan _encrypt_railway_bytes, tiap rel disusun dari dua slice."""
+    if rails <= 1 or rails >= len(data):
+        return data
+    fence = []
+    for first, second, period in _rail_indices(rails):
+        a = data[first::period]
+        if second is None:
+            fence.append(a)
+            continue
+        b = data[second::period]
+        rail = bytearray(len(a) + len(b))
+        rail[0::2], rail[1::2] = a, b
+        fence.append(bytes(rail))
+    return b"".join(fence)
+
+def _unrailway_fast(data: bytes, rails: int) -> bytes:
+    """Sama dengan _decrypt_railway_bytes: panjang tiap rel dihitung, lalu slice dikembalikan ke posisinya."""
+    if rails <= 1 or rails >= len(data):
+        return data
+    length = len(data)
+    out = bytearray(length)
+    start = 0
+    for first, second, period in _rail_indices(rails):
+        len_a = len(range(first, length, period))
+        len_b = len(range(second, length, period)) if second is not None else 0
+        rail = data[start:start + len_a + len_b]
+        start += len_a + len_b
+        if second is None:
+            out[first::period] = rail
+        else:
+            out[first::period] = rail[0::2]
+            out[second::period] = rail[1::2]
+    return bytes(out)
+
+def _xor_keystream(data: bytes, keystream: bytes) -> bytes:
+    n = len(data)
+    return (int.from_bytes(data, 'little') ^ int.from_bytes(keystream[:n], 'little')).to_bytes(n, 'little')
+
+def _derive_batch_keys(crypto_tag: str, password: str, max_len: int) -> dict:
+    """Kunci (dan keystream RC4) yang dibagi semua item dalam satu batch."""
+    if crypto_tag == "ChaCha20":
+        with metrics.span("crypto.kdf", scheme="chacha20"):
+            key = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), b'salt_chacha', 100000, dklen=32)
+        return {"key": key}
+    from Crypto.Cipher import ARC4
+    rc4_key, vigenere_key, num_rails = _derive_keys(password)
+    return {
+        "keystream": ARC4.new(rc4_key).encrypt(bytes(max_len)),
+        "vigenere_encrypt": _vigenere_tables(vigenere_key),
+        "vigenere_decrypt": _vigenere_tables(vigenere_key, decrypt=True),
+        "num_rails": num_rails,
+    }
+
+def _cipher_many_task(operation: str, crypto_tag: str, keys: dict, items: list) -> list:
+    """Memproses sebagian batch (di proses pemanggil atau di worker pool)."""
+    if crypto_tag == "ChaCha20":
+        from Crypto.Cipher import ChaCha20
+        results = []
+        for data in items:
+            if operation == "encrypt":
+                cipher = ChaCha20.new(key=keys["key"])  # Nonce acak per item
+                results.append(len(cipher.nonce).to_bytes(1, byteorder='big') + cipher.nonce + cipher.encrypt(data))
+            else:
+                nonce_length = data[0]
+                cipher = ChaCha20.new(key=keys["key"], nonce=data[1:1 + nonce_length])
+                results.append(cipher.decrypt(data[1 + nonce_length:]))
+        return results
+
+    keystream, rails = keys["keystream"], keys["num_rails"]
+    if operation == "encrypt":
+        tables = keys["vigenere_encrypt"]
+        return [_xor_keystream(_railway_fast(_vigenere_fast(data, tables), rails), keystream) for data in items]
+    tables = keys["vigenere_decrypt"]
+    return [_vigenere_fast(_unrailway_fast(_xor_keystream(data, keystream), rails), tables) for data in items]
+
+def _cipher_many(operation: str, items: list, password: str, crypto_tag: str, max_workers, executor) -> list:
+    if crypto_tag not in BATCH_CRYPTO_TAGS:
+        raise ValueError(f"Tipe enkripsi tidak didukung untuk batch: {crypto_tag}")
+    items = [bytes(data) for data in items]
+    total_bytes = sum(len(data) for data in items)
+    with metrics.span(f"crypto.batch.{operation}", nbytes=total_bytes, scheme=crypto_tag):
+        keys = _derive_batch_keys(crypto_tag, password, max((len(data) for data in items), default=0))
+        workers = 1 if executor is None and max_workers is None else (max_workers or os.cpu_count() or 2)
+        if workers == 1 and executor is None:
+            return _cipher_many_task(operation, crypto_tag, keys, items)
+        # Item dikelompokkan agar overhead kirim-terima ke worker dibayar per kelompok, bukan per item
+        size = max(1, -(-len(items) // (workers * BATCH_TASKS_PER_WORKER)))
+        groups = [items[i:i + size] for i in range(0, len(items), size)]
+        results = _map_parallel(_cipher_many_task, [(operation, crypto_tag, keys, g) for g in groups],
+                                max_workers, executor)
+        return [data for group in results for data in group]
+
+def encrypt_many(items: list, password: str, crypto_tag: str = "ChaCha20",
+                 max_workers: int = None, executor=None) -> list:
+    """
+    Mengenkripsi banyak file kecil (list bytes) dengan satu password.
+    Hasil sesuai urutan input dan identik formatnya dengan encrypt_file
+    (crypto_tag="ChaCha20") atau encrypt_super (crypto_tag="SuperEncrypt").
+
+    Tanpa max_workers/executor semuanya diproses di proses ini; dengan
+    max_workers, item dibagi ke process pool (lihat _map_parallel).
+    """
+    return _cipher_many("encrypt", items, password, crypto_tag, max_workers, executor)
+
+def decrypt_many(items: list, password: str, crypto_tag: str = "ChaCha20",
+                 max_workers: int = None, executor=None) -> list:
+    """Kebalikan encrypt_many; juga bisa mendekripsi hasil encrypt_file/encrypt_super biasa."""
+    if crypto_tag not in BATCH_CRYPTO_TAGS:
+        raise ValueError(f"Tipe enkripsi tidak didukung untuk batch: {crypto_tag}")
+    try:
+        return _cipher_many("decrypt", items, password, crypto_tag, max_workers, executor)
+    except (ValueError, KeyError, TypeError, IndexError) as e:
+        raise Exception(f"Password salah atau file korup: {str(e)}")
@@ -0,0 +1,248 @@
+# src/file_serving.py
+# Menyajikan hasil download langsung dari file di disk.
+#
+# st.download_button menyalin seluruh isi file ke media store Streamlit (RAM)
+# untuk setiap tombol. Jika DOWNLOAD_SERVER_PORT dan DOWNLOAD_BASE_URL (alamat
+# server ini yang bisa dicapai browser pengguna) diset, hasil dekripsi dan ZIP
+# disajikan oleh server HTTP kecil di proses yang sama: setiap file didaftarkan
+# dengan token acak yang kedaluwarsa setelah DOWNLOAD_TTL detik, dan isinya
+# dikirim dengan socket.sendfile (zero-copy dari page cache ke socket, tanpa
+# pernah dimuat ke memori Python). Header Range didukung agar unduhan yang
+# terputus bisa dilanjutkan browser.
+#
+# Tanpa server, delete_later tetap bisa dipakai untuk menghapus file sementara
+# (mis. ZIP ekspor) setelah DOWNLOAD_TTL detik.
+#
+# Modul ini sengaja tidak mengimpor streamlit (sama seperti metrics.py).
+import logging
+import mimetypes
+import os
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_TTL = 600          # detik
+CLEANUP_INTERVAL = 60      # detik
+
+_lock = threading.Lock()
+_entries = {}  # token -> {"path", "filename", "mime", "expires", "delete"}
+_pending_deletes = {}  # path -> waktu (monotonic) file dihapus; tidak butuh server
+_cleanup_thread = None
+_server = None
+_base_url = None
+_ttl = DEFAULT_TTL
+_warned_no_base_url = False
+
+
+def is_enabled():
+    return _server is not None
+
+
+def _remove_entry(token):
+    """Dipanggil dengan _lock terkunci."""
+    entry = _entries.pop(token)
+    if entry["delete"]:
+        try:
+            os.remove(entry["path"])
+        except FileNotFoundError:
+            pass
+
+
+def cleanup_expired():
+    """Menghapus token kedaluwarsa (dan file sementara yang diserahkan ke modul ini)."""
+    now = time.monotonic()
+    with _lock:
+        for token in [t for t, e in _entries.items() if e["expires"] <= now]:
+            _remove_entry(token)
+        for path in [p for p, deadline in _pending_deletes.items() if deadline <= now]:
+            del _pending_deletes[path]
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def delete_later(path, ttl=None):
+    """
+    Menghapus `path` setelah `ttl` detik (default DOWNLOAD_TTL), juga saat server
+    download tidak dijalankan. Dipakai untuk file sementara yang hanya dirujuk
+    tombol st.download_button, yang tidak tahu kapan file boleh dihapus.
+    """
+    with _lock:
+        _pending_deletes[path] = time.monotonic() + (ttl or _ttl)
+    _start_cleanup_thread()
+
+
+def register_file(path, filename, mime=None, ttl=None, delete_when_expired=False):
+    """
+    Mendaftarkan file untuk diunduh dan mengembalikan URL-nya.
+    Jika delete_when_expired=True, file dihapus saat tokennya kedaluwarsa
+    (kepemilikan file berpindah ke modul ini). Mendaftarkan file yang sama
+    lagi mengembalikan URL yang sama dan memperpanjang masa berlakunya.
+    """
+    if _server is None:
+        raise RuntimeError("Server download belum dijalankan (DOWNLOAD_SERVER_PORT belum diset).")
+    cleanup_expired()
+    expires = time.monotonic() + (ttl or _ttl)
+    with _lock:
+        # Fragment Streamlit bisa dirender ulang tiap beberapa detik; pakai ulang token yang sama
+        for token, entry in _entries.items():
+            if entry["path"] == path and entry["filename"] == filename:
+                entry["expires"] = max(entry["expires"], expires)
+                entry["delete"] = entry["delete"] or delete_when_expired
+                return f"{_base_url}/d/{token}/{quote(filename)}"
+        token = secrets.token_urlsafe(24)
+        _entries[token] = {
+            "path": path,
+            "filename": filename,
+            "mime": mime or mimetypes.guess_type(filename)[0] or "application/octet-stream",
+            "expires": expires,
+            "delete": delete_when_expired,
+        }
+    return f"{_base_url}/d/{token}/{quote(filename)}"
+
+
+def revoke(url_or_token):
+    """Mencabut satu token sebelum waktunya."""
+    token = url_or_token.split("/d/", 1)[-1].split("/", 1)[0]
+    with _lock:
+        if token in _entries:
+            _remove_entry(token)
+
+
+def _parse_range(header, size):
+    """Mengembalikan (awal, panjang) untuk satu rentang 'bytes=a-b', atau None jika tidak valid."""
+    try:
+        unit, _, spec = header.partition("=")
+        start_s, _, end_s = spec.strip().partition("-")
+        if unit.strip() != "bytes" or "," in spec:
+            return None
+        if start_s:
+            start = int(start_s)
+            end = min(int(end_s), size - 1) if end_s else size - 1
+        else:  # "bytes=-N": N byte terakhir
+            start = max(0, size - int(end_s))
+            end = size - 1
+    except ValueError:
+        return None
+    if start > end or start >= size:
+        return None
+    return start, end - start + 1
+
+
+class _DownloadHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def _serve(self, send_body):
+        parts = self.path.split("?", 1)[0].split("/")
+        token = parts[2] if len(parts) > 2 and parts[1] == "d" else None
+        with _lock:
+            entry = _entries.get(token)
+            if entry is not None and entry["expires"] <= time.monotonic():
+                _remove_entry(token)
+                entry = None
+        if entry is None:
+            self.send_error(404, "Link download tidak ditemukan atau sudah kedaluwarsa.")
+            return
+
+        try:
+            f = open(entry["path"], "rb")
+        except OSError:
+            self.send_error(404, "File sudah tidak tersedia.")
+            return
+
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            offset, count, status = 0, size, 200
+            if self.headers.get("Range"):
+                byte_range = _parse_range(self.headers["Range"], size)
+                if byte_range is None:
+                    self.send_response(416)
+                    self.send_header("Content-Range", f"bytes */{size}")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                (offset, count), status = byte_range, 206
+
+            self.send_response(status)
+            self.send_header("Content-Type", entry["mime"])
+            self.send_header("Content-Length", str(count))
+            self.send_header("Content-Disposition", f"attachment; filename*=UTF-8''{quote(entry['filename'])}")
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("Cache-Control", "no-store")
+            if status == 206:
+                self.send_header("Content-Range", f"bytes {offset}-{offset + count - 1}/{size}")
+            self.end_headers()
+
+            if send_body and count:
+                try:
+                    # sendfile: kernel menyalin langsung dari file ke socket
+                    self.connection.sendfile(f, offset, count)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # Pengguna membatalkan unduhan
+
+    def log_message(self, *args):
+        pass
+
+
+def _start_cleanup_thread():
+    global _cleanup_thread
+    with _lock:
+        if _cleanup_thread is not None:
+            return
+        _cleanup_thread = threading.Thread(target=_cleanup_loop, name="download-cleanup", daemon=True)
+    _cleanup_thread.start()
+
+
+def _cleanup_loop():
+    while True:
+        time.sleep(CLEANUP_INTERVAL)
+        try:
+            cleanup_expired()
+        except Exception:
+            LOG.exception("gagal membersihkan file download yang kedaluwarsa")
+
+
+def configure(port=None, host="127.0.0.1", base_url=None, ttl=None):
+    """
+    Menjalankan server download jika `port` dan `base_url` diset. Aman dipanggil
+    di setiap rerun Streamlit: server hanya dijalankan sekali per proses.
+
+    base_url: URL publik yang dipakai browser pengguna untuk mencapai server ini
+    (mis. https://app.example.com/files di belakang reverse proxy). Wajib: link
+    ke localhost hanya berfungsi jika browser berjalan di mesin server. Tanpa
+    base_url server tidak dijalankan dan dashboard memakai st.download_button.
+    """
+    global _server, _base_url, _ttl, _warned_no_base_url
+    if ttl:
+        _ttl = int(ttl)  # Juga dipakai delete_later tanpa server
+    if not port:
+        return False
+    if not base_url:
+        if not _warned_no_base_url:
+            _warned_no_base_url = True
+            LOG.warning("DOWNLOAD_SERVER_PORT diset tanpa DOWNLOAD_BASE_URL; server download tidak dijalankan.")
+        return False
+    with _lock:
+        if _server is not None:
+            return True
+        try:
+            _server = ThreadingHTTPServer((host or "127.0.0.1", int(port)), _DownloadHandler)
+        except OSError:
+            LOG.exception("gagal menjalankan server download di port %s", port)
+            return False
+        _server.daemon_threads = True
+        _base_url = base_url.rstrip("/")
+    threading.Thread(target=_server.serve_forever, name="download-http", daemon=True).start()
+    _start_cleanup_thread()
+    return True
@@ -3,15 +3,23 @@ import streamlit as st
 import firebase_admin
 from firebase_admin import credentials, firestore, storage
 import json
-from datetime import timedelta
-import hashlib  # Untuk hashing
+import logging
+from datetime import timedelta, datetime, timezone
 import os       # Untuk membuat salt (data acak)
-import hmac     # Untuk compare_digest
+import threading
+import time
 from dotenv import load_dotenv
+from google.api_core.exceptions import AlreadyExists
+from concurrent.futures import ThreadPoolExecutor
+from src.settings import get_int_setting
+from src import crypto_utils
+from src import metrics
 
 # Load .env untuk development lokal
 load_dotenv()
 
+LOG = logging.getLogger(__name__)
+
 @st.cache_resource
 def init_firebase():
     """Menginisialisasi koneksi Firebase Admin SDK."""
@@ -57,11 +65,27 @@ def init_firebase():
     
     return firestore.client() 
 
+# --- Parameter Hash Password ---
+# Cost (iterasi PBKDF2) dipilih dengan `python -m src.calibrate_hash`.
+# Verifikasi berjalan di thread pool terbatas: PBKDF2 melepas GIL, jadi burst
+# login tidak menahan thread script semua sesi, dan CPU tidak kebanjiran.
+PASSWORD_HASH_ITERATIONS = get_int_setting("PASSWORD_HASH_ITERATIONS", crypto_utils.LEGACY_PASSWORD_ITERATIONS)
+PASSWORD_HASH_WORKERS = get_int_setting("PASSWORD_HASH_WORKERS", os.cpu_count() or 2)
+
+_password_pool = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+
+def _run_password_hash(fn, *args):
+    """Menjalankan fungsi hash password di thread pool terbatas dan menunggu hasilnya."""
+    with metrics.span("auth.password_hash"):
+        return _password_pool.submit(fn, *args).result()
+
 # --- FUNGSI LOGIN YANG DIPERBAIKI ---
+@metrics.timed("firestore.login_user")
 def login_user(db, username, password):
     """
     Memverifikasi kredensial pengguna dengan Firestore.
     Menggunakan username sebagai ID Dokumen dan memverifikasi hash dengan salt.
+    Hash lama (cost lebih rendah/algoritma lain) di-upgrade otomatis saat login berhasil.
     """
     if db is None:
         return False, "Koneksi database gagal."
@@ -77,34 +101,30 @@ def login_user(db, username, password):
             return False, "Username tidak ditemukan."
         
         user_data = user_doc.to_dict()
-        stored_hash_hex = user_data.get('password_hash')
-        salt_hex = user_data.get('salt')
         
-        if not stored_hash_hex or not salt_hex:
+        if not user_data.get('password_hash') or not user_data.get('salt'):
             return False, "Data pengguna korup (hash/salt tidak ada)."
         
-        salt = bytes.fromhex(salt_hex)
-        
-        check_hash = hashlib.pbkdf2_hmac(
-            'sha512',
-            password.encode('utf-8'),
-            salt,
-            100000  # Iterasi harus SAMA dengan saat registrasi
-        )
-        
-        stored_hash = bytes.fromhex(stored_hash_hex)
-        
-        # Ganti nama 'compare_digest' (dari 'timing_safe_compare')
-        if hmac.compare_digest(check_hash, stored_hash):
-            return True, "Login berhasil!"
-        else:
+        if not _run_password_hash(crypto_utils.verify_password, password, user_data):
             return False, "Password salah."
+
+        # Upgrade hash secara transparan ke parameter saat ini
+        if crypto_utils.password_needs_rehash(user_data, PASSWORD_HASH_ITERATIONS):
+            try:
+                new_hash = _run_password_hash(crypto_utils.hash_password, password, PASSWORD_HASH_ITERATIONS)
+                user_doc_ref.update(new_hash)
+            except Exception as e:
+                # Login tetap berhasil; upgrade dicoba lagi pada login berikutnya
+                LOG.warning("Gagal upgrade hash password '%s': %s", username, e)
+
+        return True, "Login berhasil!"
             
     except Exception as e:
         st.error(f"Terjadi error: {e}")
         return False, "Terjadi error saat login."
 
 # --- FUNGSI REGISTRASI (Sudah Benar) ---
+@metrics.timed("firestore.register_user")
 def register_user(db, username, name, password):
     """Mendaftarkan pengguna baru menggunakan username sebagai ID Dokumen."""
     if db is None:
@@ -112,69 +132,564 @@ def register_user(db, username, name, password):
         
     users_ref = db.collection('dropboxaccount')
     
-    if users_ref.document(username).get().exists:
-        return False, "Username sudah digunakan."
-    
-    salt = os.urandom(16)
-    hashed_password = hashlib.pbkdf2_hmac(
-        'sha512',
-        password.encode('utf-8'),
-        salt,
-        100000
-    )
-    
     user_data = {
         'name': name,
-        'password_hash': hashed_password.hex(),
-        'salt': salt.hex()
+        **_run_password_hash(crypto_utils.hash_password, password, PASSWORD_HASH_ITERATIONS),
+        'file_count': 0,
+        'total_plaintext_bytes': 0,
+        'total_ciphertext_bytes': 0
     }
     
-    users_ref.document(username).set(user_data)
+    # create() gagal jika dokumen sudah ada: satu round trip & bebas race
+    # (dibanding get().exists lalu set() yang bisa saling menimpa)
+    try:
+        users_ref.document(username).create(user_data)
+    except AlreadyExists:
+        return False, "Username sudah digunakan."
     return True, "Registrasi berhasil!"
 
-# --- Fungsi File (Semua sudah benar) ---
+# --- Cache Metadata File (per pengguna) ---
+# Setiap interaksi widget me-rerun script dan memanggil get_user_files.
+# Cache ini disimpan di level proses (dibagi antar sesi/tab) dan di-update
+# secara write-through oleh log_file_to_firestore & delete_file_from_firestore,
+# sehingga browsing normal tidak membaca Firestore lagi setelah load pertama.
 
-def log_file_to_firestore(db, username, original_filename, gdrive_file_id, crypto_type):
-    """Mencatat metadata file ke subkoleksi 'files' milik pengguna."""
-    try:
-        files_ref = db.collection('dropboxaccount').document(username).collection('files')
-        
-        file_data = {
-            'owner': username, 
-            'original_filename': original_filename,
-            'gdrive_file_id': gdrive_file_id,
-            'encryption_type': crypto_type,
-            'upload_timestamp': firestore.SERVER_TIMESTAMP
+FILES_CACHE_TTL = get_int_setting("FILES_CACHE_TTL", 300)  # detik
+# Listener on_snapshot yang tidak dipakai selama FILES_LISTENER_IDLE_TTL detik
+# dilepas (sesi Streamlit bisa berakhir tanpa logout), dan jumlahnya dibatasi.
+FILES_LISTENER_IDLE_TTL = get_int_setting("FILES_LISTENER_IDLE_TTL", 1800)  # detik
+FILES_LISTENER_MAX = get_int_setting("FILES_LISTENER_MAX", 100)
+
+_files_cache = {}      # username -> {"files": [...], "loaded_at": float, "live": bool}
+_files_cache_lock = threading.Lock()
+_files_listeners = {}  # username -> {"watch": Watch (listener on_snapshot), "last_used": float}
+_stats_cache = {}      # username -> {"stats": {...}, "loaded_at": float}; agregat di samping daftar file
+
+
+def _copy_files(files):
+    """Salinan dangkal per dokumen agar pemanggil tidak mengubah isi cache."""
+    return [dict(f) for f in files]
+
+def _cache_get_files(username):
+    """Mengembalikan salinan daftar file dari cache, atau None jika tidak ada/kedaluwarsa."""
+    with _files_cache_lock:
+        entry = _files_cache.get(username)
+        if entry is None:
+            return None
+        # Cache yang dijaga listener on_snapshot selalu segar
+        if not entry["live"] and time.monotonic() - entry["loaded_at"] > FILES_CACHE_TTL:
+            del _files_cache[username]
+            return None
+        return _copy_files(entry["files"])
+
+def _cache_put_files(username, files, live=False):
+    with _files_cache_lock:
+        _files_cache[username] = {
+            "files": _copy_files(files),
+            "loaded_at": time.monotonic(),
+            "live": live or username in _files_listeners,
         }
-        files_ref.add(file_data)
-        return True
+
+def _cache_add_file(username, file_data):
+    """Write-through: sisipkan metadata baru di urutan teratas (terbaru dulu)."""
+    with _files_cache_lock:
+        entry = _files_cache.get(username)
+        if entry is not None:
+            entry["files"].insert(0, dict(file_data))
+
+def _cache_remove_file(username, doc_id):
+    """Write-through: buang metadata yang dihapus dari cache."""
+    with _files_cache_lock:
+        entry = _files_cache.get(username)
+        if entry is not None:
+            entry["files"] = [f for f in entry["files"] if f.get("doc_id") != doc_id]
+
+def _cache_get_stats(username):
+    """Salinan agregat dari cache, atau None; masa berlakunya sama dengan daftar file."""
+    with _files_cache_lock:
+        entry = _stats_cache.get(username)
+        if entry is None:
+            return None
+        if username not in _files_listeners and time.monotonic() - entry["loaded_at"] > FILES_CACHE_TTL:
+            del _stats_cache[username]
+            return None
+        return dict(entry["stats"])
+
+def _cache_put_stats(username, stats):
+    with _files_cache_lock:
+        _stats_cache[username] = {"stats": dict(stats), "loaded_at": time.monotonic()}
+
+def _cache_adjust_stats(username, file_delta, plaintext_delta, ciphertext_delta):
+    """Write-through: terapkan perubahan yang sama dengan Increment di Firestore."""
+    with _files_cache_lock:
+        entry = _stats_cache.get(username)
+        if entry is not None:
+            entry["stats"]['file_count'] += file_delta
+            entry["stats"]['total_plaintext_bytes'] += plaintext_delta
+            entry["stats"]['total_ciphertext_bytes'] += ciphertext_delta
+
+def _stats_from_files(files):
+    stats = {field: 0 for field in STORAGE_STAT_FIELDS}
+    for file_data in files:
+        stats['file_count'] += 1
+        stats['total_plaintext_bytes'] += file_data.get('plaintext_size') or 0
+        stats['total_ciphertext_bytes'] += file_data.get('ciphertext_size') or 0
+    return stats
+
+def invalidate_user_files_cache(username=None):
+    """Menghapus cache metadata (dan agregat) satu pengguna, atau semua jika username None."""
+    with _files_cache_lock:
+        if username is None:
+            _files_cache.clear()
+            _stats_cache.clear()
+        else:
+            _files_cache.pop(username, None)
+            _stats_cache.pop(username, None)
+
+def start_user_files_listener(db, username):
+    """
+    (Opsional) Memasang listener Firestore on_snapshot untuk subkoleksi 'files'
+    pengguna, agar cache tetap segar walau file diubah dari tab/sesi lain.
+    Aman dipanggil berulang kali; listener hanya dipasang sekali per pengguna,
+    dan setiap panggilan menandainya masih dipakai (lihat FILES_LISTENER_IDLE_TTL).
+    """
+    if db is None:
+        return False
+
+    _evict_idle_listeners()
+    with _files_cache_lock:
+        if username in _files_listeners:
+            _files_listeners[username]["last_used"] = time.monotonic()
+            return True
+
+    files_ref = db.collection('dropboxaccount').document(username).collection('files')
+    query = files_ref.order_by('upload_timestamp', direction=firestore.Query.DESCENDING)
+
+    def _on_snapshot(docs, changes, read_time):
+        file_list = []
+        for doc in docs:
+            file_data = doc.to_dict()
+            file_data['doc_id'] = doc.id
+            file_list.append(file_data)
+        _cache_put_files(username, file_list, live=True)
+        # Listener melihat seluruh subkoleksi, jadi agregat ikut segar tanpa baca dokumen pengguna
+        _cache_put_stats(username, _stats_from_files(file_list))
+
+    try:
+        watch = query.on_snapshot(_on_snapshot)
     except Exception as e:
-        st.error(f"Gagal mencatat file ke Firestore: {e}")
+        st.warning(f"Listener Firestore tidak dapat dipasang: {e}")
+        return False
+
+    with _files_cache_lock:
+        existing = _files_listeners.get(username)
+        if existing is None:
+            _files_listeners[username] = {"watch": watch, "last_used": time.monotonic()}
+    if existing is not None:
+        watch.unsubscribe()  # Sesi lain sudah memasang listener lebih dulu
+    return True
+
+def stop_user_files_listener(username):
+    """Melepas listener on_snapshot milik pengguna (jika ada), mis. saat logout."""
+    with _files_cache_lock:
+        listener = _files_listeners.pop(username, None)
+        entry = _files_cache.get(username)
+        if entry is not None:
+            entry["live"] = False
+            entry["loaded_at"] = time.monotonic()
+        if username in _stats_cache:
+            _stats_cache[username]["loaded_at"] = time.monotonic()
+    if listener is not None:
+        listener["watch"].unsubscribe()
+
+def _evict_idle_listeners():
+    """Melepas listener yang idle lebih dari FILES_LISTENER_IDLE_TTL, lalu yang paling lama idle jika melebihi FILES_LISTENER_MAX."""
+    now = time.monotonic()
+    with _files_cache_lock:
+        by_last_used = sorted(_files_listeners, key=lambda u: _files_listeners[u]["last_used"])
+        idle = [u for u in by_last_used if now - _files_listeners[u]["last_used"] > FILES_LISTENER_IDLE_TTL]
+        active = [u for u in by_last_used if u not in idle]
+        # Sisakan satu slot untuk listener yang akan dipasang
+        overflow = active[:max(0, len(active) - FILES_LISTENER_MAX + 1)]
+    for username in idle + overflow:
+        stop_user_files_listener(username)
+
+# --- Fungsi File ---
+
+def log_file_to_firestore(db, username, original_filename, gdrive_file_id, crypto_type,
+                          plaintext_size=0, ciphertext_size=0, integrity=None):
+    """
+    Mencatat metadata file ke subkoleksi 'files' milik pengguna.
+    Agregat di dokumen pengguna (jumlah file & total bytes) ikut di-update
+    secara atomik dalam satu batch menggunakan Increment.
+    """
+    results = log_files_to_firestore(db, username, [{
+        'original_filename': original_filename,
+        'gdrive_file_id': gdrive_file_id,
+        'encryption_type': crypto_type,
+        'plaintext_size': plaintext_size,
+        'ciphertext_size': ciphertext_size,
+        'integrity': integrity,
+    }])
+    if not results[0]['ok']:
+        st.error(f"Gagal mencatat file ke Firestore: {results[0]['error']}")
         return False
+    return True
+
+def get_user_files(db, username, use_cache=True):
+    """
+    Mengambil semua metadata file untuk pengguna tertentu dari Firestore.
+    Hasil disimpan di cache selama FILES_CACHE_TTL detik; set use_cache=False
+    untuk memaksa membaca ulang dari Firestore.
+    """
+    if use_cache:
+        cached = _cache_get_files(username)
+        if cached is not None:
+            return cached
 
-def get_user_files(db, username):
-    """Mengambil semua metadata file untuk pengguna tertentu dari Firestore."""
     files_ref = db.collection('dropboxaccount').document(username).collection('files')
     
-    query = files_ref.order_by('upload_timestamp', direction=firestore.Query.DESCENDING).stream()
-    
+    with metrics.span("firestore.get_user_files"):
+        query = files_ref.order_by('upload_timestamp', direction=firestore.Query.DESCENDING).stream()
+        
+        file_list = []
+        for doc in query:
+            file_data = doc.to_dict()
+            file_data['doc_id'] = doc.id
+            file_list.append(file_data)
+
+    _cache_put_files(username, file_list)
+    return file_list
+
+@metrics.timed("firestore.query_user_files")
+def query_user_files(db, username, encryption_type=None, start_date=None, end_date=None,
+                     name_prefix=None, limit=None):
+    """
+    Memfilter metadata file di sisi server (Firestore), bukan di Python.
+
+    Args:
+        encryption_type: tag enkripsi persis ('SuperEncrypt', 'ChaCha20', 'Steganography').
+        start_date: datetime awal (inklusif) untuk upload_timestamp.
+        end_date: datetime akhir (eksklusif) untuk upload_timestamp.
+        name_prefix: awalan nama file (tidak peka huruf besar/kecil).
+        limit: jumlah maksimum hasil.
+
+    Hasil diurutkan dari yang terbaru, kecuali jika name_prefix dipakai:
+    maka diurutkan berdasarkan nama lalu waktu upload. Kombinasi filter ini
+    membutuhkan composite index di firestore.indexes.json.
+    """
+    files_ref = db.collection('dropboxaccount').document(username).collection('files')
+    query = files_ref
+
+    if encryption_type:
+        query = query.where(filter=firestore.FieldFilter('encryption_type', '==', encryption_type))
+    if start_date is not None:
+        query = query.where(filter=firestore.FieldFilter('upload_timestamp', '>=', start_date))
+    if end_date is not None:
+        query = query.where(filter=firestore.FieldFilter('upload_timestamp', '<', end_date))
+
+    if name_prefix:
+        prefix = name_prefix.lower()
+        query = query.where(filter=firestore.FieldFilter('original_filename_lower', '>=', prefix))
+        query = query.where(filter=firestore.FieldFilter('original_filename_lower', '<', prefix + '\uf8ff'))
+        query = query.order_by('original_filename_lower')
+
+    query = query.order_by('upload_timestamp', direction=firestore.Query.DESCENDING)
+    if limit:
+        query = query.limit(limit)
+
     file_list = []
-    for doc in query:
+    for doc in query.stream():
         file_data = doc.to_dict()
         file_data['doc_id'] = doc.id
         file_list.append(file_data)
-        
     return file_list
 
+def backfill_normalized_filenames(db, username):
+    """
+    Menambahkan field 'original_filename_lower' pada dokumen lama yang belum
+    memilikinya, agar ikut muncul di pencarian prefix. Mengembalikan jumlah
+    dokumen yang di-update.
+    """
+    files_ref = db.collection('dropboxaccount').document(username).collection('files')
+    batch = db.batch()
+    pending = 0
+    updated = 0
+    for doc in files_ref.stream():
+        file_data = doc.to_dict()
+        if 'original_filename_lower' in file_data:
+            continue
+        batch.update(doc.reference, {
+            'original_filename_lower': (file_data.get('original_filename') or '').lower()
+        })
+        pending += 1
+        updated += 1
+        if pending == BATCH_MAX_WRITES:  # Batas operasi per batch Firestore
+            batch.commit()
+            batch = db.batch()
+            pending = 0
+    if pending:
+        batch.commit()
+
+    if updated:
+        invalidate_user_files_cache(username)
+    return updated
+
 def delete_file_from_firestore(db, username, doc_id):
     """Menghapus catatan metadata file dari Firestore berdasarkan ID Dokumen."""
+    results = delete_files_from_firestore(db, username, [doc_id])
+    if not results[0]['ok']:
+        st.error(f"Error menghapus dari Firestore: {results[0]['error']}")
+        return False
+    return True
+
+# --- Operasi Batch (WriteBatch / Transaction) ---
+# Firestore membatasi 500 operasi tulis per batch/transaksi. Satu slot
+# dipakai untuk update agregat di dokumen pengguna, sisanya untuk file.
+
+BATCH_MAX_WRITES = 500
+_FILES_PER_BATCH = BATCH_MAX_WRITES - 1
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield start, items[start:start + size]
+
+def _new_file_data(username, entry):
+    """Menyusun dokumen metadata file dari satu entri input."""
+    original_filename = entry['original_filename']
+    return {
+        'owner': username,
+        'original_filename': original_filename,
+        'original_filename_lower': original_filename.lower(),  # Untuk pencarian prefix
+        'gdrive_file_id': entry['gdrive_file_id'],
+        'encryption_type': entry['encryption_type'],
+        'plaintext_size': entry.get('plaintext_size') or 0,
+        'ciphertext_size': entry.get('ciphertext_size') or 0,
+        'upload_timestamp': firestore.SERVER_TIMESTAMP,
+        # Manifest hash per chunk ciphertext (lihat crypto_utils.compute_chunk_manifest); None untuk data lama
+        'integrity': entry.get('integrity')
+    }
+
+@metrics.timed("firestore.log_files")
+def log_files_to_firestore(db, username, entries):
+    """
+    Mencatat banyak metadata file sekaligus dalam WriteBatch (maks. 500 operasi).
+
+    Setiap entri berisi 'original_filename', 'gdrive_file_id', 'encryption_type'
+    dan opsional 'plaintext_size'/'ciphertext_size'/'integrity'. Mengembalikan satu hasil per
+    entri, sesuai urutan input: {'index', 'ok', 'doc_id', 'error'}.
+    """
+    results = []
+    if db is None:
+        return [{'index': i, 'ok': False, 'doc_id': None, 'error': "Koneksi database gagal."}
+                for i in range(len(entries))]
+
+    user_ref = db.collection('dropboxaccount').document(username)
+    files_ref = user_ref.collection('files')
+
     try:
-        doc_ref = db.collection('dropboxaccount').document(username).collection('files').document(doc_id)
-        doc_ref.delete()
-        return True
+        # Increment pada field yang belum ada dimulai dari 0, jadi agregat pengguna lama diisi dulu
+        _ensure_storage_stats(db, username)
     except Exception as e:
-        st.error(f"Error menghapus dari Firestore: {e}")
-        return False
+        return [{'index': i, 'ok': False, 'doc_id': None, 'error': str(e)} for i in range(len(entries))]
+
+    for start, chunk in _chunks(list(entries), _FILES_PER_BATCH):
+        try:
+            batch = db.batch()
+            written = []
+            for entry in chunk:
+                doc_ref = files_ref.document()  # ID otomatis
+                file_data = _new_file_data(username, entry)
+                batch.set(doc_ref, file_data)
+                written.append((doc_ref.id, file_data))
+
+            batch.set(user_ref, _storage_increments(
+                len(chunk),
+                sum(f['plaintext_size'] for _, f in written),
+                sum(f['ciphertext_size'] for _, f in written),
+            ), merge=True)
+            batch.commit()
+        except Exception as e:
+            results.extend({'index': start + i, 'ok': False, 'doc_id': None, 'error': str(e)}
+                           for i in range(len(chunk)))
+            continue
+
+        # Write-through ke cache (timestamp lokal menggantikan sentinel server)
+        _cache_adjust_stats(username, len(written),
+                            sum(f['plaintext_size'] for _, f in written),
+                            sum(f['ciphertext_size'] for _, f in written))
+        now = datetime.now(timezone.utc)
+        for i, (doc_id, file_data) in enumerate(written):
+            cached = dict(file_data)
+            cached['upload_timestamp'] = now
+            cached['doc_id'] = doc_id
+            _cache_add_file(username, cached)
+            results.append({'index': start + i, 'ok': True, 'doc_id': doc_id, 'error': None})
+
+    return results
+
+@firestore.transactional
+def _delete_files_transaction(transaction, user_ref, doc_refs):
+    """
+    Membaca ukuran file, menghapus dokumennya, lalu mengurangi agregat pengguna.
+    Mengembalikan ({doc_id: terhapus?}, (jumlah, plaintext, ciphertext) yang dikurangi,
+    atau None jika agregat belum pernah diisi dan tidak disentuh).
+    """
+    snapshots = {snap.reference.path: snap for snap in transaction.get_all([user_ref] + doc_refs)}
+    user_snapshot = snapshots.get(user_ref.path)
+    user_data = user_snapshot.to_dict() if user_snapshot is not None and user_snapshot.exists else {}
+
+    deleted = {}
+    plaintext_total = 0
+    ciphertext_total = 0
+    for doc_ref in doc_refs:
+        snapshot = snapshots.get(doc_ref.path)
+        if snapshot is None or not snapshot.exists:
+            deleted[doc_ref.id] = False  # Sudah terhapus; jangan kurangi agregat dua kali
+            continue
+        file_data = snapshot.to_dict()
+        transaction.delete(doc_ref)
+        plaintext_total += file_data.get('plaintext_size') or 0
+        ciphertext_total += file_data.get('ciphertext_size') or 0
+        deleted[doc_ref.id] = True
+
+    removed = sum(deleted.values())
+    # Agregat yang belum pernah diisi (pengguna lama) jangan dikurangi sampai negatif;
+    # get_user_storage_stats akan menghitungnya ulang dari file yang tersisa
+    if not all(field in user_data for field in STORAGE_STAT_FIELDS):
+        return deleted, None
+    if removed:
+        transaction.set(user_ref, _storage_increments(-removed, -plaintext_total, -ciphertext_total), merge=True)
+    return deleted, (-removed, -plaintext_total, -ciphertext_total)
+
+@metrics.timed("firestore.delete_files")
+def delete_files_from_firestore(db, username, doc_ids):
+    """
+    Menghapus banyak metadata file sekaligus, dalam transaksi per 499 dokumen.
+    Mengembalikan satu hasil per doc_id: {'doc_id', 'ok', 'deleted', 'error'}
+    ('deleted' False berarti dokumen memang sudah tidak ada).
+    """
+    results = []
+    if db is None:
+        return [{'doc_id': d, 'ok': False, 'deleted': False, 'error': "Koneksi database gagal."}
+                for d in doc_ids]
+
+    user_ref = db.collection('dropboxaccount').document(username)
+    files_ref = user_ref.collection('files')
+
+    # Hilangkan duplikat agar agregat tidak dikurangi dua kali
+    unique_ids = list(dict.fromkeys(doc_ids))
+    for _, chunk in _chunks(unique_ids, _FILES_PER_BATCH):
+        doc_refs = [files_ref.document(doc_id) for doc_id in chunk]
+        try:
+            deleted, stats_delta = _delete_files_transaction(db.transaction(), user_ref, doc_refs)
+        except Exception as e:
+            results.extend({'doc_id': d, 'ok': False, 'deleted': False, 'error': str(e)} for d in chunk)
+            continue
+
+        if stats_delta is not None:
+            _cache_adjust_stats(username, *stats_delta)
+        else:
+            with _files_cache_lock:
+                _stats_cache.pop(username, None)
+
+        for doc_id in chunk:
+            _cache_remove_file(username, doc_id)
+            results.append({'doc_id': doc_id, 'ok': True, 'deleted': deleted.get(doc_id, False), 'error': None})
+
+    return results
+
+# --- Agregat Penyimpanan per Pengguna ---
+# Disimpan langsung di dokumen pengguna agar jumlah file dan kuota
+# cukup dibaca dengan SATU dokumen, tanpa men-stream seluruh subkoleksi.
+
+STORAGE_STAT_FIELDS = ('file_count', 'total_plaintext_bytes', 'total_ciphertext_bytes')
+
+_stats_ready = set()       # Pengguna yang agregatnya sudah pasti ada (per proses)
+_stats_backfilled = set()  # Pengguna yang sudah pernah di-backfill di proses ini
+_stats_ready_lock = threading.Lock()
+
+def _mark_stats_ready(username):
+    with _stats_ready_lock:
+        _stats_ready.add(username)
+
+def _ensure_storage_stats(db, username):
+    """Mengisi agregat pengguna lama (dibuat sebelum agregat ada) sebelum Increment pertama."""
+    with _stats_ready_lock:
+        if username in _stats_ready:
+            return
+    get_user_storage_stats(db, username, use_cache=False)
+
+def _storage_increments(file_delta, plaintext_delta, ciphertext_delta):
+    return {
+        'file_count': firestore.Increment(file_delta),
+        'total_plaintext_bytes': firestore.Increment(plaintext_delta),
+        'total_ciphertext_bytes': firestore.Increment(ciphertext_delta),
+    }
+
+@metrics.timed("firestore.get_user_storage_stats")
+def get_user_storage_stats(db, username, use_cache=True):
+    """
+    Mengambil agregat penyimpanan pengguna. Disimpan di cache bersama daftar
+    file (diperbarui write-through saat upload/hapus), jadi dokumen pengguna
+    hanya dibaca saat cache kosong/kedaluwarsa atau use_cache=False.
+    """
+    stats = {field: 0 for field in STORAGE_STAT_FIELDS}
+    if db is None:
+        return stats
+    if use_cache:
+        cached = _cache_get_stats(username)
+        if cached is not None:
+            return cached
+
+    user_doc = db.collection('dropboxaccount').document(username).get()
+    if user_doc.exists:
+        user_data = user_doc.to_dict()
+        if not all(field in user_data for field in STORAGE_STAT_FIELDS):
+            with _stats_ready_lock:
+                first_attempt = username not in _stats_backfilled
+                _stats_backfilled.add(username)
+            # Backfill paling banyak sekali per pengguna per proses; setelah itu
+            # field yang hilang dibaca sebagai 0 tanpa men-stream subkoleksi lagi
+            if first_attempt:
+                return _backfill_storage_stats(db, username, force=False)
+        for field in STORAGE_STAT_FIELDS:
+            stats[field] = user_data.get(field) or 0
+        if all(field in user_data for field in STORAGE_STAT_FIELDS):
+            _mark_stats_ready(username)
+    _cache_put_stats(username, stats)
+    return stats
+
+@firestore.transactional
+def _recompute_storage_stats_transaction(transaction, user_ref, force):
+    """
+    Membaca dokumen pengguna di dalam transaksi: upload/hapus yang meng-Increment
+    agregat di antara stream dan penulisan membuat transaksi diulang, bukan
+    ditimpa. Tanpa `force`, agregat yang ternyata sudah diisi tidak disentuh.
+    """
+    user_snapshot = next(iter(transaction.get_all([user_ref])), None)
+    user_data = user_snapshot.to_dict() if user_snapshot is not None and user_snapshot.exists else {}
+    if not force and all(field in user_data for field in STORAGE_STAT_FIELDS):
+        return {field: user_data.get(field) or 0 for field in STORAGE_STAT_FIELDS}
+
+    stats = _stats_from_files(doc.to_dict() for doc in transaction.get(user_ref.collection('files')))
+    transaction.set(user_ref, stats, merge=True)
+    return stats
+
+def _backfill_storage_stats(db, username, force):
+    user_ref = db.collection('dropboxaccount').document(username)
+    stats = _recompute_storage_stats_transaction(db.transaction(), user_ref, force)
+    _mark_stats_ready(username)
+    _cache_put_stats(username, stats)
+    return stats
+
+def recompute_user_storage_stats(db, username):
+    """
+    Menghitung ulang agregat dari subkoleksi 'files' (untuk data lama yang
+    dibuat sebelum agregat ada, atau perbaikan manual) dalam satu transaksi.
+    File tanpa ukuran dihitung 0 bytes.
+    """
+    return _backfill_storage_stats(db, username, force=True)
 
 # --- PERBAIKAN 3: Hapus fungsi 'hash_password' dan 'verify_password' ---
 # (Fungsi-fungsi tidak aman yang ada di bawah sini telah dihapus)
\ No newline at end of file
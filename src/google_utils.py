@@ -1,14 +1,17 @@
 # src/google_utils.py
 import streamlit as st
 from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseUpload
+import datetime
+import functools
 import io
 import os
 import json
+import logging
+import threading
 from dotenv import load_dotenv
+from src import crypto_utils
+from src import metrics
 
 # Load .env
 load_dotenv()
@@ -19,6 +22,24 @@ SCOPES = ['https://www.googleapis.com/auth/drive']
 # ID Folder GDrive Anda (dari langkah sebelumnya)
 GDRIVE_FOLDER_ID = "1_zseYdyiQFYh3PjkINm8-edDx1DwOmCh" # <-- GANTI DENGAN ID FOLDER ANDA
 
+# Discovery document Drive v3 yang dibundel di repo, agar service dibangun
+# tanpa fetch/lookup discovery. googleapiclient sendiri baru diimpor saat
+# service dibuat (bukan saat modul ini diimpor) supaya cold start lebih cepat.
+DRIVE_DISCOVERY_PATH = os.path.join(os.path.dirname(__file__), "discovery", "drive.v3.json")
+
+# Token akses di-refresh di background sekian detik SEBELUM kedaluwarsa
+TOKEN_REFRESH_MARGIN = 300
+TOKEN_REFRESH_RETRY = 30  # jeda (detik) sebelum mencoba lagi jika refresh gagal
+
+# Berapa kali satu chunk yang korup diunduh ulang sebelum unduhan dianggap gagal
+INTEGRITY_MAX_REFETCH = 3
+
+# Unduhan terverifikasi dibaca dari satu stream HTTP per blok sebesar ini
+MEDIA_STREAM_BLOCK = 1024 * 1024
+MEDIA_STREAM_TIMEOUT = 60  # detik tanpa data sebelum stream dianggap putus
+
+LOG = logging.getLogger(__name__)
+
 def get_gdrive_credentials():
     """Memuat kredensial dari st.secrets atau environment variable."""
     creds = None
@@ -73,47 +94,204 @@ def get_gdrive_credentials():
     
     return creds
 
+# --- Manajer Kredensial (refresh token proaktif) ---
+# Service GDrive disimpan lama di cache, jadi token yang kedaluwarsa setelahnya
+# akan membuat request gagal atau membayar refresh di tengah request. Manajer
+# ini me-refresh token di background sebelum kedaluwarsa. Semua service
+# (satu per thread, karena httplib2 tidak thread-safe) memakai objek
+# Credentials yang SAMA, sehingga token baru langsung terpakai oleh semuanya.
+
+_refresh_lock = threading.Lock()
+
+def refresh_credentials(creds, force=False, margin=TOKEN_REFRESH_MARGIN):
+    """Me-refresh token (thread-safe). Tanpa force, hanya jika token sudah/hampir kedaluwarsa."""
+    with _refresh_lock:
+        if not force and creds.valid and _seconds_until_expiry(creds) > margin:
+            return False
+        with metrics.span("gdrive.token_refresh"):
+            creds.refresh(Request())
+        return True
+
+def _seconds_until_expiry(creds):
+    if creds.expiry is None:
+        return float("inf")
+    # google-auth menyimpan expiry sebagai datetime UTC tanpa tzinfo
+    now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    return (creds.expiry - now).total_seconds()
+
+class DriveCredentialManager:
+    """Memegang kredensial bersama, timer refresh background, dan pool service per thread."""
+
+    def __init__(self, creds, refresh_margin=TOKEN_REFRESH_MARGIN):
+        self.credentials = creds
+        self.refresh_margin = refresh_margin
+        self._local = threading.local()
+        self._timer = None
+        self._timer_lock = threading.Lock()
+
+    def start(self):
+        """Refresh sekarang jika perlu, lalu jadwalkan refresh berikutnya."""
+        self._refresh_and_reschedule()
+        return self
+
+    def stop(self):
+        with self._timer_lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def _schedule(self, delay):
+        with self._timer_lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(max(delay, 1), self._refresh_and_reschedule)
+            self._timer.daemon = True
+            self._timer.name = "gdrive-token-refresh"
+            self._timer.start()
+
+    def _refresh_and_reschedule(self):
+        try:
+            refresh_credentials(self.credentials, margin=self.refresh_margin)
+        except Exception:
+            LOG.exception("Refresh token GDrive di background gagal; dicoba lagi")
+            self._schedule(TOKEN_REFRESH_RETRY)
+            return
+
+        if self.credentials.expiry is None or not self.credentials.refresh_token:
+            return  # Token tanpa expiry / tanpa refresh_token: tidak ada yang dijadwalkan
+        self._schedule(_seconds_until_expiry(self.credentials) - self.refresh_margin)
+
+    def get_service(self):
+        """Service GDrive milik thread pemanggil (dibuat sekali per thread)."""
+        service = getattr(self._local, "service", None)
+        if service is None:
+            service = build_drive_service(self.credentials)
+            self._local.service = service
+        return service
+
 @st.cache_resource
-def init_gdrive_service():
-    """Menginisialisasi dan mengembalikan service Google Drive."""
+def get_credential_manager():
+    """Satu manajer kredensial per proses (dibagi semua sesi)."""
     creds = get_gdrive_credentials()
     if creds is None:
         return None
-    service = build('drive', 'v3', credentials=creds)
-    return service
+    return DriveCredentialManager(creds).start()
+
+def init_gdrive_service():
+    """Menginisialisasi dan mengembalikan service Google Drive."""
+    manager = get_credential_manager()
+    if manager is None:
+        return None
+    return manager.get_service()
+
+def execute_with_reauth(make_request):
+    """
+    Menjalankan request GDrive; jika server membalas 401 (token ditolak),
+    token di-refresh paksa lalu request dibuat ulang dan dicoba SEKALI lagi.
+
+    Args:
+        make_request: fungsi tanpa argumen yang membuat HttpRequest baru.
+    """
+    from googleapiclient.errors import HttpError
+
+    request = make_request()
+    try:
+        return request.execute()
+    except HttpError as e:
+        creds = getattr(request.http, "credentials", None)
+        if e.resp.status != 401 or creds is None:
+            raise
+        refresh_credentials(creds, force=True)
+        return make_request().execute()
+
+@functools.lru_cache(maxsize=1)
+def _load_drive_discovery_document():
+    """Membaca discovery document Drive v3 sekali per proses."""
+    with open(DRIVE_DISCOVERY_PATH, encoding="utf-8") as f:
+        return f.read()
+
+def build_drive_service(creds):
+    """Membangun service Drive v3 dari discovery document statis yang dibundel."""
+    from googleapiclient.discovery import build_from_document
+    return build_from_document(_load_drive_discovery_document(), credentials=creds)
 
 # --- Fungsi Upload, Download, Delete (TIDAK BERUBAH) ---
 
 def upload_to_gdrive(service, file_bytes, filename_in_drive):
     """Mengunggah file (dalam bytes) ke folder GDrive Anda."""
+    from googleapiclient.http import MediaIoBaseUpload
+
     try:
         file_metadata = {
             'name': filename_in_drive,
             'parents': [GDRIVE_FOLDER_ID] 
         }
-        fh = io.BytesIO(file_bytes)
-        media = MediaIoBaseUpload(fh, mimetype='application/octet-stream', resumable=True)
+
+        def make_request():
+            # Stream baru setiap percobaan, agar retry setelah 401 mengirim dari awal
+            media = MediaIoBaseUpload(io.BytesIO(file_bytes), mimetype='application/octet-stream', resumable=True)
+            return service.files().create(
+                body=file_metadata,
+                media_body=media,
+                fields='id'
+            )
         
-        file = service.files().create(
-            body=file_metadata,
-            media_body=media,
-            fields='id'
-        ).execute()
+        with metrics.span("gdrive.upload", nbytes=len(file_bytes)):
+            file = execute_with_reauth(make_request)
         
         return file.get('id')
     except Exception as e:
         st.error(f"Error saat mengupload ke GDrive: {e}")
         return None
 
-def download_from_gdrive(service, gdrive_file_id):
-    """Mengunduh file dari GDrive berdasarkan ID-nya. Mengembalikan bytes."""
+def upload_file_to_gdrive(service, path, filename_in_drive, chunk_size=8 * 1024 * 1024):
+    """Seperti upload_to_gdrive, tetapi dari file di disk (upload resumable per chunk, tanpa memuat seluruh file)."""
+    from googleapiclient.http import MediaFileUpload
+
+    try:
+        file_metadata = {
+            'name': filename_in_drive,
+            'parents': [GDRIVE_FOLDER_ID]
+        }
+
+        def make_request():
+            media = MediaFileUpload(path, mimetype='application/octet-stream', chunksize=chunk_size, resumable=True)
+            return service.files().create(
+                body=file_metadata,
+                media_body=media,
+                fields='id'
+            )
+
+        with metrics.span("gdrive.upload", nbytes=os.path.getsize(path)):
+            file = execute_with_reauth(make_request)
+
+        return file.get('id')
+    except Exception as e:
+        st.error(f"Error saat mengupload ke GDrive: {e}")
+        return None
+
+def download_from_gdrive(service, gdrive_file_id, integrity=None):
+    """
+    Mengunduh file dari GDrive berdasarkan ID-nya. Mengembalikan bytes.
+    Jika manifest `integrity` diberikan, file diunduh per chunk dan setiap chunk diverifikasi.
+    """
+    if integrity:
+        try:
+            return b"".join(iter_verified_chunks(service, gdrive_file_id, integrity))
+        except Exception as e:
+            st.error(f"Error saat mengunduh dari GDrive: {e}")
+            return None
+
     try:
         # 1. Buat permintaan (request) untuk mendapatkan media
-        request = service.files().get_media(fileId=gdrive_file_id)
+        def make_request():
+            return service.files().get_media(fileId=gdrive_file_id)
         
         # 2. Eksekusi permintaan. Ini akan MENGEMBALIKAN bytes.
         #    Hapus 'fh' dari sini.
-        downloaded_bytes = request.execute()
+        with metrics.span("gdrive.download") as download_span:
+            downloaded_bytes = execute_with_reauth(make_request)
+            download_span.add_bytes(len(downloaded_bytes))
         
         # 3. Kembalikan bytes yang sudah diunduh
         return downloaded_bytes
@@ -122,10 +300,133 @@ def download_from_gdrive(service, gdrive_file_id):
         st.error(f"Error saat mengunduh dari GDrive: {e}")
         return None
 
+def _fetch_range(service, gdrive_file_id, start, end=None):
+    """Mengunduh rentang byte [start, end] (inklusif; end=None = sampai akhir file) dengan header HTTP Range."""
+    def make_request():
+        request = service.files().get_media(fileId=gdrive_file_id)
+        request.headers['Range'] = f"bytes={start}-{'' if end is None else end}"
+        return request
+    return execute_with_reauth(make_request)
+
+def _open_media_stream(service, gdrive_file_id, start, block_size=MEDIA_STREAM_BLOCK):
+    """
+    Membuka SATU request media mulai dari byte `start` dan menghasilkan isinya
+    per blok begitu data tiba. httplib2 (transport googleapiclient) selalu
+    membaca seluruh respons ke memori, jadi request dikirim lewat
+    AuthorizedSession (requests, stream=True) dengan kredensial service yang sama.
+    """
+    request = service.files().get_media(fileId=gdrive_file_id)
+    creds = getattr(request.http, "credentials", None)
+    if creds is None:
+        # Service tanpa transport HTTP (mis. benchmarks/fakes.py): satu request biasa
+        data = _fetch_range(service, gdrive_file_id, start)
+        for offset in range(0, len(data), block_size):
+            yield data[offset:offset + block_size]
+        return
+
+    from google.auth.transport.requests import AuthorizedSession
+
+    with AuthorizedSession(creds) as session:
+        # AuthorizedSession me-refresh token dan mengulang request sendiri jika dibalas 401
+        with session.get(request.uri, headers={"Range": f"bytes={start}-"}, stream=True,
+                         timeout=MEDIA_STREAM_TIMEOUT) as response:
+            response.raise_for_status()
+            yield from response.iter_content(block_size)
+
+def _refetch_chunk(service, gdrive_file_id, integrity, index, max_refetch):
+    """Mengunduh ulang satu chunk yang korup lewat request Range; IntegrityError jika tetap korup."""
+    start, end = crypto_utils.chunk_range(integrity, index)
+    for attempt in range(max_refetch):
+        LOG.warning("chunk %d file %s korup, diunduh ulang (percobaan %d)", index, gdrive_file_id, attempt + 1)
+        chunk = _fetch_range(service, gdrive_file_id, start, end)
+        if crypto_utils.verify_chunk(integrity, index, chunk):
+            return chunk
+    raise crypto_utils.IntegrityError(
+        f"Chunk {index + 1}/{len(integrity['chunks'])} tetap korup setelah {max_refetch} kali unduh ulang."
+    )
+
+def iter_verified_chunks(service, gdrive_file_id, integrity, start_index=0, max_refetch=INTEGRITY_MAX_REFETCH):
+    """
+    Menghasilkan chunk ciphertext satu per satu (mulai dari chunk `start_index`),
+    masing-masing sudah cocok dengan manifest integritas. File diunduh dengan
+    satu request yang di-stream dan setiap chunk diverifikasi begitu lengkap;
+    hanya chunk yang korup yang diunduh ulang per rentang (maksimal `max_refetch`
+    kali, lalu IntegrityError). Jika koneksi terputus, stream dibuka lagi dari
+    chunk berikutnya (juga maksimal `max_refetch` kali).
+    """
+    total = len(integrity['chunks'])
+    index = start_index
+    reopened = 0
+    with metrics.span("gdrive.download_verified") as download_span:
+        while index < total:
+            buffer = bytearray()
+            try:
+                for block in _open_media_stream(service, gdrive_file_id, crypto_utils.chunk_range(integrity, index)[0]):
+                    buffer += block
+                    while index < total:
+                        start, end = crypto_utils.chunk_range(integrity, index)
+                        if len(buffer) < end - start + 1:
+                            break
+                        chunk = bytes(buffer[:end - start + 1])
+                        del buffer[:end - start + 1]
+                        if not crypto_utils.verify_chunk(integrity, index, chunk):
+                            chunk = _refetch_chunk(service, gdrive_file_id, integrity, index, max_refetch)
+                        download_span.add_bytes(len(chunk))
+                        yield chunk
+                        index += 1
+                    if index == total:
+                        break
+            except crypto_utils.IntegrityError:
+                raise
+            except Exception as e:
+                if reopened >= max_refetch:
+                    raise
+                LOG.warning("stream file %s terputus di chunk %d (%s), dibuka ulang", gdrive_file_id, index, e)
+            else:
+                if index < total:
+                    if reopened >= max_refetch:
+                        raise crypto_utils.IntegrityError(
+                            f"Unduhan berhenti di chunk {index + 1}/{total} (file lebih pendek dari manifest)."
+                        )
+                    LOG.warning("stream file %s berakhir di chunk %d, dibuka ulang", gdrive_file_id, index)
+            reopened += 1
+
+def download_to_file_verified(service, gdrive_file_id, integrity, dest_path, max_refetch=INTEGRITY_MAX_REFETCH,
+                              on_progress=None):
+    """
+    Mengunduh file ke `dest_path` dengan verifikasi per chunk. Jika dest_path sudah
+    berisi unduhan sebelumnya yang terputus, chunk utuh di dalamnya sudah pernah
+    diverifikasi (hanya chunk valid yang ditulis), jadi unduhan dilanjutkan dari
+    chunk berikutnya dan hanya chunk baru yang diverifikasi.
+    `on_progress(selesai, total)` opsional dipanggil setiap satu chunk tersimpan.
+    Mengembalikan jumlah chunk yang diunduh pada pemanggilan ini; raise IntegrityError.
+    """
+    chunk_size = integrity['chunk_size']
+    existing = os.path.getsize(dest_path) if os.path.exists(dest_path) else 0
+    if existing >= integrity['size']:
+        done = len(integrity['chunks'])
+        keep = integrity['size']
+    else:
+        done = existing // chunk_size
+        keep = done * chunk_size
+
+    fetched = 0
+    with open(dest_path, "r+b" if existing else "wb") as f:
+        f.truncate(keep)  # Buang sisa chunk terakhir yang belum lengkap
+        f.seek(keep)
+        for chunk in iter_verified_chunks(service, gdrive_file_id, integrity, done, max_refetch):
+            f.write(chunk)
+            f.flush()
+            fetched += 1
+            if on_progress:
+                on_progress(done + fetched, len(integrity['chunks']))
+    return fetched
+
 def delete_file_from_gdrive(service, file_id):
     """Menghapus file secara permanen dari Google Drive."""
     try:
-        service.files().delete(fileId=file_id).execute()
+        with metrics.span("gdrive.delete"):
+            execute_with_reauth(lambda: service.files().delete(fileId=file_id))
         return True
     except Exception as e:
         if "notFound" in str(e):
@@ -0,0 +1,490 @@
+# src/jobs.py
+# Antrean pekerjaan di background untuk upload/download.
+#
+# Tombol di dashboard hanya memasukkan pekerjaan ke antrean lalu langsung
+# kembali, sehingga rerun Streamlit (interaksi widget lain) tidak lagi
+# membatalkan proses yang sedang berjalan. Alur I/O (GDrive, Firestore)
+# dijalankan di thread pool, sedangkan enkripsi/dekripsi yang berat di CPU
+# dijalankan di process pool agar tidak berebut GIL dengan thread Streamlit.
+#
+# Status setiap pekerjaan disimpan sebagai JSON di JOBS_DIR (default "jobs"),
+# bersama file input/hasilnya. Password dan pesan rahasia steganografi TIDAK
+# pernah ditulis ke disk. Input plaintext dihapus begitu selesai dienkripsi,
+# hasil dekripsi dihapus JOBS_RESULT_TTL detik setelah pekerjaan selesai, dan
+# saat server dijalankan semua file sisa di JOBS_DIR dihapus (pekerjaan yang
+# belum selesai ditandai gagal).
+#
+# Pengecualian: unduhan ber-manifest integritas yang gagal di tengah jalan
+# menyimpan chunk yang sudah terverifikasi di "<gdrive_file_id>.part" (isinya
+# ciphertext). Download ulang file yang sama melanjutkan dari sana, juga setelah
+# restart; sisa .part yang lebih tua dari JOBS_PARTIAL_TTL dihapus.
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import datetime, timezone
+from src import crypto_utils
+from src import metrics
+from src import profiling
+from src import upload_planner
+from src.settings import get_setting, get_int_setting
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+ACTIVE_STATES = (QUEUED, RUNNING)
+
+DEFAULT_RESULT_TTL = 600      # detik
+DEFAULT_PARTIAL_TTL = 86400   # detik
+PARTIAL_SUFFIX = ".part"
+PROGRESS_SAVE_INTERVAL = 1.0  # detik; progres per chunk tidak perlu ditulis ke disk setiap kali
+
+_lock = threading.Lock()
+_jobs = None           # job_id -> dict status (dimuat dari JOBS_DIR saat pertama dipakai)
+_cancel_events = {}    # job_id -> threading.Event
+_futures = {}          # job_id -> Future di thread pool
+_secrets = {}          # job_id -> pesan rahasia hasil dekripsi steganografi (hanya di memori)
+_last_saved = {}       # job_id -> waktu (monotonic) status terakhir ditulis ke disk
+_partials_in_use = set()  # gdrive_file_id yang .part-nya sedang ditulis oleh suatu pekerjaan
+_io_pool = None
+_cpu_pool = None
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def get_jobs_dir():
+    return get_setting("JOBS_DIR", "jobs")
+
+def _path(job_id, suffix):
+    return os.path.join(get_jobs_dir(), f"{job_id}{suffix}")
+
+def _partial_path(gdrive_file_id):
+    return os.path.join(get_jobs_dir(), f"{gdrive_file_id}{PARTIAL_SUFFIX}")
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _save(job):
+    tmp_path = _path(job["id"], ".json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(job, f)
+    os.replace(tmp_path, _path(job["id"], ".json"))
+
+def _load_jobs():
+    """
+    Dipanggil dengan _lock terkunci. Saat pertama dipakai, semua file data sisa
+    proses sebelumnya (input, ciphertext, hasil dekripsi) dihapus dari JOBS_DIR;
+    hanya status yang dimuat. Pekerjaan yang terputus oleh restart ditandai gagal.
+    Unduhan parsial (.part) disimpan agar bisa dilanjutkan, kecuali sudah kedaluwarsa.
+    """
+    global _jobs
+    if _jobs is not None:
+        return
+    _jobs = {}
+    jobs_dir = get_jobs_dir()
+    os.makedirs(jobs_dir, exist_ok=True)
+    partial_cutoff = time.time() - get_int_setting("JOBS_PARTIAL_TTL", DEFAULT_PARTIAL_TTL)
+    for name in os.listdir(jobs_dir):
+        path = os.path.join(jobs_dir, name)
+        if name.endswith(PARTIAL_SUFFIX) and os.path.getmtime(path) > partial_cutoff:
+            continue
+        if not name.endswith(".json"):
+            if os.path.isfile(path):
+                os.remove(path)
+            continue
+        try:
+            with open(path, encoding="utf-8") as f:
+                job = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if job.get("status") in ACTIVE_STATES:
+            job.update(status=FAILED, error="Terputus karena server di-restart.", updated_at=_now())
+            _save(job)
+        elif job.get("status") == DONE and job.get("kind") == "download" and job.get("result"):
+            job.update(result=None, message="Hasil sudah dihapus karena server di-restart.", updated_at=_now())
+            _save(job)
+        _jobs[job["id"]] = job
+
+
+def _update(job_id, throttle=False, **fields):
+    """throttle=True (progres): status di memori selalu diperbarui, di disk paling sering tiap PROGRESS_SAVE_INTERVAL."""
+    with _lock:
+        job = _jobs[job_id]
+        job.update(fields, updated_at=_now())
+        now = time.monotonic()
+        if throttle and now - _last_saved.get(job_id, 0.0) < PROGRESS_SAVE_INTERVAL:
+            return
+        _last_saved[job_id] = now
+        _save(job)
+
+
+def _get_io_pool():
+    global _io_pool
+    with _lock:
+        if _io_pool is None:
+            _io_pool = ThreadPoolExecutor(max_workers=get_int_setting("JOBS_WORKERS", 2), thread_name_prefix="job")
+        return _io_pool
+
+def _get_cpu_pool():
+    global _cpu_pool
+    with _lock:
+        if _cpu_pool is None:
+            # "spawn": server Streamlit multi-thread, fork bisa mewarisi lock yang sedang dipegang
+            _cpu_pool = ProcessPoolExecutor(max_workers=get_int_setting("JOBS_CPU_WORKERS", os.cpu_count() or 2),
+                                            mp_context=multiprocessing.get_context("spawn"),
+                                            initializer=_init_cpu_worker)
+        return _cpu_pool
+
+
+# --- Kerja CPU (dijalankan di process pool) ---
+
+def _init_cpu_worker():
+    # Span worker dikirim ke proses induk (lihat _cipher_task), bukan diekspor sendiri
+    metrics.collect_spans()
+
+def _cipher_task(action, username, *args):
+    """
+    Menjalankan _cipher di worker, diprofil di worker itu sendiri (cProfile di
+    proses induk tidak melihat kerja proses lain). Mengembalikan (hasil _cipher,
+    span yang tercatat di worker) agar bisa dicatat ulang oleh proses induk.
+    """
+    try:
+        with profiling.profile_action(f"{action}.cipher", username):
+            result = _cipher(*args)
+    except BaseException:
+        metrics.take_collected()  # Tidak ikut terbawa ke tugas berikutnya
+        raise
+    return result, metrics.take_collected()
+
+def _cipher(operation, crypto_tag, in_path, out_path, password, stegano_message="", engine="memory"):
+    """
+    Enkripsi/dekripsi file in_path -> out_path. Enkripsi mengembalikan manifest
+    integritas ciphertext; dekripsi steganografi mengembalikan pesan rahasia.
+    engine="stream" (hanya ChaCha20) memproses file per chunk, lihat upload_planner.
+    """
+    if engine == "stream":
+        if operation == "encrypt":
+            crypto_utils.encrypt_file_stream(in_path, out_path, password)
+            return crypto_utils.compute_file_chunk_manifest(out_path)
+        crypto_utils.decrypt_file_stream(in_path, out_path, password)
+        return None
+
+    with open(in_path, "rb") as f:
+        data = f.read()
+
+    if operation == "encrypt":
+        if crypto_tag == "SuperEncrypt":
+            result = crypto_utils.encrypt_super(data, password)
+        elif crypto_tag == "Steganography":
+            result = crypto_utils.encrypt_stenography(data, stegano_message, password)
+        else:
+            result = crypto_utils.encrypt_file(data, password)
+        with open(out_path, "wb") as f:
+            f.write(result)
+        return crypto_utils.compute_chunk_manifest(result)
+
+    if crypto_tag == "SuperEncrypt":
+        result = crypto_utils.decrypt_super(data, password)
+    elif crypto_tag == "ChaCha20":
+        result = crypto_utils.decrypt_file(data, password)
+    elif crypto_tag == "Steganography":
+        return crypto_utils.decrypt_stenography(data, password)
+    else:
+        raise ValueError(f"Tipe enkripsi tidak dikenal: {crypto_tag}")
+    with open(out_path, "wb") as f:
+        f.write(result)
+    return None
+
+
+def _discard_output(out_path):
+    def callback(_future):
+        if os.path.exists(out_path):
+            os.remove(out_path)
+    return callback
+
+def _wait(job_id, future, out_path):
+    """Menunggu future sambil tetap responsif terhadap permintaan pembatalan."""
+    cancel_event = _cancel_events[job_id]
+    while True:
+        if cancel_event.is_set():
+            if not future.cancel():
+                # Sudah berjalan di proses lain: biarkan selesai, lalu buang hasilnya
+                future.add_done_callback(_discard_output(out_path))
+            raise JobCancelled()
+        try:
+            return future.result(timeout=0.2)
+        except FutureTimeoutError:
+            continue
+
+def _run_cipher(job_id, out_path, *args):
+    """Menjalankan _cipher di process pool dan mencatat span worker di proses ini."""
+    job = get_job(job_id)
+    future = _get_cpu_pool().submit(_cipher_task, job["kind"], job["username"], *args)
+    result, spans = _wait(job_id, future, out_path)
+    metrics.replay(spans)
+    return result
+
+def _check_cancel(job_id):
+    if _cancel_events[job_id].is_set():
+        raise JobCancelled()
+
+
+# --- Alur pekerjaan (dijalankan di thread pool) ---
+
+def _run_upload(job_id, db, password, stegano_message):
+    from src import firebase_utils
+    from src import google_utils
+
+    job = get_job(job_id)
+    in_path, enc_path = _path(job_id, ".in"), _path(job_id, ".enc")
+
+    _update(job_id, progress=0.05, message="Mengenkripsi file...")
+    integrity = _run_cipher(job_id, enc_path, "encrypt", job["crypto_tag"], in_path, enc_path,
+                            password, stegano_message, job.get("engine", "memory"))
+    # Plaintext tidak dibutuhkan lagi; jangan biarkan tersimpan selama upload berjalan
+    os.remove(in_path)
+    ciphertext_size = os.path.getsize(enc_path)
+
+    # Cek kuota (opsional) dari agregat pengguna: cukup 1 kali baca dokumen
+    quota_bytes = get_int_setting("STORAGE_QUOTA_BYTES", 0)
+    if quota_bytes:
+        stats = firebase_utils.get_user_storage_stats(db, job["username"])
+        if stats['total_ciphertext_bytes'] + ciphertext_size > quota_bytes:
+            raise Exception("Kuota penyimpanan terlampaui.")
+
+    _check_cancel(job_id)
+    _update(job_id, progress=0.5, message="Mengupload ke Google Drive...")
+    manager = google_utils.get_credential_manager()
+    if manager is None:
+        raise Exception("Koneksi Google Drive gagal.")
+    unique_filename = f"{job['filename']}_{datetime.now().timestamp()}.enc"
+    # Diupload langsung dari file (resumable per chunk), ciphertext tidak dimuat ke memori
+    gdrive_id = google_utils.upload_file_to_gdrive(manager.get_service(), enc_path, unique_filename)
+    if not gdrive_id:
+        raise Exception("Gagal mengupload ke Google Drive.")
+
+    # Setelah blob ada di GDrive, metadata selalu dicatat (pembatalan diabaikan)
+    _update(job_id, progress=0.9, message="Menyimpan metadata...")
+    if not firebase_utils.log_file_to_firestore(db, job["username"], job["filename"], gdrive_id, job["crypto_tag"],
+                                                plaintext_size=job["size"], ciphertext_size=ciphertext_size,
+                                                integrity=integrity):
+        raise Exception("Gagal menyimpan metadata.")
+    return {"message": f"File '{job['filename']}' berhasil disimpan!"}
+
+
+def _run_download(job_id, password, integrity):
+    from src import google_utils
+
+    job = get_job(job_id)
+    in_path, out_path = _path(job_id, ".in"), _path(job_id, ".out")
+
+    _update(job_id, progress=0.05, message="Mengunduh file dari Google Drive...")
+    manager = google_utils.get_credential_manager()
+    if manager is None:
+        raise Exception("Koneksi Google Drive gagal.")
+    if integrity:
+        # Diunduh per chunk langsung ke disk; chunk yang korup diunduh ulang per rentang.
+        # Jika gagal, chunk terverifikasi tetap di .part untuk dilanjutkan percobaan berikutnya.
+        gdrive_file_id = job["gdrive_file_id"]
+        with _lock:
+            resumable = gdrive_file_id not in _partials_in_use
+            if resumable:
+                _partials_in_use.add(gdrive_file_id)
+        # File yang sama sedang diunduh pekerjaan lain: unduh terpisah tanpa resume
+        part_path = _partial_path(gdrive_file_id) if resumable else in_path
+        try:
+            google_utils.download_to_file_verified(
+                manager.get_service(), gdrive_file_id, integrity, part_path,
+                on_progress=lambda done, total: _update(job_id, throttle=True, progress=0.05 + 0.45 * done / total)
+            )
+            if resumable:
+                os.replace(part_path, in_path)
+        finally:
+            if resumable:
+                with _lock:
+                    _partials_in_use.discard(gdrive_file_id)
+    else:
+        encrypted_bytes = google_utils.download_from_gdrive(manager.get_service(), job["gdrive_file_id"])
+        if encrypted_bytes is None:
+            raise Exception("File tidak ditemukan di Google Drive.")
+        with open(in_path, "wb") as f:
+            f.write(encrypted_bytes)
+        del encrypted_bytes
+
+    _check_cancel(job_id)
+    _update(job_id, progress=0.5, message="Mendekripsi file...")
+    try:
+        engine = upload_planner.decrypt_engine(os.path.getsize(in_path), job["crypto_tag"])
+        secret_text = _run_cipher(job_id, out_path, "decrypt", job["crypto_tag"], in_path, out_path, password, "", engine)
+    except JobCancelled:
+        raise
+    except Exception as e:
+        raise Exception(f"Password salah atau file korup. ({e})")
+
+    if job["crypto_tag"] == "Steganography":
+        # Gambar asli = file yang diunduh; pesan rahasia hanya disimpan di memori (lihat get_result)
+        os.replace(in_path, out_path)
+        with _lock:
+            _secrets[job_id] = secret_text
+        return {"result_path": out_path, "mime": "image/png"}
+    os.remove(in_path)
+    return {"result_path": out_path}
+
+
+def _execute(job_id, runner, *args):
+    job = get_job(job_id)
+    _update(job_id, status=RUNNING, started_at=_now())
+    try:
+        with profiling.profile_action(job["kind"], job["username"]), metrics.span(f"job.{job['kind']}"):
+            result = runner(job_id, *args)
+        _update(job_id, status=DONE, progress=1.0, message="Selesai", result=result, finished_at=time.time())
+    except JobCancelled:
+        _update(job_id, status=CANCELLED, message="Dibatalkan")
+    except Exception as e:
+        _update(job_id, status=FAILED, error=str(e))
+    finally:
+        # File antara (input/ciphertext) tidak dibutuhkan lagi, apa pun hasilnya.
+        # Unduhan parsial ada di <gdrive_file_id>.part dan sengaja tidak ikut dihapus.
+        for suffix in (".in", ".enc"):
+            if os.path.exists(_path(job_id, suffix)):
+                os.remove(_path(job_id, suffix))
+        with _lock:
+            _futures.pop(job_id, None)
+            _cancel_events.pop(job_id, None)
+            _last_saved.pop(job_id, None)
+
+
+def _submit(kind, username, runner, runner_args, job_id=None, **fields):
+    job_id = job_id or uuid.uuid4().hex
+    job = {
+        "id": job_id, "kind": kind, "username": username,
+        "status": QUEUED, "progress": 0.0, "message": "Menunggu antrean...",
+        "error": None, "result": None, "created_at": _now(), "updated_at": _now(),
+        **fields,
+    }
+    with _lock:
+        _load_jobs()
+        _jobs[job_id] = job
+        _save(job)
+        _cancel_events[job_id] = threading.Event()
+    _prune(username)
+    future = _get_io_pool().submit(_execute, job_id, runner, *runner_args)
+    with _lock:
+        if job_id in _cancel_events:  # Bisa saja sudah selesai sebelum baris ini
+            _futures[job_id] = future
+    return job_id
+
+
+# --- API publik ---
+
+def submit_upload(db, username, filename, file_bytes, crypto_tag, password, stegano_message=""):
+    """
+    Memasukkan pekerjaan enkripsi + upload ke antrean. Mengembalikan job_id.
+    Engine dipilih oleh upload_planner (mode tidak pernah diganti); UploadRejected
+    dilempar sebelum apa pun ditulis ke disk jika file tidak muat di batas memori.
+    """
+    plan = upload_planner.plan_upload(len(file_bytes), crypto_tag, len(stegano_message.encode('utf-8')))
+    job_id = uuid.uuid4().hex
+    with _lock:
+        _load_jobs()  # Membersihkan JOBS_DIR (sekali per proses) sebelum input ditulis
+    # Input ditulis ke disk agar bytes upload tidak ikut tertahan di session state
+    with open(_path(job_id, ".in"), "wb") as f:
+        f.write(file_bytes)
+    return _submit("upload", username, _run_upload, (db, password, stegano_message), job_id=job_id,
+                   filename=filename, crypto_tag=plan["crypto_tag"], engine=plan["engine"],
+                   plan_note=plan["note"], estimated_seconds=plan["seconds"], size=len(file_bytes))
+
+def submit_download(username, file_data, password):
+    """Memasukkan pekerjaan unduh + dekripsi ke antrean. Mengembalikan job_id."""
+    return _submit("download", username, _run_download, (password, file_data.get("integrity")),
+                   filename=file_data["original_filename"], crypto_tag=file_data.get("encryption_type"),
+                   gdrive_file_id=file_data.get("gdrive_file_id"), doc_id=file_data.get("doc_id"))
+
+
+def get_job(job_id):
+    with _lock:
+        _load_jobs()
+        job = _jobs.get(job_id)
+        return dict(job) if job else None
+
+def list_jobs(username):
+    """Semua pekerjaan milik pengguna, terbaru dulu."""
+    _expire_results()
+    with _lock:
+        _load_jobs()
+        jobs = [dict(j) for j in _jobs.values() if j["username"] == username]
+    return sorted(jobs, key=lambda j: j["created_at"], reverse=True)
+
+def _expire_results():
+    """Menghapus hasil dekripsi (file .out dan pesan rahasia) yang lebih tua dari JOBS_RESULT_TTL."""
+    cutoff = time.time() - get_int_setting("JOBS_RESULT_TTL", DEFAULT_RESULT_TTL)
+    with _lock:
+        _load_jobs()
+        expired = [j["id"] for j in _jobs.values()
+                   if j["status"] == DONE and j["kind"] == "download" and j.get("result")
+                   and j.get("finished_at", 0) <= cutoff]
+    for job_id in expired:
+        with _lock:
+            _secrets.pop(job_id, None)
+        _update(job_id, result=None, message="Hasil sudah dihapus (kedaluwarsa).")
+        if os.path.exists(_path(job_id, ".out")):
+            os.remove(_path(job_id, ".out"))
+
+def cancel_job(job_id):
+    """Meminta pembatalan. Mengembalikan False jika pekerjaan sudah selesai."""
+    with _lock:
+        event = _cancel_events.get(job_id)
+        future = _futures.get(job_id)
+    if event is None:
+        return False
+    event.set()
+    if future is not None and future.cancel():
+        # Belum sempat berjalan: _execute tidak akan dipanggil
+        _update(job_id, status=CANCELLED, message="Dibatalkan")
+        with _lock:
+            _futures.pop(job_id, None)
+            _cancel_events.pop(job_id, None)
+        for suffix in (".in", ".enc"):
+            if os.path.exists(_path(job_id, suffix)):
+                os.remove(_path(job_id, suffix))
+    return True
+
+def get_result(job_id):
+    """
+    Hasil pekerjaan yang sudah selesai (dict dengan 'result_path', 'secret_text', dst.),
+    atau None jika belum selesai atau hasilnya sudah kedaluwarsa.
+    """
+    job = get_job(job_id)
+    if job is None or job["status"] != DONE or not job["result"]:
+        return None
+    result = dict(job["result"])
+    with _lock:
+        if job_id in _secrets:
+            result["secret_text"] = _secrets[job_id]
+    return result
+
+def delete_job(job_id):
+    """Menghapus status dan semua file milik pekerjaan yang sudah tidak aktif."""
+    with _lock:
+        _load_jobs()
+        job = _jobs.get(job_id)
+        if job is None or job["status"] in ACTIVE_STATES:
+            return False
+        del _jobs[job_id]
+        _secrets.pop(job_id, None)
+    for suffix in (".json", ".in", ".enc", ".out"):
+        if os.path.exists(_path(job_id, suffix)):
+            os.remove(_path(job_id, suffix))
+    return True
+
+
+def _prune(username):
+    """Hanya JOBS_KEEP pekerjaan terakhir (yang sudah tidak aktif) per pengguna yang disimpan."""
+    finished = [j for j in list_jobs(username) if j["status"] not in ACTIVE_STATES]
+    for job in finished[get_int_setting("JOBS_KEEP", 20):]:
+        delete_job(job["id"])
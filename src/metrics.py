@@ -0,0 +1,244 @@
+# src/metrics.py
+# Instrumentasi latensi per tahap (KDF, lapisan cipher, stego, Drive, Firestore).
+#
+# Pemakaian:
+#     with metrics.span("gdrive.upload", nbytes=len(data)):
+#         ...
+#
+#     @metrics.timed("firestore.get_user_files")
+#     def get_user_files(...): ...
+#
+# Setiap span dicatat sebagai log terstruktur (JSON, logger "src.metrics") dan
+# masuk ke histogram Prometheus yang bisa diekspor ke file (METRICS_FILE) atau
+# endpoint HTTP /metrics (METRICS_PORT). Modul ini sengaja tidak mengimpor
+# streamlit agar bisa dipakai juga di worker proses.
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LOG = logging.getLogger(__name__)
+
+METRIC_PREFIX = "dropbox"
+# Batas bucket histogram (detik), dari operasi cipher kecil sampai transfer besar
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+_lock = threading.Lock()
+_durations = {}    # (stage, status) -> {"buckets": [...], "sum": float, "count": int}
+_bytes_total = {}  # stage -> int
+
+_metrics_file = os.getenv("METRICS_FILE")
+_metrics_file_interval = float(os.getenv("METRICS_FILE_INTERVAL", "5"))
+_last_file_write = 0.0
+_server = None
+_collected = None  # list jika span dikumpulkan untuk proses induk (worker), lihat collect_spans
+
+
+class Span:
+    """Satu pengukuran yang sedang berjalan; byte bisa ditambahkan selama span aktif."""
+    __slots__ = ("name", "labels", "bytes", "status")
+
+    def __init__(self, name, nbytes=0, labels=None):
+        self.name = name
+        self.labels = labels or {}
+        self.bytes = nbytes
+        self.status = "ok"
+
+    def add_bytes(self, nbytes):
+        self.bytes += nbytes
+
+
+@contextmanager
+def span(name, nbytes=0, **labels):
+    """Mengukur durasi blok kode sebagai tahap `name` (status 'error' jika ada exception)."""
+    current = Span(name, nbytes, labels)
+    start = time.perf_counter()
+    try:
+        yield current
+    except BaseException:
+        current.status = "error"
+        raise
+    finally:
+        _record(current, time.perf_counter() - start)
+
+
+def timed(name):
+    """Decorator: bungkus seluruh pemanggilan fungsi dalam span `name`."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _record(current, duration):
+    if _collected is not None:
+        with _lock:
+            _collected.append((current.name, current.status, duration, current.bytes, current.labels))
+        return
+
+    key = (current.name, current.status)
+    with _lock:
+        hist = _durations.get(key)
+        if hist is None:
+            hist = _durations[key] = {"buckets": [0] * len(DURATION_BUCKETS), "sum": 0.0, "count": 0}
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if duration <= bound:
+                hist["buckets"][i] += 1
+        hist["sum"] += duration
+        hist["count"] += 1
+        if current.bytes:
+            _bytes_total[current.name] = _bytes_total.get(current.name, 0) + current.bytes
+
+    if LOG.isEnabledFor(logging.INFO):
+        LOG.info(json.dumps({
+            "event": "span",
+            "stage": current.name,
+            "status": current.status,
+            "duration_ms": round(duration * 1000, 3),
+            "bytes": current.bytes,
+            **current.labels,
+        }, default=str))
+
+    _maybe_write_file()
+
+
+def collect_spans():
+    """
+    Dipanggil di proses worker: span tidak lagi diekspor (METRICS_FILE diabaikan,
+    agar worker tidak menimpa file milik proses induk), tetapi dikumpulkan untuk
+    dikirim ke proses induk lewat take_collected() -> replay().
+    """
+    global _collected, _metrics_file
+    _metrics_file = None
+    _collected = []
+
+
+def take_collected():
+    """Mengambil (dan mengosongkan) span yang dikumpulkan sejak pemanggilan terakhir."""
+    with _lock:
+        if not _collected:
+            return []
+        records = list(_collected)
+        _collected.clear()
+    return records
+
+
+def replay(records):
+    """Mencatat span hasil take_collected() dari proses lain seolah-olah terjadi di proses ini."""
+    for name, status, duration, nbytes, labels in records or ():
+        current = Span(name, nbytes, labels)
+        current.status = status
+        _record(current, duration)
+
+
+def _format_labels(**labels):
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
+
+
+def render_prometheus():
+    """Mengembalikan semua metrik dalam format teks eksposisi Prometheus."""
+    with _lock:
+        durations = {k: {"buckets": list(v["buckets"]), "sum": v["sum"], "count": v["count"]}
+                     for k, v in _durations.items()}
+        bytes_total = dict(_bytes_total)
+
+    name = f"{METRIC_PREFIX}_stage_duration_seconds"
+    lines = [
+        f"# HELP {name} Latency of each pipeline stage.",
+        f"# TYPE {name} histogram",
+    ]
+    for (stage, status), hist in sorted(durations.items()):
+        for bound, count in zip(DURATION_BUCKETS, hist["buckets"]):
+            lines.append(f"{name}_bucket{_format_labels(stage=stage, status=status, le=bound)} {count}")
+        lines.append(f"{name}_bucket{_format_labels(stage=stage, status=status, le='+Inf')} {hist['count']}")
+        lines.append(f"{name}_sum{_format_labels(stage=stage, status=status)} {hist['sum']:.6f}")
+        lines.append(f"{name}_count{_format_labels(stage=stage, status=status)} {hist['count']}")
+
+    name = f"{METRIC_PREFIX}_stage_bytes_total"
+    lines += [
+        f"# HELP {name} Bytes processed by each pipeline stage.",
+        f"# TYPE {name} counter",
+    ]
+    for stage, total in sorted(bytes_total.items()):
+        lines.append(f"{name}{_format_labels(stage=stage)} {total}")
+
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    """Mengosongkan semua metrik (berguna untuk benchmark)."""
+    with _lock:
+        _durations.clear()
+        _bytes_total.clear()
+
+
+def write_prometheus_file(path):
+    """Menulis metrik ke file secara atomik (untuk node_exporter textfile collector)."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, path)
+
+
+def _maybe_write_file():
+    global _last_file_write
+    if not _metrics_file:
+        return
+    now = time.monotonic()
+    with _lock:
+        if now - _last_file_write < _metrics_file_interval:
+            return
+        _last_file_write = now
+    try:
+        write_prometheus_file(_metrics_file)
+    except OSError:
+        LOG.exception("gagal menulis file metrik %s", _metrics_file)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def configure(metrics_file=None, port=None, host="127.0.0.1", log_spans=False):
+    """
+    Mengaktifkan ekspor metrik. Aman dipanggil di setiap rerun Streamlit:
+    server HTTP /metrics dan handler log hanya dipasang sekali per proses.
+    """
+    global _metrics_file, _server
+    if log_spans and not LOG.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        LOG.addHandler(handler)
+        LOG.setLevel(logging.INFO)
+        LOG.propagate = False
+    if metrics_file:
+        _metrics_file = metrics_file
+    if port:
+        with _lock:
+            if _server is not None:
+                return
+            try:
+                _server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+            except OSError:
+                LOG.exception("gagal menjalankan endpoint metrik di port %s", port)
+                return
+        threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
@@ -0,0 +1,164 @@
+# src/profiling.py
+# Mode profiling opsional untuk aksi dashboard yang lambat di produksi.
+# Aktifkan dengan ENABLE_PROFILING=1 (.env atau Streamlit Secrets). Setiap aksi
+# yang dibungkus profile_action() menghasilkan satu dump cProfile (.prof) dan
+# ringkasan JSON (durasi, puncak memori tracemalloc) di PROFILE_DIR. Hanya
+# PROFILE_KEEP dump terbaru yang disimpan.
+import cProfile
+import datetime
+import io
+import json
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from src.settings import get_setting, get_bool_setting, get_int_setting
+
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0  # tracemalloc bersifat global per proses; hitung pemakainya
+
+
+def is_profiling_enabled():
+    return get_bool_setting("ENABLE_PROFILING")
+
+def get_profile_dir():
+    return get_setting("PROFILE_DIR", "profiles")
+
+def is_admin(username):
+    """Admin ditentukan lewat ADMIN_USERS (daftar username dipisah koma)."""
+    admins = get_setting("ADMIN_USERS", "") or ""
+    if isinstance(admins, (list, tuple)):
+        return username in admins
+    return username in {a.strip() for a in str(admins).split(",") if a.strip()}
+
+
+def _start_tracemalloc():
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _tracemalloc_users += 1
+        tracemalloc.reset_peak()
+
+def _stop_tracemalloc():
+    """Mengembalikan puncak memori (bytes) sejak reset terakhir."""
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        _, peak = tracemalloc.get_traced_memory()
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0:
+            tracemalloc.stop()
+        return peak
+
+
+def _rotate_profiles(profile_dir, keep):
+    """Menghapus dump terlama sehingga hanya `keep` dump terbaru yang tersisa."""
+    # Nama file diawali timestamp, jadi urutan nama = urutan waktu
+    dumps = sorted((f for f in os.listdir(profile_dir) if f.endswith(".prof")), reverse=True)
+    for old in dumps[keep:]:
+        base = os.path.join(profile_dir, old[:-len(".prof")])
+        for path in (base + ".prof", base + ".json"):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+@contextmanager
+def profile_action(action, username):
+    """
+    Membungkus satu aksi (mis. "upload", "download") dengan cProfile + tracemalloc
+    jika profiling aktif. Jika tidak aktif, overhead-nya hanya satu pengecekan setting.
+    """
+    if not is_profiling_enabled():
+        yield None
+        return
+
+    profiler = cProfile.Profile()
+    _start_tracemalloc()
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        profiler.enable()
+    except ValueError:
+        # Profiler lain sedang aktif di thread ini; jalankan aksi tanpa profiling
+        _stop_tracemalloc()
+        yield None
+        return
+
+    try:
+        yield profiler
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        profiler.disable()
+        duration = time.perf_counter() - start
+        peak_bytes = _stop_tracemalloc()
+        _save_profile(profiler, action, username, duration, peak_bytes, status)
+
+
+def _save_profile(profiler, action, username, duration, peak_bytes, status):
+    profile_dir = get_profile_dir()
+    os.makedirs(profile_dir, exist_ok=True)
+
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    safe_user = re.sub(r"[^A-Za-z0-9_.-]", "_", str(username))
+    base = os.path.join(profile_dir, f"{stamp}_{action}_{safe_user}")
+
+    profiler.dump_stats(base + ".prof")
+    with open(base + ".json", "w") as f:
+        json.dump({
+            "action": action,
+            "username": username,
+            "timestamp": stamp,
+            "duration_s": round(duration, 4),
+            "peak_memory_bytes": peak_bytes,
+            "status": status,
+        }, f)
+
+    _rotate_profiles(profile_dir, get_int_setting("PROFILE_KEEP", 50))
+
+
+def list_profiles():
+    """Daftar ringkasan profil (terbaru dulu), masing-masing dengan path dump .prof."""
+    profile_dir = get_profile_dir()
+    if not os.path.isdir(profile_dir):
+        return []
+
+    profiles = []
+    for name in os.listdir(profile_dir):
+        if not name.endswith(".json"):
+            continue
+        base = os.path.join(profile_dir, name[:-len(".json")])
+        if not os.path.exists(base + ".prof"):
+            continue
+        try:
+            with open(base + ".json") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            continue
+        meta["path"] = base + ".prof"
+        profiles.append(meta)
+    return sorted(profiles, key=lambda m: m["timestamp"], reverse=True)
+
+
+def top_functions(profile_path, limit=25, sort_by="cumulative"):
+    """Mengembalikan fungsi teratas dari dump .prof, diurutkan berdasarkan waktu kumulatif."""
+    stats = pstats.Stats(profile_path, stream=io.StringIO())
+    stats.sort_stats(sort_by)
+
+    rows = []
+    for func in stats.fcn_list[:limit]:
+        cc, ncalls, tottime, cumtime, _ = stats.stats[func]
+        filename, line, name = func
+        rows.append({
+            "Fungsi": f"{name} ({os.path.basename(filename)}:{line})",
+            "Panggilan": ncalls,
+            "Total (s)": round(tottime, 4),
+            "Kumulatif (s)": round(cumtime, 4),
+        })
+    return rows
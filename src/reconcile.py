@@ -0,0 +1,313 @@
+# reconcile.py
+# Rekonsiliasi GDrive <-> Firestore: mencari blob GDrive tanpa metadata (yatim,
+# membuang kuota) dan metadata yang menunjuk ke file GDrive yang sudah hilang.
+#
+# Jalankan dari root project:
+#   python -m src.reconcile                      # hanya laporan
+#   python -m src.reconcile --delete             # hapus yatim di kedua arah
+#   python -m src.reconcile --incremental        # hanya periksa yang baru sejak run terakhir
+#
+# Progres disimpan di file checkpoint (default: reconcile_checkpoint.json) paling
+# lama setiap CHECKPOINT_INTERVAL detik, sehingga run yang terputus bisa
+# dilanjutkan. Run yang selesai menyimpan "watermark" untuk mode --incremental.
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from dotenv import load_dotenv
+
+# Load environment variables FIRST (sama seperti main.py)
+load_dotenv()
+
+from firebase_admin import firestore
+from src import firebase_utils
+from src import google_utils
+
+DEFAULT_CHECKPOINT = "reconcile_checkpoint.json"
+DRIVE_PAGE_SIZE = 1000
+DRIVE_BATCH_SIZE = 100  # Batas yang disarankan Google untuk satu batch request Drive
+DEFAULT_GRACE_MINUTES = 60
+# Checkpoint berisi seluruh listing GDrive; menulis ulang di setiap halaman
+# membuat run besar menjadi O(n^2) dalam I/O disk
+CHECKPOINT_INTERVAL = 30  # detik
+
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_checkpoint(path, checkpoint):
+    """Tulis checkpoint secara atomik agar tidak korup jika proses terhenti."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _rfc3339(dt):
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+def _parse_time(value):
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def scan_drive(service, run, save, created_after=None):
+    """
+    Melanjutkan listing folder GDrive dari page token di `run`; setiap file
+    dicatat sebagai {id: {"name", "createdTime"}} di run["drive_files"].
+    """
+    query = f"'{google_utils.GDRIVE_FOLDER_ID}' in parents and trashed = false"
+    if created_after:
+        query += f" and createdTime > '{_rfc3339(created_after)}'"
+
+    while not run["drive_done"]:
+        page_token = run["drive_page_token"]
+        response = google_utils.execute_with_reauth(lambda: service.files().list(
+            q=query,
+            pageSize=DRIVE_PAGE_SIZE,
+            pageToken=page_token,
+            fields="nextPageToken, files(id, name, createdTime)",
+        ))
+        for f in response.get("files", []):
+            run["drive_files"][f["id"]] = {"name": f.get("name"), "createdTime": f.get("createdTime")}
+        run["drive_page_token"] = response.get("nextPageToken")
+        run["drive_done"] = run["drive_page_token"] is None
+        save()
+
+
+def scan_firestore(db, run, save, uploaded_after=None):
+    """
+    Mengumpulkan referensi metadata [username, doc_id, gdrive_file_id, filename, uploaded]
+    dari subkoleksi 'files' semua pengguna; pengguna yang sudah diproses dilewati.
+    """
+    users_done = set(run["users_done"])
+    usernames = sorted(doc.id for doc in db.collection('dropboxaccount').stream())
+    for username in usernames:
+        if username in users_done:
+            continue
+        files_ref = db.collection('dropboxaccount').document(username).collection('files')
+        query = files_ref
+        if uploaded_after:
+            query = query.where(filter=firestore.FieldFilter('upload_timestamp', '>', uploaded_after))
+        for doc in query.stream():
+            data = doc.to_dict()
+            uploaded = data.get('upload_timestamp')
+            run["metadata"].append([
+                username, doc.id, data.get('gdrive_file_id'), data.get('original_filename'),
+                _parse_time(uploaded).isoformat() if uploaded else None,
+            ])
+        run["users_done"].append(username)
+        save()
+
+
+def find_orphans(run, grace, orphan_floor=None):
+    """
+    Membandingkan kedua set ID. Objek yang lebih muda dari masa tenggang dilewati:
+    upload menulis ke GDrive dulu baru ke Firestore, jadi blob yang baru dibuat
+    bisa saja metadatanya belum tercatat. Pada mode incremental hanya blob yang
+    dibuat setelah `orphan_floor` yang dinilai (metadatanya pasti ikut terbaca).
+    """
+    started_at = _parse_time(run["started_at"])
+    referenced = {gdrive_id for _, _, gdrive_id, _, _ in run["metadata"] if gdrive_id}
+
+    orphan_blobs = []
+    for file_id, meta in sorted(run["drive_files"].items()):
+        created = _parse_time(meta["createdTime"]) if meta.get("createdTime") else None
+        if file_id in referenced or (created and created > started_at - grace):
+            continue
+        if orphan_floor and (created is None or created <= orphan_floor):
+            continue
+        orphan_blobs.append({"id": file_id, **meta})
+
+    dangling = []
+    for username, doc_id, gdrive_id, filename, uploaded in run["metadata"]:
+        # Metadata yang dibuat setelah listing GDrive dimulai belum tentu terlihat di listing
+        if uploaded and _parse_time(uploaded) >= started_at:
+            continue
+        if not gdrive_id or gdrive_id not in run["drive_files"]:
+            dangling.append({"username": username, "doc_id": doc_id,
+                             "gdrive_file_id": gdrive_id, "original_filename": filename})
+    return orphan_blobs, dangling
+
+
+def delete_drive_files(service, file_ids):
+    """Menghapus file GDrive dalam batch request (maks. 100 per batch). Mengembalikan {id: error|None}."""
+    results = {}
+
+    def callback(request_id, response, exception):
+        # File yang sudah tidak ada dianggap berhasil dihapus
+        if exception is not None and "notFound" not in str(exception):
+            results[request_id] = str(exception)
+        else:
+            results[request_id] = None
+
+    for start in range(0, len(file_ids), DRIVE_BATCH_SIZE):
+        batch = service.new_batch_http_request(callback=callback)
+        for file_id in file_ids[start:start + DRIVE_BATCH_SIZE]:
+            batch.add(service.files().delete(fileId=file_id), request_id=file_id)
+        try:
+            batch.execute()
+        except Exception as e:
+            for file_id in file_ids[start:start + DRIVE_BATCH_SIZE]:
+                results.setdefault(file_id, str(e))
+    return results
+
+
+def confirm_missing_drive_files(service, file_ids):
+    """
+    Memeriksa langsung (files.get, dalam batch request) apakah file GDrive sudah
+    tidak ada atau ada di trash. Mengembalikan (set ID yang hilang, {id: error}
+    untuk ID yang gagal diperiksa).
+    """
+    missing, errors = set(), {}
+
+    def callback(request_id, response, exception):
+        if exception is not None:
+            if "notFound" in str(exception):
+                missing.add(request_id)
+            else:
+                errors[request_id] = str(exception)
+        elif response.get("trashed"):
+            missing.add(request_id)
+
+    for start in range(0, len(file_ids), DRIVE_BATCH_SIZE):
+        batch = service.new_batch_http_request(callback=callback)
+        for file_id in file_ids[start:start + DRIVE_BATCH_SIZE]:
+            batch.add(service.files().get(fileId=file_id, fields="id, trashed"), request_id=file_id)
+        try:
+            batch.execute()
+        except Exception as e:
+            for file_id in file_ids[start:start + DRIVE_BATCH_SIZE]:
+                errors.setdefault(file_id, str(e))
+    return missing, errors
+
+
+def delete_dangling_metadata(db, dangling):
+    """Menghapus metadata per pengguna lewat delete_files_from_firestore (agregat ikut dikoreksi)."""
+    by_user = {}
+    for entry in dangling:
+        by_user.setdefault(entry["username"], []).append(entry["doc_id"])
+
+    results = {}
+    for username, doc_ids in by_user.items():
+        for result in firebase_utils.delete_files_from_firestore(db, username, doc_ids):
+            results[(username, result['doc_id'])] = result['error'] if not result['ok'] else None
+    return results
+
+
+def reconcile(db, service, checkpoint_path=DEFAULT_CHECKPOINT, incremental=False, delete=False,
+              grace_minutes=DEFAULT_GRACE_MINUTES):
+    """
+    Menjalankan (atau melanjutkan) satu run rekonsiliasi. Mengembalikan laporan
+    {'orphan_blobs', 'dangling_metadata', 'deleted_blobs', 'deleted_metadata', 'errors'}.
+    """
+    checkpoint = load_checkpoint(checkpoint_path)
+    last_saved = [0.0]
+
+    def save(force=False):
+        if force or time.monotonic() - last_saved[0] >= CHECKPOINT_INTERVAL:
+            save_checkpoint(checkpoint_path, checkpoint)
+            last_saved[0] = time.monotonic()
+
+    run = checkpoint.get("run")
+    if run is None or run.get("incremental") != incremental:
+        run = checkpoint["run"] = {
+            "started_at": _rfc3339(datetime.now(timezone.utc)),
+            "incremental": incremental,
+            "drive_page_token": None,
+            "drive_done": False,
+            "drive_files": {},
+            "users_done": [],
+            "metadata": [],
+        }
+        save(force=True)
+
+    grace = timedelta(minutes=grace_minutes)
+    metadata_after = drive_after = None
+    if incremental and checkpoint.get("watermark"):
+        # Blob dibuat paling lama `grace` sebelum metadatanya, jadi listing GDrive
+        # dimulai satu masa tenggang lebih awal dari metadata yang diperiksa
+        metadata_after = _parse_time(checkpoint["watermark"]) - grace
+        drive_after = metadata_after - grace
+    scan_drive(service, run, save, created_after=drive_after)
+    scan_firestore(db, run, save, uploaded_after=metadata_after)
+
+    save(force=True)
+
+    orphan_blobs, dangling = find_orphans(run, grace, orphan_floor=metadata_after)
+    report = {"orphan_blobs": orphan_blobs, "dangling_metadata": dangling,
+              "deleted_blobs": 0, "deleted_metadata": 0, "errors": []}
+
+    if metadata_after:
+        # Listing incremental hanya berisi blob baru: metadata baru yang menunjuk
+        # ke blob lama (mis. tersalin/dipulihkan) belum tentu yatim, jadi dicek langsung
+        candidates = sorted({d["gdrive_file_id"] for d in dangling if d["gdrive_file_id"]})
+        missing, errors = confirm_missing_drive_files(service, candidates)
+        for file_id, error in errors.items():
+            report["errors"].append(f"GDrive {file_id}: gagal diperiksa: {error}")
+        report["dangling_metadata"] = dangling = [
+            d for d in dangling if not d["gdrive_file_id"] or d["gdrive_file_id"] in missing]
+
+    if delete:
+        for file_id, error in delete_drive_files(service, [b["id"] for b in orphan_blobs]).items():
+            if error:
+                report["errors"].append(f"GDrive {file_id}: {error}")
+            else:
+                report["deleted_blobs"] += 1
+        for (username, doc_id), error in delete_dangling_metadata(db, dangling).items():
+            if error:
+                report["errors"].append(f"Firestore {username}/{doc_id}: {error}")
+            else:
+                report["deleted_metadata"] += 1
+
+    # Run selesai: watermark maju ke awal run ini, state run dibuang
+    checkpoint["watermark"] = run["started_at"]
+    checkpoint.pop("run")
+    save(force=True)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rekonsiliasi file GDrive dengan metadata Firestore.")
+    parser.add_argument("--delete", action="store_true", help="Hapus yatim (default: hanya laporan)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Hanya periksa file/metadata baru sejak run terakhir yang selesai")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="Path file checkpoint")
+    parser.add_argument("--grace-minutes", type=int, default=DEFAULT_GRACE_MINUTES,
+                        help="Blob GDrive yang lebih muda dari ini tidak dianggap yatim")
+    parser.add_argument("--report", help="Simpan laporan lengkap ke file JSON")
+    args = parser.parse_args()
+
+    db = firebase_utils.init_firebase()
+    service = google_utils.init_gdrive_service()
+    if db is None or service is None:
+        print("❌ Kredensial Firebase/GDrive tidak ditemukan. Lihat SETUP.md.")
+        return 1
+
+    report = reconcile(db, service, args.checkpoint, args.incremental, args.delete, args.grace_minutes)
+
+    print(f"🗑️ Blob GDrive tanpa metadata: {len(report['orphan_blobs'])}")
+    for blob in report["orphan_blobs"][:20]:
+        print(f"   - {blob['id']}  {blob['name']}  ({blob['createdTime']})")
+    print(f"🔗 Metadata tanpa file GDrive: {len(report['dangling_metadata'])}")
+    for entry in report["dangling_metadata"][:20]:
+        print(f"   - {entry['username']}/{entry['doc_id']}  {entry['original_filename']}")
+    if args.delete:
+        print(f"✅ Dihapus: {report['deleted_blobs']} blob, {report['deleted_metadata']} metadata")
+    for error in report["errors"]:
+        print(f"⚠️ {error}")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"📄 Laporan lengkap disimpan di {args.report}")
+    return 1 if report["errors"] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
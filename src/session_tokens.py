@@ -0,0 +1,195 @@
+# src/session_tokens.py
+# Token sesi bertanda tangan untuk login lewat cookie.
+#
+# Sebelumnya cookie hanya berisi username ('logged_in_user'), jadi siapa pun
+# bisa memalsukannya. Token berisi username, waktu terbit, waktu kedaluwarsa,
+# dan id acak, ditandatangani HMAC-SHA256 dengan SESSION_SECRET:
+#
+#     v2.<username base64url>.<iat ms>.<exp>.<jti>.<tanda tangan base64url>
+#
+# iat dalam milidetik (v2) agar login ulang tepat setelah "logout dari semua
+# perangkat" tidak ikut tercabut; token v1 (iat dalam detik) tetap diterima.
+#
+# Verifikasi cukup di memori (tanpa baca Firestore, tanpa PBKDF2). Pencabutan
+# (logout, atau semua sesi seorang pengguna) dicatat di koleksi Firestore
+# 'session_denylist', yang di-cache per proses dan dibaca ulang paling sering
+# setiap SESSION_DENYLIST_TTL detik.
+import base64
+import hashlib
+import hmac
+import logging
+import secrets
+import threading
+import time
+from firebase_admin import firestore
+from src import metrics
+from src.settings import get_setting, get_bool_setting, get_int_setting
+
+LOG = logging.getLogger(__name__)
+
+TOKEN_VERSION = "v2"
+LEGACY_TOKEN_VERSION = "v1"
+COOKIE_NAME = "session_token"
+DENYLIST_COLLECTION = "session_denylist"
+
+SESSION_TTL = get_int_setting("SESSION_TTL", 7 * 24 * 3600)             # detik
+SESSION_DENYLIST_TTL = get_int_setting("SESSION_DENYLIST_TTL", 60)      # detik
+
+_secret = None
+# jtis: jti -> exp token; revoked_before: username -> (revoked_before_ms, expires_at)
+_denylist = {"jtis": {}, "revoked_before": {}, "loaded_at": None}
+_denylist_lock = threading.Lock()
+
+
+def _get_secret():
+    global _secret
+    if _secret is None:
+        configured = get_setting("SESSION_SECRET")
+        if configured:
+            _secret = configured.encode("utf-8")
+        elif get_bool_setting("SESSION_SECRET_REQUIRED"):
+            raise RuntimeError("SESSION_SECRET wajib diset (SESSION_SECRET_REQUIRED=1).")
+        else:
+            # Tanpa secret tetap, token hanya berlaku selama proses ini hidup
+            LOG.warning("SESSION_SECRET belum diset; sesi login tidak bertahan setelah server restart "
+                        "dan tidak berlaku di instance lain.")
+            _secret = secrets.token_bytes(32)
+    return _secret
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+def _sign(payload):
+    return _b64encode(hmac.new(_get_secret(), payload.encode("utf-8"), hashlib.sha256).digest())
+
+
+def issue_token(username, ttl=None):
+    """Membuat token sesi baru untuk `username` (berlaku `ttl` detik, default SESSION_TTL)."""
+    now = time.time()
+    with _denylist_lock:
+        # Token baru selalu terbit setelah pencabutan terakhir yang diketahui, juga di milidetik yang sama
+        iat_ms = max(int(now * 1000), _denylist["revoked_before"].get(username, (-1, 0))[0] + 1)
+    payload = ".".join([TOKEN_VERSION, _b64encode(username.encode("utf-8")), str(iat_ms),
+                        str(int(now) + (ttl or SESSION_TTL)), secrets.token_hex(8)])
+    return f"{payload}.{_sign(payload)}"
+
+
+def parse_token(token):
+    """
+    Memeriksa tanda tangan dan masa berlaku. Mengembalikan dict
+    {'username', 'iat' (milidetik), 'exp', 'jti'} atau None jika token tidak valid.
+    Tidak memeriksa denylist (lihat verify_token).
+    """
+    if not token or not isinstance(token, str):
+        return None
+    payload, _, signature = token.rpartition(".")
+    parts = payload.split(".")
+    if len(parts) != 5 or parts[0] not in (TOKEN_VERSION, LEGACY_TOKEN_VERSION):
+        return None
+    if not hmac.compare_digest(_sign(payload), signature):
+        return None
+    try:
+        claims = {"username": _b64decode(parts[1]).decode("utf-8"),
+                  "iat": int(parts[2]), "exp": int(parts[3]), "jti": parts[4]}
+    except ValueError:
+        return None
+    if parts[0] == LEGACY_TOKEN_VERSION:
+        claims["iat"] *= 1000
+    if claims["exp"] <= time.time():
+        return None
+    return claims
+
+
+# --- Denylist (pencabutan) ---
+
+def _refresh_denylist(db):
+    """Membaca ulang denylist dari Firestore jika cache sudah lebih tua dari SESSION_DENYLIST_TTL."""
+    with _denylist_lock:
+        loaded_at = _denylist["loaded_at"]
+        if loaded_at is not None and time.monotonic() - loaded_at < SESSION_DENYLIST_TTL:
+            return
+        # Ditandai dulu, agar sesi lain tidak ikut membaca Firestore bersamaan
+        _denylist["loaded_at"] = time.monotonic()
+
+    try:
+        # Entri yang tokennya sudah kedaluwarsa tidak perlu dibaca lagi
+        query = db.collection(DENYLIST_COLLECTION).where(
+            filter=firestore.FieldFilter("expires_at", ">", int(time.time())))
+        with metrics.span("firestore.session_denylist"):
+            docs = [doc.to_dict() for doc in query.stream()]
+    except Exception:
+        with _denylist_lock:
+            _denylist["loaded_at"] = loaded_at
+        raise
+
+    now = int(time.time())
+    with _denylist_lock:
+        # Digabung, bukan diganti: pencabutan lokal yang terjadi selama query
+        # berjalan bisa belum terlihat di hasilnya. Entri yang tokennya sudah
+        # kedaluwarsa tidak dibutuhkan lagi dan dibuang di sini.
+        jtis = {jti: exp for jti, exp in _denylist["jtis"].items() if exp > now}
+        jtis.update((d["jti"], d["expires_at"]) for d in docs if d.get("jti"))
+        revoked_before = {u: v for u, v in _denylist["revoked_before"].items() if v[1] > now}
+        for d in docs:
+            if d.get("revoked_before_ms"):
+                current = revoked_before.get(d["username"], (-1, 0))
+                revoked_before[d["username"]] = max(current, (d["revoked_before_ms"], d["expires_at"]))
+        _denylist["jtis"] = jtis
+        _denylist["revoked_before"] = revoked_before
+
+
+def is_revoked(db, claims):
+    if db is not None:
+        try:
+            _refresh_denylist(db)
+        except Exception as e:
+            # Denylist lama tetap dipakai; dicoba lagi pada pemanggilan berikutnya
+            LOG.warning("Gagal memuat denylist sesi: %s", e)
+    with _denylist_lock:
+        if claims["jti"] in _denylist["jtis"]:
+            return True
+        return claims["iat"] <= _denylist["revoked_before"].get(claims["username"], (-1, 0))[0]
+
+
+def verify_token(db, token):
+    """Mengembalikan username jika token valid dan belum dicabut, selain itu None."""
+    with metrics.span("auth.session_token"):
+        claims = parse_token(token)
+        if claims is None or is_revoked(db, claims):
+            return None
+        return claims["username"]
+
+
+def revoke_token(db, token):
+    """Mencabut satu token (logout). Berlaku langsung di proses ini, di proses lain setelah cache diperbarui."""
+    claims = parse_token(token)
+    if claims is None:
+        return False  # Token tidak valid/kedaluwarsa, tidak perlu dicabut
+    db.collection(DENYLIST_COLLECTION).document(claims["jti"]).set({
+        "jti": claims["jti"],
+        "username": claims["username"],
+        "expires_at": claims["exp"],
+    })
+    with _denylist_lock:
+        _denylist["jtis"][claims["jti"]] = claims["exp"]
+    return True
+
+
+def revoke_user_sessions(db, username):
+    """Mencabut semua token `username` yang terbit sampai saat ini ("Logout dari semua perangkat")."""
+    now = time.time()
+    now_ms = int(now * 1000)
+    # Setelah semua token lama kedaluwarsa, entri ini tidak dibutuhkan lagi
+    expires_at = int(now) + SESSION_TTL
+    db.collection(DENYLIST_COLLECTION).document(f"user:{username}").set({
+        "username": username,
+        "revoked_before_ms": now_ms,
+        "expires_at": expires_at,
+    })
+    with _denylist_lock:
+        current = _denylist["revoked_before"].get(username, (-1, 0))
+        _denylist["revoked_before"][username] = max(current, (now_ms, expires_at))
@@ -0,0 +1,45 @@
+# src/settings.py
+import os
+import streamlit as st
+from dotenv import load_dotenv
+
+# Load .env untuk development lokal
+load_dotenv()
+
+
+def get_setting(name, default=None):
+    """
+    Membaca nilai konfigurasi dengan urutan prioritas yang sama seperti kredensial:
+    Streamlit Secrets -> Environment Variable -> default.
+    """
+    # PRIORITAS 1: Streamlit Secrets (untuk Cloud)
+    try:
+        if name in st.secrets:
+            return st.secrets[name]
+    except Exception:
+        pass  # Secrets tidak tersedia, lanjut ke prioritas berikutnya
+
+    # PRIORITAS 2: Environment Variable (untuk lokal .env)
+    value = os.getenv(name)
+    if value is not None:
+        return value
+
+    return default
+
+
+def get_int_setting(name, default):
+    """Seperti get_setting, tetapi selalu mengembalikan int (fallback ke default)."""
+    try:
+        return int(get_setting(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def get_bool_setting(name, default=False):
+    """Seperti get_setting, tetapi menerjemahkan '1'/'true'/'yes'/'on' menjadi True."""
+    value = get_setting(name, None)
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
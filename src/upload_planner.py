@@ -0,0 +1,161 @@
+# src/upload_planner.py
+# Memilih engine enkripsi berdasarkan ukuran file dan batas memori per proses.
+#
+# Semua cipher utama bekerja di memori dan membuat beberapa salinan buffer
+# (lihat MEMORY_FACTORS), jadi file 2 GB lewat encrypt_super bisa menghabiskan
+# RAM server. Sebelum pekerjaan dimulai, plan_upload memperkirakan memori
+# puncak dan waktu untuk mode yang dipilih, memakai throughput yang diukur
+# sekali per proses di mesin ini. Jika tidak muat di MEMORY_BUDGET_MB:
+#   - ChaCha20 dialihkan ke engine streaming (file -> file, format sama);
+#   - SuperEncrypt ditolak dengan saran memakai ChaCha20: Railway Fence mengacak
+#     seluruh pesan sehingga tidak bisa diproses per chunk, dan mode enkripsi
+#     tidak pernah diganti diam-diam;
+#   - Steganografi (dan semua yang tidak punya alternatif) ditolak.
+import hashlib
+import os
+import threading
+import time
+from src import crypto_utils
+from src.settings import get_int_setting
+
+MB = 1024 * 1024
+
+# Memori puncak per byte input di worker enkripsi, termasuk 1x input yang dibaca
+# dari disk. Diukur dengan tracemalloc (file 2 MB). Dekripsi ikut dihitung:
+# file yang bisa dienkripsi tetapi tidak bisa didekripsi kembali tidak berguna.
+# _decrypt_railway_bytes menyimpan indeks sebagai list int Python (~43x).
+MEMORY_FACTORS = {
+    ("SuperEncrypt", "memory"): {"encrypt": 5.3, "decrypt": 44.3},
+    ("ChaCha20", "memory"): {"encrypt": 3.1, "decrypt": 3.1},
+    ("Steganography", "memory"): {"encrypt": 3.0, "decrypt": 1.1},
+}
+# Engine streaming hanya memakai satu buffer chunk, berapa pun ukuran filenya
+STREAM_OVERHEAD_BYTES = 2 * crypto_utils.STREAM_CHUNK_SIZE
+
+CALIBRATION_SAMPLE_SIZE = 256 * 1024
+
+_throughput = None
+_throughput_lock = threading.Lock()
+
+
+class UploadRejected(ValueError):
+    """File tidak bisa diproses dalam batas memori/waktu yang dikonfigurasi."""
+
+
+def get_memory_budget():
+    """Batas memori per proses worker dalam byte (0 = tanpa batas)."""
+    return get_int_setting("MEMORY_BUDGET_MB", 1024) * MB
+
+
+def measure_throughput():
+    """
+    Throughput (byte/detik) tiap engine di mesin ini, tanpa biaya KDF, plus
+    durasi satu KDF. Diukur sekali per proses dengan sampel kecil (~0,3 detik).
+    """
+    global _throughput
+    with _throughput_lock:
+        if _throughput is not None:
+            return _throughput
+        from Crypto.Cipher import ARC4, ChaCha20
+
+        sample = os.urandom(CALIBRATION_SAMPLE_SIZE)
+        key = os.urandom(32)
+
+        def rate(fn, data):
+            start = time.perf_counter()
+            fn(data)
+            return len(data) / max(time.perf_counter() - start, 1e-9)
+
+        def super_layers(data):
+            data = crypto_utils._encrypt_vigenere_bytes(data, key[:16])
+            data = crypto_utils._encrypt_railway_bytes(data, 5)
+            return ARC4.new(key).encrypt(data)
+
+        start = time.perf_counter()
+        hashlib.pbkdf2_hmac('sha256', b'calibration', b'salt', 100000, dklen=32)
+        kdf_seconds = time.perf_counter() - start
+
+        stego_message = sample[:CALIBRATION_SAMPLE_SIZE // 16]  # Muat di sample (1 bit per byte gambar)
+        chacha = rate(lambda d: ChaCha20.new(key=key).encrypt(d), sample)
+        _throughput = {
+            "kdf_seconds": kdf_seconds,
+            ("SuperEncrypt", "memory"): rate(super_layers, sample),
+            ("ChaCha20", "memory"): chacha,
+            ("ChaCha20", "stream"): chacha,
+            # Per byte pesan yang disisipkan, bukan per byte gambar
+            ("Steganography", "memory"): rate(lambda m: crypto_utils._embed_lsb_bytes(sample, m), stego_message),
+        }
+        return _throughput
+
+
+def estimate(size, crypto_tag, engine, stegano_message_size=0):
+    """Perkiraan {'peak_bytes', 'seconds'} untuk memproses file berukuran `size`."""
+    throughput = measure_throughput()
+    if engine == "stream":
+        peak = STREAM_OVERHEAD_BYTES
+    else:
+        factors = MEMORY_FACTORS[(crypto_tag, engine)]
+        peak = int(size * max(factors["encrypt"], factors["decrypt"]))
+
+    # Steganografi: biaya waktu mengikuti panjang pesan, bukan ukuran gambar
+    work_bytes = stegano_message_size if crypto_tag == "Steganography" else size
+    return {
+        "peak_bytes": peak,
+        "seconds": throughput["kdf_seconds"] + work_bytes / throughput[(crypto_tag, engine)],
+    }
+
+
+def _candidates(crypto_tag):
+    """Urutan (crypto_tag, engine) yang dicoba untuk mode yang dipilih pengguna."""
+    if crypto_tag == "ChaCha20":
+        return [("ChaCha20", "memory"), ("ChaCha20", "stream")]
+    return [(crypto_tag, "memory")]
+
+
+def plan_upload(size, crypto_tag, stegano_message_size=0):
+    """
+    Memilih engine untuk mengenkripsi file berukuran `size` byte.
+
+    Returns:
+        dict {'crypto_tag', 'engine', 'peak_bytes', 'seconds', 'note'}; 'crypto_tag'
+        selalu sama dengan permintaan, hanya engine yang bisa berubah.
+
+    Raises:
+        UploadRejected jika tidak ada engine yang muat di MEMORY_BUDGET_MB
+        (dan UPLOAD_MAX_SECONDS jika diset), atau gambar stego terlalu kecil.
+    """
+    if crypto_tag == "Steganography":
+        # Sama dengan cek di encrypt_stenography, tapi sebelum pekerjaan dimulai
+        needed = 4 + stegano_message_size
+        if needed > size // 8:
+            raise UploadRejected(f"Gambar terlalu kecil. Perlu {needed} bytes, tersedia {size // 8} bytes")
+
+    budget = get_memory_budget()
+    max_seconds = get_int_setting("UPLOAD_MAX_SECONDS", 0)
+    rejected = []
+    for tag, engine in _candidates(crypto_tag):
+        est = estimate(size, tag, engine, stegano_message_size)
+        if budget and est["peak_bytes"] > budget:
+            rejected.append(f"{tag}/{engine} butuh ~{est['peak_bytes'] / MB:,.0f} MB memori")
+            continue
+        if max_seconds and est["seconds"] > max_seconds:
+            rejected.append(f"{tag}/{engine} butuh ~{est['seconds']:,.0f} detik")
+            continue
+
+        note = "File besar: dienkripsi secara streaming." if engine == "stream" else None
+        return {"crypto_tag": tag, "engine": engine, "note": note, **est}
+
+    limits = f"batas memori {budget / MB:,.0f} MB" + (f", batas waktu {max_seconds} detik" if max_seconds else "")
+    message = f"File {size / MB:,.1f} MB tidak bisa diproses ({limits}): " + "; ".join(rejected)
+    if crypto_tag == "SuperEncrypt":
+        message += ". Gunakan ChaCha20, yang bisa mengenkripsi file besar secara streaming."
+    raise UploadRejected(message)
+
+
+def decrypt_engine(size, crypto_tag):
+    """Engine dekripsi untuk file berukuran `size`: ChaCha20 besar didekripsi secara streaming."""
+    if crypto_tag != "ChaCha20":
+        return "memory"
+    factor = MEMORY_FACTORS[("ChaCha20", "memory")]["decrypt"]
+    budget = get_memory_budget()
+    return "stream" if budget and size * factor > budget else "memory"
@@ -0,0 +1,133 @@
+# src/zip_export.py
+# Ekspor beberapa file sekaligus sebagai satu ZIP.
+# Unduhan GDrive dan dekripsi berjalan paralel di thread pool (masing-masing
+# thread memakai service GDrive sendiri), lalu hasilnya ditulis satu per satu
+# ke file ZIP sementara di disk. Jumlah file yang "in flight" dibatasi sehingga
+# pemakaian memori tidak bergantung pada jumlah file yang dipilih.
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from src import crypto_utils
+from src import google_utils
+from src import metrics
+
+ZIP_CHUNK_SIZE = 1024 * 1024
+
+
+def decrypt_entries(file_data, encrypted_bytes, password):
+    """
+    Mendekripsi satu file sesuai 'encryption_type'-nya.
+    Mengembalikan daftar (nama_file, bytes) yang akan dimasukkan ke ZIP.
+    """
+    crypto_tag = file_data.get("encryption_type")
+    filename = file_data.get("original_filename") or file_data.get("doc_id", "file")
+
+    if crypto_tag == "SuperEncrypt":
+        return [(filename, crypto_utils.decrypt_super(encrypted_bytes, password))]
+    if crypto_tag == "ChaCha20":
+        return [(filename, crypto_utils.decrypt_file(encrypted_bytes, password))]
+    if crypto_tag == "Steganography":
+        # Gambar disimpan apa adanya, pesan rahasia sebagai .txt di sebelahnya
+        secret_text = crypto_utils.decrypt_stenography(encrypted_bytes, password)
+        secret_filename = filename.rsplit('.', 1)[0] + '_secret.txt'
+        return [(filename, encrypted_bytes), (secret_filename, secret_text.encode('utf-8'))]
+    raise ValueError(f"Tipe enkripsi tidak dikenal: {crypto_tag}")
+
+
+def _fetch_and_decrypt(manager, file_data, password):
+    """Dijalankan di worker thread: unduh dari GDrive lalu dekripsi."""
+    integrity = file_data.get("integrity")
+    if integrity:
+        # IntegrityError (chunk tetap korup) naik ke pemanggil dan dicatat di ERRORS.txt
+        encrypted_bytes = b"".join(google_utils.iter_verified_chunks(
+            manager.get_service(), file_data.get("gdrive_file_id"), integrity
+        ))
+    else:
+        encrypted_bytes = google_utils.download_from_gdrive(manager.get_service(), file_data.get("gdrive_file_id"))
+    if encrypted_bytes is None:
+        raise Exception("File tidak ditemukan di Google Drive.")
+    return decrypt_entries(file_data, encrypted_bytes, password)
+
+
+def _unique_name(name, used):
+    """Nama file boleh kembar di Firestore, tapi tidak di dalam ZIP."""
+    candidate, n = name, 1
+    root, ext = os.path.splitext(name)
+    while candidate in used:
+        n += 1
+        candidate = f"{root} ({n}){ext}"
+    used.add(candidate)
+    return candidate
+
+
+def _write_entry(zf, name, data):
+    with zf.open(name, "w") as dest:
+        view = memoryview(data)
+        for start in range(0, len(view), ZIP_CHUNK_SIZE):
+            dest.write(view[start:start + ZIP_CHUNK_SIZE])
+
+
+def export_files_to_zip(manager, files, password, max_workers=4, on_progress=None, out_dir=None):
+    """
+    Mengunduh + mendekripsi `files` (daftar metadata dari get_user_files) secara
+    paralel dan menulis hasilnya ke file ZIP sementara.
+
+    Args:
+        manager: DriveCredentialManager (lihat google_utils.get_credential_manager).
+        on_progress: callback opsional (selesai, total), dipanggil dari thread pemanggil.
+
+    Returns:
+        (zip_path, errors) — errors berisi {doc_id: (nama_file, pesan)} untuk file
+        yang gagal; dikunci per doc_id karena nama file boleh kembar.
+        File yang gagal juga dicatat di ERRORS.txt di dalam ZIP. Pemanggil wajib
+        menghapus zip_path setelah selesai dipakai.
+    """
+    fd, zip_path = tempfile.mkstemp(prefix="export_", suffix=".zip", dir=out_dir)
+    os.close(fd)
+    errors = {}
+    used_names = set()
+    total = len(files)
+    done = 0
+    window = max(1, max_workers) * 2  # Maksimal file hasil dekripsi yang tertahan di memori
+
+    try:
+        with metrics.span("export.zip") as export_span, \
+                zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as zf, \
+                ThreadPoolExecutor(max_workers=max_workers) as pool:
+            pending = {}
+            queue = iter(files)
+
+            def submit_next():
+                file_data = next(queue, None)
+                if file_data is not None:
+                    pending[pool.submit(_fetch_and_decrypt, manager, file_data, password)] = file_data
+
+            for _ in range(window):
+                submit_next()
+
+            while pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    file_data = pending.pop(future)
+                    try:
+                        for name, data in future.result():
+                            _write_entry(zf, _unique_name(name, used_names), data)
+                            export_span.add_bytes(len(data))
+                    except Exception as e:
+                        doc_id = file_data.get("doc_id") or file_data.get("gdrive_file_id")
+                        errors[doc_id] = (file_data.get("original_filename") or doc_id, str(e))
+                    done += 1
+                    if on_progress:
+                        on_progress(done, total)
+                    submit_next()
+
+            if errors:
+                report = "\n".join(f"{name} [{doc_id}]: {message}"
+                                   for doc_id, (name, message) in errors.items())
+                zf.writestr(_unique_name("ERRORS.txt", used_names), report + "\n")
+    except BaseException:
+        os.remove(zip_path)
+        raise
+
+    return zip_path, errors
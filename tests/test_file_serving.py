@@ -0,0 +1,34 @@
+"""Range header parsing of the download server (src/file_serving.py)."""
+import pytest
+
+from src import file_serving
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-9", (0, 10)),
+    ("bytes=90-", (90, 10)),
+    ("bytes=90-200", (90, 10)),   # end past EOF is clamped
+    ("bytes=-10", (90, 10)),      # suffix range: last 10 bytes
+    ("bytes=-500", (0, 100)),     # suffix longer than the file
+    ("bytes=99-99", (99, 1)),
+    (" bytes = 5-6", (5, 2)),
+])
+def test_parse_range_valid(header, expected):
+    assert file_serving._parse_range(header, 100) == expected
+
+
+@pytest.mark.parametrize("header", [
+    "bytes=100-",        # starts at EOF
+    "bytes=5-2",         # end before start
+    "bytes=0-1,5-6",     # multiple ranges are not supported
+    "items=0-9",         # wrong unit
+    "bytes=a-b",
+    "bytes=-0",
+    "",
+])
+def test_parse_range_invalid(header):
+    assert file_serving._parse_range(header, 100) is None
+
+
+def test_parse_range_empty_file():
+    assert file_serving._parse_range("bytes=0-", 0) is None
@@ -0,0 +1,154 @@
+"""Signed session tokens and the revocation denylist (src/session_tokens.py)."""
+import time
+
+import pytest
+
+from benchmarks.fakes import FakeFirestore
+from src import session_tokens
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(session_tokens, "_secret", b"test-secret")
+    monkeypatch.setattr(session_tokens, "_denylist", {"jtis": {}, "revoked_before": {}, "loaded_at": None})
+    monkeypatch.setattr(session_tokens, "SESSION_DENYLIST_TTL", 0)  # Always re-read Firestore
+
+
+@pytest.fixture
+def db():
+    return FakeFirestore()
+
+
+def _forget_local_cache():
+    """Simulate another server process: nothing cached, everything comes from Firestore."""
+    session_tokens._denylist.update(jtis={}, revoked_before={}, loaded_at=None)
+
+
+def test_round_trip(db):
+    token = session_tokens.issue_token("alice")
+    assert session_tokens.verify_token(db, token) == "alice"
+
+
+@pytest.mark.parametrize("token", [None, "", "garbage", "v1.a.b.c.d.e", 42])
+def test_malformed_tokens_are_rejected(db, token):
+    assert session_tokens.verify_token(db, token) is None
+
+
+def test_tampered_signature_is_rejected(db):
+    token = session_tokens.issue_token("alice")
+    assert session_tokens.verify_token(db, token[:-2] + ("AA" if token[-2:] != "AA" else "BB")) is None
+
+
+def test_forged_username_is_rejected(db):
+    token = session_tokens.issue_token("alice")
+    parts = token.split(".")
+    parts[1] = session_tokens._b64encode(b"bob")
+    assert session_tokens.verify_token(db, ".".join(parts)) is None
+
+
+def test_token_signed_with_other_secret_is_rejected(db, monkeypatch):
+    token = session_tokens.issue_token("alice")
+    monkeypatch.setattr(session_tokens, "_secret", b"another-secret")
+    assert session_tokens.verify_token(db, token) is None
+
+
+def test_expired_token_is_rejected(db):
+    assert session_tokens.verify_token(db, session_tokens.issue_token("alice", ttl=-1)) is None
+
+
+def test_revoke_token_only_revokes_that_token(db):
+    token, other = session_tokens.issue_token("alice"), session_tokens.issue_token("alice")
+    assert session_tokens.revoke_token(db, token)
+    assert session_tokens.verify_token(db, token) is None
+    assert session_tokens.verify_token(db, other) == "alice"
+
+
+def test_revocation_is_visible_to_other_processes(db):
+    token = session_tokens.issue_token("alice")
+    session_tokens.revoke_token(db, token)
+    _forget_local_cache()
+    assert session_tokens.verify_token(db, token) is None
+
+
+def test_revoke_invalid_token_is_a_no_op(db):
+    assert session_tokens.revoke_token(db, "garbage") is False
+
+
+def test_revoke_user_sessions_revokes_earlier_tokens(db):
+    old = session_tokens.issue_token("alice")
+    bob = session_tokens.issue_token("bob")
+    session_tokens.revoke_user_sessions(db, "alice")
+    assert session_tokens.verify_token(db, old) is None
+    assert session_tokens.verify_token(db, bob) == "bob"
+    _forget_local_cache()
+    assert session_tokens.verify_token(db, old) is None
+
+
+def test_is_revoked_without_db_uses_local_cache(db):
+    token = session_tokens.issue_token("alice")
+    session_tokens.revoke_token(db, token)
+    assert session_tokens.is_revoked(None, session_tokens.parse_token(token))
+
+
+def test_refresh_keeps_revocations_made_while_it_was_in_flight(db):
+    token = session_tokens.issue_token("carol")
+
+    class InFlightQuery:
+        def where(self, filter=None):
+            return self
+
+        def stream(self):
+            # The revocation is written elsewhere and missing from this query's result
+            session_tokens.revoke_token(FakeFirestore(), token)
+            return iter([])
+
+    class StaleDb:
+        def collection(self, name):
+            return InFlightQuery()
+
+    session_tokens._refresh_denylist(StaleDb())
+    assert session_tokens.is_revoked(None, session_tokens.parse_token(token))
+
+
+def test_refresh_failure_keeps_the_cached_denylist(db):
+    token = session_tokens.issue_token("alice")
+    session_tokens.revoke_token(db, token)
+
+    class BrokenDb:
+        def collection(self, name):
+            raise RuntimeError("firestore down")
+
+    assert session_tokens.verify_token(BrokenDb(), token) is None
+
+
+
+def test_relogin_right_after_revoking_all_sessions(db, monkeypatch):
+    # Revocation and the new login happen within the same millisecond
+    monkeypatch.setattr(session_tokens.time, "time", lambda: 1_800_000_000.5)
+    old = session_tokens.issue_token("alice")
+    session_tokens.revoke_user_sessions(db, "alice")
+    new = session_tokens.issue_token("alice")
+    assert session_tokens.verify_token(db, old) is None
+    assert session_tokens.verify_token(db, new) == "alice"
+
+
+def test_relogin_in_same_second_is_accepted_by_other_processes(db, monkeypatch):
+    clock = [1_800_000_000.1]
+    monkeypatch.setattr(session_tokens.time, "time", lambda: clock[0])
+    old = session_tokens.issue_token("alice")
+    session_tokens.revoke_user_sessions(db, "alice")
+    clock[0] = 1_800_000_000.9
+    new = session_tokens.issue_token("alice")
+    _forget_local_cache()
+    assert session_tokens.verify_token(db, old) is None
+    assert session_tokens.verify_token(db, new) == "alice"
+
+
+def test_legacy_v1_token_is_accepted_and_revocable(db):
+    iat = int(time.time())
+    payload = ".".join(["v1", session_tokens._b64encode(b"alice"), str(iat), str(iat + 60), "abcd"])
+    token = f"{payload}.{session_tokens._sign(payload)}"
+    assert session_tokens.parse_token(token)["iat"] == iat * 1000
+    assert session_tokens.verify_token(db, token) == "alice"
+    session_tokens.revoke_user_sessions(db, "alice")
+    assert session_tokens.verify_token(db, token) is None